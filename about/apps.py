@@ -4,4 +4,9 @@ from django.apps import AppConfig
 class AboutConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'about'
-    verbose_name = 'About Page'
\ No newline at end of file
+    verbose_name = 'About Page'
+
+    def ready(self):
+        from main.caching import track_model_versions
+        track_model_versions(self)
+        from . import signals  # noqa: F401
@@ -0,0 +1,48 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from about.page import DOCUMENT_KEY
+from main.caching import get_cache
+
+
+class Command(BaseCommand):
+    help = ('Compare queries per request and latency of the About page when it is rendered on every '
+            'request (the previous behaviour) and when it is served from the cached document')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per mode')
+
+    def handle(self, *args, **options):
+        client = Client()
+        url = reverse('about-page')
+        total = max(2, options['requests'])
+        results = {}
+
+        for mode, rendered in (('rendered', True), ('cached', False)):
+            timings, queries = [], []
+            for _ in range(total):
+                if rendered:
+                    get_cache().delete(DOCUMENT_KEY)
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    timings.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise CommandError(f'{url} answered {response.status_code}: {response.content[:200]!r}')
+                queries.append(len(captured))
+            p95 = statistics.quantiles(timings, n=20)[18]
+            results[mode] = p95
+            self.stdout.write(
+                f'{mode:<9} {statistics.mean(queries):5.1f} queries/request   '
+                f'p50 {statistics.median(timings) * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Cached document p95 is {results["rendered"] / results["cached"]:.1f}x faster over {total} requests'
+        ))
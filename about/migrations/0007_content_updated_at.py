@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('about', '0006_populate_partners'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ourstorycard',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='whatsetsusapartcard',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='whowearefeature',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
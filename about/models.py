@@ -48,6 +48,7 @@ class WhoWeAreFeature(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order']
@@ -100,6 +101,7 @@ class OurStoryCard(models.Model):
     title = models.CharField(max_length=255, help_text="e.g., 'Our Vision', 'Our Mission', 'Our Values'")
     description = models.TextField()
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order']
@@ -135,6 +137,7 @@ class WhatSetsUsApartCard(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order']
@@ -0,0 +1,85 @@
+"""
+The About page as one pre-rendered JSON document.
+
+The page is a handful of singleton sections that change about once a month,
+so instead of eight queries plus prefetches per request the rendered bytes
+are kept in the cache with the content versions (see main.caching) of the
+about models they were built from. Saving any about model (e.g. in the
+admin) regenerates the document once the change commits; a read that finds
+the versions moved on regenerates it as well.
+"""
+import hashlib
+
+from django.apps import apps
+from rest_framework.renderers import JSONRenderer
+
+from main.caching import get_cache, get_versions, version_key
+from .models import (
+    HeroSection, WhoWeAreSection, StatCard, OurStorySection, WhatSetsUsApartSection,
+    CallToActionSection, TeamMember, Partner
+)
+from .serializers import (
+    HeroSectionSerializer, WhoWeAreSectionSerializer, StatCardSerializer,
+    OurStorySectionSerializer, WhatSetsUsApartSectionSerializer,
+    CallToActionSectionSerializer, TeamMemberSerializer, PartnerSerializer
+)
+
+DOCUMENT_KEY = 'about:page'
+
+
+def get_models():
+    return list(apps.get_app_config('about').get_models())
+
+
+def build_about_page():
+    """Return all about page content as one dict"""
+    # Get all sections (or None if they don't exist)
+    hero = HeroSection.objects.first()
+    who_we_are = WhoWeAreSection.objects.prefetch_related('features').first()
+    stats = StatCard.objects.all().order_by('order')
+    our_story = OurStorySection.objects.prefetch_related('cards').first()
+    what_sets_us_apart = WhatSetsUsApartSection.objects.prefetch_related('cards').first()
+    call_to_action = CallToActionSection.objects.first()
+    team = TeamMember.objects.filter(is_active=True).order_by('order')
+    partners = Partner.objects.filter(is_active=True).order_by('order')
+
+    # Serialize all sections
+    return {
+        'hero': HeroSectionSerializer(hero).data if hero else None,
+        'who_we_are': WhoWeAreSectionSerializer(who_we_are).data if who_we_are else None,
+        'stats': StatCardSerializer(stats, many=True).data,
+        'our_story': OurStorySectionSerializer(our_story).data if our_story else None,
+        'what_sets_us_apart': WhatSetsUsApartSectionSerializer(what_sets_us_apart).data if what_sets_us_apart else None,
+        'call_to_action': CallToActionSectionSerializer(call_to_action).data if call_to_action else None,
+        'team': TeamMemberSerializer(team, many=True).data,
+        'partners': PartnerSerializer(partners, many=True).data,
+    }
+
+
+def regenerate_document(versions=None):
+    """Render and store the document; returns it"""
+    models = get_models()
+    if versions is None:
+        versions = get_versions(models)
+    # Versions are read before the rows, so an edit that lands while the page
+    # renders leaves the stored document stale rather than lost
+    content = JSONRenderer().render(build_about_page())
+    document = {
+        'content': content,
+        'etag': '"' + hashlib.md5(content).hexdigest() + '"',
+        'versions': list(versions),
+    }
+    get_cache().set(DOCUMENT_KEY, document, timeout=None)
+    return document
+
+
+def get_document():
+    """Return the current document; one cache round trip when nothing changed"""
+    models = get_models()
+    keys = [version_key(model) for model in models]
+    found = get_cache().get_many([DOCUMENT_KEY] + keys)
+    document = found.get(DOCUMENT_KEY)
+    versions = [found[key] for key in keys] if all(key in found for key in keys) else get_versions(models)
+    if document is None or document['versions'] != versions:
+        document = regenerate_document(versions)
+    return document
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.conf import settings
+from multimedia.derivatives import ImageVariantsField, ImageVariantsListSerializer
 from .models import (
     HeroSection, WhoWeAreSection, WhoWeAreFeature, StatCard,
     OurStorySection, OurStoryCard, WhatSetsUsApartSection,
@@ -94,10 +95,13 @@ class CallToActionSectionSerializer(serializers.ModelSerializer):
 class TeamMemberSerializer(serializers.ModelSerializer):
     """Serializer for Team Member"""
     profile_image_url = serializers.SerializerMethodField()
+    profile_image_variants = ImageVariantsField(source='profile_image')
 
     class Meta:
         model = TeamMember
-        fields = ['id', 'name', 'role', 'profile_image', 'profile_image_url', 'linkedin_url', 'order', 'is_active', 'updated_at']
+        list_serializer_class = ImageVariantsListSerializer
+        fields = ['id', 'name', 'role', 'profile_image', 'profile_image_url', 'profile_image_variants',
+                  'linkedin_url', 'order', 'is_active', 'updated_at']
 
     def get_profile_image_url(self, obj):
         """Return absolute URL for the profile image"""
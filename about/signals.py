@@ -0,0 +1,16 @@
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from .page import regenerate_document
+
+
+def regenerate_about_page(sender, **kwargs):
+    """Re-render the about page document once the change commits"""
+    transaction.on_commit(regenerate_document)
+
+
+for model in apps.get_app_config('about').get_models():
+    uid = f'about-page:{model._meta.label_lower}'
+    post_save.connect(regenerate_about_page, sender=model, dispatch_uid=uid)
+    post_delete.connect(regenerate_about_page, sender=model, dispatch_uid=uid)
@@ -0,0 +1,39 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from .models import StatCard
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AboutPageDocumentTestCase(TestCase):
+    """Test the pre-rendered About page document"""
+
+    def test_document_is_served_without_queries(self):
+        """Test a warm document needs no database and validates with its ETag"""
+        first = self.client.get('/about/page/')
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('stats', first.json())
+        with self.assertNumQueries(0):
+            second = self.client.get('/about/page/')
+        self.assertEqual(second.content, first.content)
+        with self.assertNumQueries(0):
+            response = self.client.get('/about/page/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(first['ETag'].startswith('W/'))
+
+    def test_saving_a_section_regenerates_the_document(self):
+        """Test an edit to any about model shows up with a new ETag"""
+        first = self.client.get('/about/page/')
+        StatCard.objects.create(value=42, label='Benchmarked Reports', order=99)
+        response = self.client.get('/about/page/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Benchmarked Reports')
+
+    def test_benchmark_command(self):
+        """Test the benchmark reports both modes"""
+        out = StringIO()
+        call_command('benchmark_about_page', requests=3, stdout=out)
+        self.assertIn('rendered', out.getvalue())
+        self.assertIn('0.0 queries/request', out.getvalue())
@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
-    about_page_view,
+    AboutPageView,
     HeroSectionViewSet,
     WhoWeAreSectionViewSet,
     StatCardViewSet,
@@ -19,6 +19,6 @@ router.register(r'what-sets-us-apart', WhatSetsUsApartSectionViewSet, basename='
 router.register(r'call-to-action', CallToActionSectionViewSet, basename='call-to-action')
 
 urlpatterns = [
-    path('page/', about_page_view, name='about-page'),
+    path('page/', AboutPageView.as_view(), name='about-page'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
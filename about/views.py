@@ -1,10 +1,13 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from main.caching import ConditionalGetMixin, prerendered_response
+from multimedia.models import ImageDerivative
 from .models import (
-    HeroSection, WhoWeAreSection, StatCard,
-    OurStorySection, WhatSetsUsApartSection, CallToActionSection, TeamMember, Partner
+    HeroSection, WhoWeAreSection, WhoWeAreFeature, StatCard, OurStorySection, OurStoryCard,
+    WhatSetsUsApartSection, WhatSetsUsApartCard, CallToActionSection, TeamMember, Partner
 )
+from .page import get_document
 from .serializers import (
     HeroSectionSerializer, WhoWeAreSectionSerializer, StatCardSerializer,
     OurStorySectionSerializer, WhatSetsUsApartSectionSerializer,
@@ -12,86 +15,72 @@ from .serializers import (
 )
 
 
-@api_view(['GET'])
-def about_page_view(request):
+class AboutPageView(APIView):
     """
     Get all about page content in a single request
     """
-    try:
-        # Get all sections (or None if they don't exist)
-        hero = HeroSection.objects.first()
-        who_we_are = WhoWeAreSection.objects.prefetch_related('features').first()
-        stats = StatCard.objects.all().order_by('order')
-        our_story = OurStorySection.objects.prefetch_related('cards').first()
-        what_sets_us_apart = WhatSetsUsApartSection.objects.prefetch_related('cards').first()
-        call_to_action = CallToActionSection.objects.first()
-        team = TeamMember.objects.filter(is_active=True).order_by('order')
-        partners = Partner.objects.filter(is_active=True).order_by('order')
-
-        # Serialize all sections
-        data = {
-            'hero': HeroSectionSerializer(hero).data if hero else None,
-            'who_we_are': WhoWeAreSectionSerializer(who_we_are).data if who_we_are else None,
-            'stats': StatCardSerializer(stats, many=True).data,
-            'our_story': OurStorySectionSerializer(our_story).data if our_story else None,
-            'what_sets_us_apart': WhatSetsUsApartSectionSerializer(what_sets_us_apart).data if what_sets_us_apart else None,
-            'call_to_action': CallToActionSectionSerializer(call_to_action).data if call_to_action else None,
-            'team': TeamMemberSerializer(team, many=True).data,
-            'partners': PartnerSerializer(partners, many=True).data,
-        }
-
-        return Response(data, status=status.HTTP_200_OK)
-
-    except Exception as e:
-        return Response(
-            {'error': str(e)},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
-
-
-class HeroSectionViewSet(viewsets.ReadOnlyModelViewSet):
+
+    def get(self, request):
+        try:
+            document = get_document()
+            return prerendered_response(request, document['content'], document['etag'])
+
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class HeroSectionViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for Hero Section"""
     queryset = HeroSection.objects.all()
     serializer_class = HeroSectionSerializer
 
 
-class WhoWeAreSectionViewSet(viewsets.ReadOnlyModelViewSet):
+class WhoWeAreSectionViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for Who We Are Section"""
     queryset = WhoWeAreSection.objects.prefetch_related('features').all()
     serializer_class = WhoWeAreSectionSerializer
+    conditional_models = [WhoWeAreFeature]
 
 
-class StatCardViewSet(viewsets.ReadOnlyModelViewSet):
+class StatCardViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for Stat Cards"""
     queryset = StatCard.objects.all().order_by('order')
     serializer_class = StatCardSerializer
 
 
-class OurStorySectionViewSet(viewsets.ReadOnlyModelViewSet):
+class OurStorySectionViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for Our Story Section"""
     queryset = OurStorySection.objects.prefetch_related('cards').all()
     serializer_class = OurStorySectionSerializer
+    conditional_models = [OurStoryCard]
 
 
-class WhatSetsUsApartSectionViewSet(viewsets.ReadOnlyModelViewSet):
+class WhatSetsUsApartSectionViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for What Sets Us Apart Section"""
     queryset = WhatSetsUsApartSection.objects.prefetch_related('cards').all()
     serializer_class = WhatSetsUsApartSectionSerializer
+    conditional_models = [WhatSetsUsApartCard]
 
 
-class CallToActionSectionViewSet(viewsets.ReadOnlyModelViewSet):
+class CallToActionSectionViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for Call to Action Section"""
     queryset = CallToActionSection.objects.all()
     serializer_class = CallToActionSectionSerializer
 
 
-class TeamMemberViewSet(viewsets.ReadOnlyModelViewSet):
+class TeamMemberViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for Team Members"""
     queryset = TeamMember.objects.filter(is_active=True).order_by('order')
     serializer_class = TeamMemberSerializer
+    # Image variants appear as their derivatives are generated
+    conditional_models = [ImageDerivative]
+    conditional_timestamp_models = [ImageDerivative]
 
 
-class PartnerViewSet(viewsets.ReadOnlyModelViewSet):
+class PartnerViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for Partners"""
     queryset = Partner.objects.filter(is_active=True).order_by('order')
     serializer_class = PartnerSerializer
\ No newline at end of file
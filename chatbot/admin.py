@@ -1,11 +1,17 @@
 from django.contrib import admin
-from .models import Document, ChatSession, ChatMessage
+from django.db import IntegrityError, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Length
+from django.utils import timezone
+from main.pagination import EstimatedCountPaginator
+from .metrics import stage_percentiles
+from .models import Document, ChatSession, ChatMessage, ExtractedText, IngestionJob, ChatMetric
 
 
 @admin.register(Document)
 class DocumentAdmin(admin.ModelAdmin):
     """Admin interface for Document model"""
-    list_display = ['name', 'file_type', 'is_active', 'created_at', 'updated_at']
+    list_display = ['name', 'file_type', 'is_active', 'ingestion_status', 'created_at', 'updated_at']
     list_filter = ['is_active', 'created_at']
     search_fields = ['name', 'description']
     list_editable = ['is_active']
@@ -22,6 +28,20 @@ class DocumentAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        """Annotate each document with the status of its latest ingestion job"""
+        latest_job = IngestionJob.objects.filter(
+            source_type='document', source_id=OuterRef('pk')
+        ).order_by('-created_at')
+        return super().get_queryset(request).annotate(
+            _ingestion_status=Subquery(latest_job.values('status')[:1])
+        )
+
+    def ingestion_status(self, obj):
+        """Display the status of the latest ingestion job"""
+        return obj._ingestion_status or '-'
+    ingestion_status.short_description = 'Ingestion'
+
 
 class ChatMessageInline(admin.TabularInline):
     """Inline admin for displaying messages within a chat session"""
@@ -43,9 +63,13 @@ class ChatSessionAdmin(admin.ModelAdmin):
     list_filter = ['is_active', 'started_at', 'last_activity']
     search_fields = ['session_title', 'id']
     list_editable = ['is_active']
-    readonly_fields = ['id', 'started_at', 'created_at', 'updated_at', 'message_count']
+    readonly_fields = ['id', 'started_at', 'created_at', 'updated_at', 'message_count',
+                      'context_summary', 'summarized_until']
     ordering = ['-last_activity']
     inlines = [ChatMessageInline]
+    # Sessions pile up; avoid exact COUNT(*)s of the whole table on every page
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     fieldsets = (
         ('Session Information', {
@@ -54,15 +78,26 @@ class ChatSessionAdmin(admin.ModelAdmin):
         ('Activity', {
             'fields': ('started_at', 'last_activity', 'message_count')
         }),
+        ('Conversation Summary', {
+            'fields': ('context_summary', 'summarized_until'),
+            'classes': ('collapse',)
+        }),
         ('Metadata', {
             'fields': ('id', 'created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
     )
 
+    def get_queryset(self, request):
+        """Count messages per listed session in the same query"""
+        messages = ChatMessage.objects.filter(session=OuterRef('pk')).order_by().values('session')
+        return super().get_queryset(request).annotate(
+            _message_count=Subquery(messages.annotate(count=Count('pk')).values('count')[:1])
+        )
+
     def message_count(self, obj):
         """Display the number of messages in the session"""
-        return obj.messages.count()
+        return obj._message_count or 0
     message_count.short_description = 'Messages'
 
 
@@ -95,3 +130,87 @@ class ChatMessageAdmin(admin.ModelAdmin):
         """Display a preview of the message content"""
         return obj.content[:100] + "..." if len(obj.content) > 100 else obj.content
     content_preview.short_description = 'Content'
+
+
+@admin.register(ExtractedText)
+class ExtractedTextAdmin(admin.ModelAdmin):
+    """Admin interface for the cached PDF text of knowledge base files"""
+    list_display = ['file_path', 'file_size', 'text_length', 'updated_at']
+    search_fields = ['file_path']
+    readonly_fields = ['file_path', 'file_size', 'file_mtime', 'content_hash',
+                      'text', 'created_at', 'updated_at']
+    ordering = ['file_path']
+
+    def get_queryset(self, request):
+        """Compute text length in the database instead of loading every text"""
+        return super().get_queryset(request).annotate(_text_length=Length('text'))
+
+    def has_add_permission(self, request):
+        return False
+
+    def text_length(self, obj):
+        """Display the number of extracted characters"""
+        return obj._text_length
+    text_length.short_description = 'Characters'
+    text_length.admin_order_field = '_text_length'
+
+
+@admin.register(IngestionJob)
+class IngestionJobAdmin(admin.ModelAdmin):
+    """Admin interface for knowledge base ingestion jobs"""
+    list_display = ['source_type', 'source_id', 'action', 'file_path', 'status',
+                   'attempts', 'chunk_count', 'created_at', 'run_after', 'finished_at']
+    list_filter = ['status', 'source_type', 'action', 'created_at']
+    search_fields = ['source_id', 'file_path', 'error']
+    readonly_fields = ['source_type', 'source_id', 'action', 'file_path', 'status', 'attempts',
+                      'error', 'chunk_count', 'created_at', 'run_after', 'started_at', 'finished_at']
+    ordering = ['-created_at']
+    actions = ['retry_jobs']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Retry selected jobs')
+    def retry_jobs(self, request, queryset):
+        """Put failed or finished jobs back on the queue, due now"""
+        updated = 0
+        for job in queryset.exclude(status='running').order_by('-created_at'):
+            try:
+                with transaction.atomic():
+                    updated += IngestionJob.objects.filter(pk=job.pk).update(
+                        status='pending', attempts=0, error='', run_after=timezone.now()
+                    )
+            except IntegrityError:
+                # The source already has a pending job (unique_pending_ingestion_job)
+                continue
+        self.message_user(request, f'{updated} jobs queued for retry.')
+
+
+@admin.register(ChatMetric)
+class ChatMetricAdmin(admin.ModelAdmin):
+    """
+    Admin interface for per-request chat timings.
+    The changelist shows p50/p95 per stage for the filtered time window.
+    """
+    change_list_template = 'admin/chatbot/chatmetric/change_list.html'
+    list_display = ['created_at', 'endpoint', 'cache_hit', 'context_ms', 'cache_ms', 'retrieval_ms',
+                    'llm_ms', 'persist_ms', 'total_ms', 'input_tokens', 'output_tokens']
+    list_filter = ['created_at', 'endpoint', 'cache_hit']
+    readonly_fields = [field.name for field in ChatMetric._meta.fields]
+    list_select_related = ['message']
+    date_hierarchy = 'created_at'
+    ordering = ['-created_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        """Add stage percentiles computed over the filtered changelist"""
+        response = super().changelist_view(request, extra_context=extra_context)
+        changelist = getattr(response, 'context_data', {}).get('cl')
+        if changelist is not None:
+            response.context_data['stage_percentiles'] = stage_percentiles(changelist.queryset)
+        return response
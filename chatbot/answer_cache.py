@@ -0,0 +1,97 @@
+"""
+Answer cache for repeated, session-independent chatbot questions.
+
+Entries are keyed by the normalized query plus a knowledge base version
+stamp, so any change to a Document, Publication or the ingested text
+produces new keys and old answers simply expire. Storage, TTL and LRU
+eviction are delegated to the configured Django cache backend.
+"""
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+
+from resources.models import Publication
+from .models import Document, ExtractedText
+
+KEY_PREFIX = 'chatbot:answer'
+HITS_KEY = 'chatbot:answer_cache:hits'
+MISSES_KEY = 'chatbot:answer_cache:misses'
+
+
+def get_cache():
+    return caches[getattr(settings, 'CHATBOT_ANSWER_CACHE_ALIAS', 'default')]
+
+
+def normalize_query(query):
+    """
+    Fold case, whitespace and punctuation ("What is CEPA?" -> "what is cepa").
+    Every word is kept: question words and negations change the answer.
+    """
+    return " ".join(re.findall(r'\w+', query.lower()))
+
+
+def knowledge_base_version():
+    """
+    Return a stamp that changes whenever knowledge base content changes.
+
+    Derived from the database rather than a counter in the cache, so it is
+    consistent across web and ingestion worker processes.
+    """
+    parts = []
+    for queryset in (Document.objects.all(), Publication.objects.all(), ExtractedText.objects.all()):
+        stats = queryset.aggregate(count=Count('pk'), latest=Max('updated_at'))
+        parts.append(f"{stats['count']}:{stats['latest']}")
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+
+def make_key(query, version):
+    digest = hashlib.sha256(normalize_query(query).encode()).hexdigest()
+    return f"{KEY_PREFIX}:{version}:{digest}"
+
+
+def _increment(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Counter missing or evicted: start it (a concurrent miss may be lost)
+        cache.set(key, 1, timeout=None)
+
+
+def get_cached_answer(query, version):
+    """Return the cached answer dict for a query, counting the hit or miss"""
+    if not normalize_query(query):
+        return None
+    entry = get_cache().get(make_key(query, version))
+    _increment(HITS_KEY if entry else MISSES_KEY)
+    return entry
+
+
+def store_answer(query, version, answer, selected_doc, pages=()):
+    """Cache an answer with its source document and cited pages"""
+    if not normalize_query(query):
+        return
+    get_cache().set(
+        make_key(query, version),
+        {
+            'answer': answer,
+            'source': dict({key: selected_doc[key] for key in ('name', 'url', 'type')}, pages=list(pages)),
+        },
+        timeout=getattr(settings, 'CHATBOT_ANSWER_CACHE_TTL', 3600),
+    )
+
+
+def get_stats():
+    """Return hit/miss counters for the answer cache"""
+    cache = get_cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 3) if total else 0.0,
+    }
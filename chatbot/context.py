@@ -0,0 +1,108 @@
+"""
+Token-budgeted conversation context for chatbot prompts.
+
+Recent turns are included verbatim (each capped in length) up to most of the
+budget. Turns that fall out of that window are folded, one short line each,
+into a rolling summary cached on ChatSession, so each request only reads the
+messages added since the last fold and the context stays the same size
+however long the session grows.
+"""
+import re
+
+from django.conf import settings
+
+from .models import ChatSession
+
+CHARS_PER_TOKEN = 4
+RECENT_SHARE = 0.75
+MAX_MESSAGE_TOKENS = 250
+SUMMARY_LINE_CHARS = 160
+FETCH_LIMIT = 20
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def estimate_tokens(text):
+    """Approximate the token count of text (about four characters per token)"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text to roughly `max_tokens`, on a word boundary"""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(' ', 1)[0] + "..."
+
+
+def role_label(message):
+    return "User" if message.message_type == "user" else "Assistant"
+
+
+def summarize_message(message):
+    """Condense a message into a single summary line"""
+    content = WHITESPACE_RE.sub(' ', message.content).strip()
+    if len(content) > SUMMARY_LINE_CHARS:
+        content = content[:SUMMARY_LINE_CHARS].rsplit(' ', 1)[0] + "..."
+    return f"- {role_label(message)}: {content}"
+
+
+def fold_into_summary(summary, new_lines, max_tokens):
+    """Append summary lines, dropping the oldest ones beyond `max_tokens`"""
+    lines = [line for line in summary.splitlines() if line] + new_lines
+    kept, used = [], 0
+    for line in reversed(lines):
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(reversed(kept))
+
+
+def build_conversation_context(session):
+    """
+    Build conversation history for Claude context within the token budget.
+    Returns a formatted string (empty for a session without history).
+    """
+    if session is None:
+        return ""
+
+    budget = getattr(settings, 'CHATBOT_CONTEXT_TOKEN_BUDGET', 800)
+    recent_budget = int(budget * RECENT_SHARE)
+
+    messages = session.messages.all()
+    if session.summarized_until:
+        messages = messages.filter(created_at__gt=session.summarized_until)
+    # Newest first; older unsummarized messages beyond the limit are dropped
+    messages = list(messages.order_by('-created_at')[:FETCH_LIMIT])
+
+    recent, used = [], 0
+    for message in messages:
+        line = f"{role_label(message)}: {truncate_to_tokens(message.content, MAX_MESSAGE_TOKENS)}"
+        cost = estimate_tokens(line)
+        if used + cost > recent_budget:
+            break
+        recent.append(line)
+        used += cost
+
+    overflow = messages[len(recent):]
+    if overflow:
+        session.context_summary = fold_into_summary(
+            session.context_summary,
+            [summarize_message(message) for message in reversed(overflow)],
+            budget - recent_budget,
+        )
+        session.summarized_until = overflow[0].created_at
+        # update() leaves last_activity untouched
+        ChatSession.objects.filter(pk=session.pk).update(
+            context_summary=session.context_summary,
+            summarized_until=session.summarized_until,
+        )
+
+    context = ""
+    if session.context_summary:
+        context += f"\n\nSummary of earlier conversation:\n{session.context_summary}\n"
+    if recent:
+        context += "\n\nPrevious conversation:\n" + "\n".join(reversed(recent)) + "\n"
+    return context
@@ -0,0 +1,152 @@
+"""
+PDF text extraction for the chatbot knowledge base.
+
+Extracted text is persisted in ExtractedText and keyed by the file's storage
+path, so a PDF is only parsed again when its size/mtime and content hash change.
+Every fresh extraction is also chunked and indexed for retrieval.
+"""
+import hashlib
+import os
+
+from django.conf import settings
+
+from .models import ExtractedText
+from .retrieval import index_extracted_text
+
+try:
+    from PyPDF2 import PdfReader
+except ImportError:
+    PdfReader = None
+
+
+def iter_pdf_pages(file_path):
+    """Yield (page_number, text) for each page of a PDF, parsing one page at a time"""
+    reader = PdfReader(file_path)
+    for number, page in enumerate(reader.pages, start=1):
+        yield number, (page.extract_text() or "").strip()
+
+
+def extract_pdf_pages(file_path, max_chars=None):
+    """
+    Extract the text of a PDF page by page, stopping at `max_chars`.
+
+    Returns (text, page_offsets) where page_offsets[i] is the character
+    offset at which page i + 1 starts. Pages are joined with a blank line so
+    chunks break at page boundaries, and pages after the character budget
+    are never parsed, which keeps memory bounded for very large reports.
+    """
+    if PdfReader is None or not file_path:
+        return "", []
+    if max_chars is None:
+        max_chars = getattr(settings, 'CHATBOT_EXTRACTION_MAX_CHARS', 2000000)
+
+    parts, page_offsets, length = [], [], 0
+    try:
+        for number, page_text in iter_pdf_pages(file_path):
+            separator = 2 if parts else 0
+            page_offsets.append(length + separator)
+            if not page_text:
+                continue
+            remaining = max_chars - length - separator
+            if remaining <= 0:
+                break
+            parts.append(page_text[:remaining])
+            length += separator + len(parts[-1])
+            if len(page_text) > remaining:
+                break
+    except Exception as e:
+        print(f"Error reading PDF {file_path}: {str(e)}")
+        return "", []
+    return "\n\n".join(parts), page_offsets
+
+
+def extract_text_from_pdf(file_path, max_chars=None):
+    """Extract text from a PDF file using PyPDF2"""
+    return extract_pdf_pages(file_path, max_chars)[0]
+
+
+def compute_content_hash(file_path):
+    """Return the SHA-256 hex digest of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_pdf(field_file):
+    """Return True if a FileField value points at a PDF"""
+    return bool(field_file) and field_file.name.lower().endswith('.pdf')
+
+
+def refresh_extracted_text(file_name, file_path, cached=None):
+    """
+    Return an up-to-date ExtractedText for a PDF, re-parsing it only if needed.
+
+    `file_name` is the storage path used as the cache key and `file_path` the
+    absolute path on disk. `cached` may be passed when the row was already
+    fetched. Returns None if the file is missing.
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+
+    if cached is None:
+        cached = ExtractedText.objects.filter(file_path=file_name).first()
+
+    if cached and cached.file_size == stat.st_size and cached.file_mtime == stat.st_mtime:
+        return cached
+
+    content_hash = compute_content_hash(file_path)
+    if cached and cached.content_hash == content_hash:
+        # File was touched but not changed: remember the new fingerprint only
+        cached.file_size = stat.st_size
+        cached.file_mtime = stat.st_mtime
+        cached.save(update_fields=['file_size', 'file_mtime', 'updated_at'])
+        return cached
+
+    text, page_offsets = extract_pdf_pages(file_path)
+    extracted, _ = ExtractedText.objects.update_or_create(
+        file_path=file_name,
+        defaults={
+            'file_size': stat.st_size,
+            'file_mtime': stat.st_mtime,
+            'content_hash': content_hash,
+            'text': text,
+            'page_offsets': page_offsets,
+        }
+    )
+    index_extracted_text(extracted)
+    return extracted
+
+
+def cache_field_file(field_file):
+    """Extract and persist the text of a PDF FileField value"""
+    if not is_pdf(field_file):
+        return None
+    return refresh_extracted_text(field_file.name, field_file.path)
+
+
+def get_texts_for_documents(documents):
+    """
+    Return a {file_name: text} mapping for knowledge base document dicts.
+
+    Cached rows are fetched with a single query; PDFs are only parsed when
+    they are new or changed on disk.
+    """
+    file_names = [doc['file_name'] for doc in documents if doc.get('file_name')]
+    cached_rows = {
+        row.file_path: row
+        for row in ExtractedText.objects.filter(file_path__in=file_names)
+    }
+
+    texts = {}
+    for doc in documents:
+        file_name = doc.get('file_name')
+        if not file_name:
+            continue
+        extracted = refresh_extracted_text(file_name, doc['path'], cached_rows.get(file_name))
+        if extracted and extracted.text:
+            texts[file_name] = extracted.text
+    return texts
@@ -0,0 +1,157 @@
+"""
+DB-backed ingestion queue for the chatbot knowledge base.
+
+Saving or deleting a Document or Publication queues an IngestionJob; the
+`run_ingestion_worker` management command claims jobs and extracts, chunks
+and indexes the PDFs in a thread pool. Chat requests only read the
+resulting ExtractedText/DocumentChunk rows.
+
+A unique constraint allows one pending job per source and action, so saves
+racing to queue the same work coalesce. Failed jobs are retried after an
+exponential backoff (RETRY_BACKOFF, doubled per attempt) up to MAX_ATTEMPTS.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from resources.models import Publication
+from .models import Document, ExtractedText, IngestionJob
+from .extraction import is_pdf, refresh_extracted_text
+from .retrieval import index_extracted_text
+
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = timedelta(minutes=1)
+
+
+def enqueue_job(source_type, source_id, action='index', file_path=''):
+    """Queue a job unless an identical one is already pending"""
+    try:
+        with transaction.atomic():
+            return IngestionJob.objects.create(
+                source_type=source_type,
+                source_id=str(source_id),
+                action=action,
+                file_path=file_path or '',
+            )
+    except IntegrityError:
+        # unique_pending_ingestion_job: an identical job is already queued
+        return None
+
+
+def enqueue_after_commit(source_type, source_id, action='index', file_path=''):
+    """Queue a job once the surrounding transaction commits"""
+    transaction.on_commit(lambda: enqueue_job(source_type, source_id, action, file_path))
+
+
+def knowledge_base_file_names():
+    """Return the storage paths of every PDF that belongs in the knowledge base"""
+    document_files = Document.objects.filter(is_active=True).values_list('file', flat=True)
+    publication_files = Publication.objects.exclude(pdf='').exclude(pdf=None).values_list('pdf', flat=True)
+    return {
+        name for name in list(document_files) + list(publication_files)
+        if name and name.lower().endswith('.pdf')
+    }
+
+
+def prune_orphaned_texts():
+    """Delete extracted text (and its chunks) for files no longer in the knowledge base"""
+    deleted, _ = ExtractedText.objects.exclude(file_path__in=knowledge_base_file_names()).delete()
+    return deleted
+
+
+def get_source_file(job):
+    """Return the PDF FileField value a job should index, or None to remove it"""
+    if job.source_type == 'document':
+        document = Document.objects.filter(pk=job.source_id).first()
+        if document and document.is_active and is_pdf(document.file):
+            return document.file
+    elif job.source_type == 'publication':
+        publication = Publication.objects.filter(pk=job.source_id).first()
+        if publication and is_pdf(publication.pdf):
+            return publication.pdf
+    return None
+
+
+def process_job(job):
+    """Run a claimed job and record its outcome"""
+    try:
+        field_file = get_source_file(job) if job.action == 'index' else None
+        if field_file:
+            extracted = refresh_extracted_text(field_file.name, field_file.path)
+            if extracted is None:
+                raise FileNotFoundError(f"File not found: {field_file.name}")
+            if not extracted.chunks.exists() and extracted.text:
+                index_extracted_text(extracted)
+            job.file_path = field_file.name
+            job.chunk_count = extracted.chunks.count()
+        elif job.file_path:
+            ExtractedText.objects.filter(file_path=job.file_path).delete()
+        job.status = 'done'
+        job.error = ''
+    except Exception as e:
+        job.error = str(e)
+        if job.attempts < MAX_ATTEMPTS:
+            job.status = 'pending'
+            job.run_after = timezone.now() + RETRY_BACKOFF * 2 ** (job.attempts - 1)
+        else:
+            job.status = 'failed'
+    job.finished_at = timezone.now()
+    update_fields = ['status', 'error', 'file_path', 'chunk_count', 'run_after', 'finished_at']
+    try:
+        with transaction.atomic():
+            job.save(update_fields=update_fields)
+    except IntegrityError:
+        # A newer pending job for the same source was queued meanwhile and will redo the work
+        job.status = 'failed'
+        job.save(update_fields=update_fields)
+    return job
+
+
+def claim_next_job():
+    """
+    Atomically move the oldest pending job that is due to running and return it.
+
+    The conditional UPDATE makes claiming safe across threads and worker
+    processes on both PostgreSQL and SQLite.
+    """
+    while True:
+        job_id = IngestionJob.objects.filter(status='pending', run_after__lte=timezone.now()).order_by(
+            'run_after'
+        ).values_list('id', flat=True).first()
+        if job_id is None:
+            return None
+        claimed = IngestionJob.objects.filter(id=job_id, status='pending').update(
+            status='running', started_at=timezone.now(), attempts=F('attempts') + 1
+        )
+        if claimed:
+            return IngestionJob.objects.get(id=job_id)
+
+
+def requeue_stale_jobs(timeout_minutes=30):
+    """Return jobs left running by a crashed worker to the queue"""
+    now = timezone.now()
+    stale = IngestionJob.objects.filter(status='running', started_at__lt=now - timedelta(minutes=timeout_minutes))
+    # Jobs already queued again by a later save are covered by that pending job
+    queued_again = IngestionJob.objects.filter(
+        status='pending', source_type=OuterRef('source_type'), source_id=OuterRef('source_id'),
+        action=OuterRef('action'),
+    )
+    stale.filter(Exists(queued_again)).update(
+        status='failed', error='Worker stopped; superseded by a pending job', finished_at=now
+    )
+    return stale.update(status='pending', run_after=now)
+
+
+def run_pending_jobs(limit=None):
+    """Process pending jobs in the current thread; returns the number processed"""
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        process_job(job)
+        processed += 1
+    return processed
+
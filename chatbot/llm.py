@@ -0,0 +1,154 @@
+"""
+LLM backends for the chatbot.
+
+The backend is chosen with the CHATBOT_LLM_BACKEND setting:
+
+- ``anthropic`` (default): Claude through a shared AsyncAnthropic client.
+  One client (and its pooled HTTP connections) is kept per event loop, so
+  under ASGI every in-flight chat in a process reuses the same client
+  instead of constructing a new one per request.
+- ``stub``: a deterministic local backend that sleeps for a configurable
+  latency and returns a configurable number of tokens without touching the
+  network, for load testing and CI benchmarks (see CHATBOT_LLM_STUB).
+"""
+import asyncio
+import hashlib
+import weakref
+
+from decouple import config
+from django.conf import settings
+
+try:
+    import anthropic
+except ImportError:
+    anthropic = None
+
+CHAT_MODEL = "claude-3-haiku-20240307"
+
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_api_key():
+    return config('CLAUDE_API_KEY', default=None)
+
+
+def get_async_client():
+    """Return the AsyncAnthropic client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = anthropic.AsyncAnthropic(api_key=get_api_key(), max_retries=2, timeout=60.0)
+        _clients[loop] = client
+    return client
+
+
+def record_usage(usage, input_tokens, output_tokens):
+    """Store token counts in the caller's `usage` dict, if one was given"""
+    if usage is not None:
+        usage['input_tokens'] = input_tokens
+        usage['output_tokens'] = output_tokens
+
+
+class AnthropicBackend:
+    """Claude via the Anthropic Messages API"""
+
+    name = 'anthropic'
+
+    def is_configured(self):
+        return anthropic is not None and bool(get_api_key())
+
+    async def complete(self, prompt, max_tokens, usage=None):
+        response = await get_async_client().messages.create(
+            model=CHAT_MODEL,
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        record_usage(usage, response.usage.input_tokens, response.usage.output_tokens)
+        return response.content[0].text.strip()
+
+    async def stream(self, prompt, max_tokens, usage=None):
+        async with get_async_client().messages.stream(
+            model=CHAT_MODEL,
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": prompt}]
+        ) as response:
+            async for text in response.text_stream:
+                yield text
+            if usage is not None:
+                message = await response.get_final_message()
+                record_usage(usage, message.usage.input_tokens, message.usage.output_tokens)
+
+
+class StubBackend:
+    """
+    Offline stand-in for the Anthropic backend.
+
+    Waits `latency` seconds before the first token and `token_delay` seconds
+    between tokens, and answers with `tokens` words chosen from a hash of the
+    prompt, so the same prompt always produces the same answer.
+    """
+
+    name = 'stub'
+
+    def __init__(self, latency=0.5, tokens=150, token_delay=0.0):
+        self.latency = latency
+        self.tokens = tokens
+        self.token_delay = token_delay
+
+    def is_configured(self):
+        return True
+
+    def answer_tokens(self, prompt, max_tokens):
+        digest = hashlib.sha256(prompt.encode()).hexdigest()
+        count = min(self.tokens, max_tokens)
+        return [f"{'Stub' if i == 0 else ' stub'}-{digest[i % len(digest)]}" for i in range(count)]
+
+    async def complete(self, prompt, max_tokens, usage=None):
+        tokens = self.answer_tokens(prompt, max_tokens)
+        await asyncio.sleep(self.latency + self.token_delay * len(tokens))
+        record_usage(usage, len(prompt) // 4, len(tokens))
+        return "".join(tokens)
+
+    async def stream(self, prompt, max_tokens, usage=None):
+        tokens = self.answer_tokens(prompt, max_tokens)
+        await asyncio.sleep(self.latency)
+        for token in tokens:
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield token
+        record_usage(usage, len(prompt) // 4, len(tokens))
+
+
+BACKENDS = {
+    AnthropicBackend.name: AnthropicBackend,
+    StubBackend.name: StubBackend,
+}
+
+
+def get_backend():
+    """Return the backend selected by CHATBOT_LLM_BACKEND"""
+    name = getattr(settings, 'CHATBOT_LLM_BACKEND', 'anthropic')
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown CHATBOT_LLM_BACKEND {name!r}; choose from {', '.join(BACKENDS)}")
+    if backend_class is StubBackend:
+        return StubBackend(**getattr(settings, 'CHATBOT_LLM_STUB', {}))
+    return backend_class()
+
+
+async def complete(prompt, max_tokens, usage=None):
+    """
+    Send a single-turn prompt and return the response text.
+    Token counts are written to the optional `usage` dict.
+    """
+    return await get_backend().complete(prompt, max_tokens, usage=usage)
+
+
+async def stream(prompt, max_tokens, usage=None):
+    """
+    Send a single-turn prompt and yield response text deltas.
+    Token counts are written to the optional `usage` dict once the stream ends.
+    """
+    async for text in get_backend().stream(prompt, max_tokens, usage=usage):
+        yield text
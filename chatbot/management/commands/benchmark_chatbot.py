@@ -0,0 +1,81 @@
+import asyncio
+import statistics
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import AsyncClient, override_settings
+
+DEFAULT_QUERIES = [
+    'What does CEPA do?',
+    'What are the findings on the national budget?',
+    'How is public policy research funded?',
+    'What recommendations were made on governance?',
+]
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the chat endpoint end to end (retrieval, context, persistence) '
+            'against the offline stub LLM backend; the rows it writes are rolled back')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Total number of chat requests')
+        parser.add_argument('--concurrency', type=int, default=5, help='Requests in flight at once')
+        parser.add_argument('--latency', type=float, default=0.2, help='Simulated LLM latency in seconds')
+        parser.add_argument('--tokens', type=int, default=150, help='Simulated answer length in tokens')
+        parser.add_argument('--query', action='append', dest='queries',
+                            help='Question to ask (repeatable); defaults to a built-in set')
+
+    def handle(self, *args, **options):
+        stub = {'latency': options['latency'], 'tokens': options['tokens'], 'token_delay': 0.0}
+        # The views run their ORM work on this thread (sync_to_async is thread sensitive), so the
+        # sessions, messages and metrics the benchmark writes are rolled back with this block
+        with override_settings(CHATBOT_LLM_BACKEND='stub', CHATBOT_LLM_STUB=stub), transaction.atomic():
+            timings, failures, elapsed = async_to_sync(self.run_requests)(options)
+            transaction.set_rollback(True)
+
+        if not timings:
+            raise CommandError(f'All {failures} requests failed (is the knowledge base indexed?)')
+
+        overhead = [timing - options['latency'] for timing in timings]
+        self.stdout.write(f'{len(timings)} ok, {failures} failed in {elapsed:.2f}s '
+                          f'({len(timings) / elapsed:.1f} req/s at concurrency {options["concurrency"]})')
+        for label, values in (('Latency', timings), ('Overhead', overhead)):
+            self.stdout.write(
+                f'{label:<9} p50 {percentile(values, 0.5) * 1000:7.1f} ms   '
+                f'p95 {percentile(values, 0.95) * 1000:7.1f} ms   '
+                f'mean {statistics.mean(values) * 1000:7.1f} ms'
+            )
+        self.stdout.write(self.style.SUCCESS('✓ Benchmark complete (overhead excludes simulated LLM latency)'))
+
+    async def run_requests(self, options):
+        client = AsyncClient()
+        queries = options['queries'] or DEFAULT_QUERIES
+        semaphore = asyncio.Semaphore(max(1, options['concurrency']))
+        timings, failures = [], 0
+
+        async def ask(index):
+            nonlocal failures
+            # A distinct suffix per request keeps the answer cache from short-circuiting the pipeline
+            query = f"{queries[index % len(queries)]} {index:04d}"
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post('/chatbot/chat/', {'query': query}, content_type='application/json')
+                duration = time.perf_counter() - start
+            if response.status_code == 200:
+                timings.append(duration)
+            else:
+                failures += 1
+                if failures == 1:
+                    self.stderr.write(f'Request failed ({response.status_code}): {response.content[:200]!r}')
+
+        start = time.perf_counter()
+        await asyncio.gather(*(ask(index) for index in range(options['requests'])))
+        return timings, failures, time.perf_counter() - start
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from chatbot.extraction import get_texts_for_documents
+from chatbot.models import ExtractedText
+from chatbot.retrieval import index_extracted_text
+from chatbot.views import get_all_knowledge_base_documents
+
+
+class Command(BaseCommand):
+    help = 'Extract knowledge base PDFs and rebuild the chatbot retrieval index'
+
+    def handle(self, *args, **options):
+        documents = get_all_knowledge_base_documents()
+        texts = get_texts_for_documents(documents)
+        self.stdout.write(f'{len(texts)} of {len(documents)} knowledge base documents have text')
+
+        total_chunks = 0
+        for extracted in ExtractedText.objects.filter(file_path__in=list(texts)):
+            chunk_count = index_extracted_text(extracted)
+            total_chunks += chunk_count
+            self.stdout.write(f'  {extracted.file_path}: {chunk_count} chunks')
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Indexed {total_chunks} chunks'))
@@ -0,0 +1,46 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from chatbot.ingestion import prune_orphaned_texts, run_pending_jobs, requeue_stale_jobs
+
+
+def drain_queue():
+    """Process pending jobs in a worker thread, then release its DB connection"""
+    try:
+        return run_pending_jobs()
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Process queued chatbot ingestion jobs (extract, chunk and index knowledge base PDFs)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2, help='Number of worker threads')
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help='Seconds to wait between polls when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+
+    def handle(self, *args, **options):
+        threads = max(1, options['threads'])
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'⚠ Requeued {requeued} stale running jobs'))
+        self.stdout.write(self.style.SUCCESS(f'Ingestion worker started with {threads} threads'))
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            while True:
+                futures = [executor.submit(drain_queue) for _ in range(threads)]
+                processed = sum(future.result() for future in futures)
+                if processed:
+                    # One scan of the whole table per drain, not per job
+                    pruned = prune_orphaned_texts()
+                    self.stdout.write(f'Processed {processed} jobs'
+                                      + (f', pruned {pruned} orphaned texts' if pruned else ''))
+                if options['once']:
+                    break
+                if not processed:
+                    time.sleep(options['poll_interval'])
@@ -0,0 +1,73 @@
+"""
+Per-stage latency and token instrumentation for chat requests.
+
+A StageTimer travels with a request through the chat pipeline and collects
+the wall-clock time of each stage plus the LLM token usage; the totals are
+stored as one ChatMetric row next to the assistant message.
+"""
+import time
+from contextlib import contextmanager
+
+from .models import ChatMetric
+
+STAGE_NAMES = [name for name, label in ChatMetric.STAGES]
+
+
+class StageTimer:
+    """Accumulate durations (in milliseconds) of named pipeline stages"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = {}
+        # Filled in by the LLM backend: input_tokens / output_tokens
+        self.usage = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.durations[name] = self.durations.get(name, 0.0) + elapsed
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+
+def record_chat_metrics(timer, message, endpoint='chat', cache_hit=False):
+    """Store the timings and token usage collected for a request"""
+    return ChatMetric.objects.create(
+        message=message,
+        endpoint=endpoint,
+        cache_hit=cache_hit,
+        total_ms=timer.elapsed_ms(),
+        input_tokens=timer.usage.get('input_tokens'),
+        output_tokens=timer.usage.get('output_tokens'),
+        **{f'{name}_ms': timer.durations.get(name) for name in STAGE_NAMES if name != 'total'},
+    )
+
+
+def percentile(queryset, field, fraction, count):
+    """Nearest-rank percentile of a non-null field, computed in the database"""
+    index = min(count - 1, int(round(fraction * (count - 1))))
+    return queryset.order_by(field).values_list(field, flat=True)[index]
+
+
+def stage_percentiles(queryset):
+    """
+    Return p50/p95 of every stage over the given ChatMetric queryset.
+    Stages skipped by a request (e.g. the LLM on a cache hit) are ignored.
+    """
+    rows = []
+    for name, label in ChatMetric.STAGES:
+        field = f'{name}_ms'
+        values = queryset.filter(**{f'{field}__isnull': False})
+        count = values.count()
+        rows.append({
+            'stage': label,
+            'count': count,
+            'p50': percentile(values, field, 0.5, count) if count else None,
+            'p95': percentile(values, field, 0.95, count) if count else None,
+        })
+    return rows
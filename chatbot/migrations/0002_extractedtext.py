@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractedText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_path', models.CharField(help_text='Storage path of the PDF relative to MEDIA_ROOT', max_length=500, unique=True)),
+                ('file_size', models.BigIntegerField(help_text='File size in bytes at extraction time')),
+                ('file_mtime', models.FloatField(help_text='File modification time at extraction time')),
+                ('content_hash', models.CharField(help_text='SHA-256 of the file contents', max_length=64)),
+                ('text', models.TextField(blank=True, help_text='Extracted plain text')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Extracted Text',
+                'verbose_name_plural': 'Extracted Texts',
+                'ordering': ['file_path'],
+            },
+        ),
+    ]
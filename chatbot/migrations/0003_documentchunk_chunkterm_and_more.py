@@ -0,0 +1,50 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0002_extractedtext'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(help_text='Order of the chunk within the document')),
+                ('text', models.TextField()),
+                ('length', models.PositiveIntegerField(default=0, help_text='Number of indexed terms in the chunk')),
+                ('extracted_text', models.ForeignKey(help_text='The extracted text this chunk was cut from', on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='chatbot.extractedtext')),
+            ],
+            options={
+                'verbose_name': 'Document Chunk',
+                'verbose_name_plural': 'Document Chunks',
+                'ordering': ['extracted_text', 'position'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChunkTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('frequency', models.PositiveIntegerField(default=1)),
+                ('chunk', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='chatbot.documentchunk')),
+            ],
+            options={
+                'verbose_name': 'Chunk Term',
+                'verbose_name_plural': 'Chunk Terms',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='documentchunk',
+            constraint=models.UniqueConstraint(fields=('extracted_text', 'position'), name='unique_chunk_position'),
+        ),
+        migrations.AddIndex(
+            model_name='chunkterm',
+            index=models.Index(fields=['term'], name='chatbot_chu_term_03d418_idx'),
+        ),
+    ]
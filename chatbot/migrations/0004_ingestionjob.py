@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0003_documentchunk_chunkterm_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_type', models.CharField(choices=[('document', 'Document'), ('publication', 'Publication')], max_length=20)),
+                ('source_id', models.CharField(help_text='Primary key of the Document or Publication', max_length=255)),
+                ('action', models.CharField(choices=[('index', 'Extract and index'), ('remove', 'Remove from index')], default='index', max_length=20)),
+                ('file_path', models.CharField(blank=True, help_text='Storage path of the PDF when the job was queued', max_length=500)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('chunk_count', models.PositiveIntegerField(default=0, help_text='Chunks indexed by this job')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Ingestion Job',
+                'verbose_name_plural': 'Ingestion Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='chatbot_ing_status_0e0404_idx'), models.Index(fields=['source_type', 'source_id'], name='chatbot_ing_source__e9e146_idx')],
+            },
+        ),
+    ]
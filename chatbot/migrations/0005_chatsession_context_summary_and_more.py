@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0004_ingestionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatsession',
+            name='context_summary',
+            field=models.TextField(blank=True, help_text='Rolling summary of older turns used as LLM context'),
+        ),
+        migrations.AddField(
+            model_name='chatsession',
+            name='summarized_until',
+            field=models.DateTimeField(blank=True, help_text='Creation time of the newest message folded into the summary', null=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0005_chatsession_context_summary_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(choices=[('chat', 'Chat'), ('stream', 'Streaming chat')], default='chat', max_length=20)),
+                ('cache_hit', models.BooleanField(default=False, help_text='Answered from the answer cache')),
+                ('context_ms', models.FloatField(blank=True, null=True)),
+                ('cache_ms', models.FloatField(blank=True, null=True)),
+                ('retrieval_ms', models.FloatField(blank=True, null=True)),
+                ('llm_ms', models.FloatField(blank=True, null=True)),
+                ('persist_ms', models.FloatField(blank=True, null=True)),
+                ('total_ms', models.FloatField(blank=True, null=True)),
+                ('input_tokens', models.PositiveIntegerField(blank=True, null=True)),
+                ('output_tokens', models.PositiveIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('message', models.OneToOneField(help_text='The assistant message produced by the request', on_delete=django.db.models.deletion.CASCADE, related_name='metrics', to='chatbot.chatmessage')),
+            ],
+            options={
+                'verbose_name': 'Chat Metric',
+                'verbose_name_plural': 'Chat Metrics',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
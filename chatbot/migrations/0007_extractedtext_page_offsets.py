@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0006_chatmetric'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentchunk',
+            name='page_end',
+            field=models.PositiveIntegerField(blank=True, help_text='Last PDF page of the chunk', null=True),
+        ),
+        migrations.AddField(
+            model_name='documentchunk',
+            name='page_start',
+            field=models.PositiveIntegerField(blank=True, help_text='First PDF page of the chunk', null=True),
+        ),
+        migrations.AddField(
+            model_name='extractedtext',
+            name='page_offsets',
+            field=models.JSONField(blank=True, default=list, help_text='Character offset in the text at which each page starts'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0007_extractedtext_page_offsets'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatsession',
+            index=models.Index(fields=['last_activity', 'id'], name='chatbot_cha_last_ac_7acbe6_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:16
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, F, Min
+
+
+def prepare_pending_jobs(apps, schema_editor):
+    """
+    Keep claim order for queued jobs and drop duplicate pending jobs queued by
+    racing saves, so the unique constraint can be added.
+    """
+    IngestionJob = apps.get_model('chatbot', 'IngestionJob')
+    IngestionJob.objects.update(run_after=F('created_at'))
+
+    duplicates = (
+        IngestionJob.objects.filter(status='pending')
+        .values('source_type', 'source_id', 'action')
+        .annotate(first_id=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for row in duplicates:
+        IngestionJob.objects.filter(
+            source_type=row['source_type'], source_id=row['source_id'], action=row['action'], status='pending',
+        ).exclude(id=row['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0008_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='ingestionjob',
+            name='chatbot_ing_status_0e0404_idx',
+        ),
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='run_after',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Not claimed before this time (retry backoff)'),
+        ),
+        migrations.RunPython(prepare_pending_jobs, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ingestionjob',
+            index=models.Index(fields=['status', 'run_after'], name='chatbot_ing_status_ce3188_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='ingestionjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('source_type', 'source_id', 'action'), name='unique_pending_ingestion_job'),
+        ),
+    ]
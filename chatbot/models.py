@@ -63,6 +63,15 @@ class ChatSession(models.Model):
     started_at = models.DateTimeField(default=timezone.now)
     last_activity = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True, help_text="Session is active")
+    context_summary = models.TextField(
+        blank=True,
+        help_text="Rolling summary of older turns used as LLM context"
+    )
+    summarized_until = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text="Creation time of the newest message folded into the summary"
+    )
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -70,6 +79,9 @@ class ChatSession(models.Model):
         ordering = ['-last_activity']
         verbose_name = 'Chat Session'
         verbose_name_plural = 'Chat Sessions'
+        indexes = [
+            models.Index(fields=['last_activity', 'id']),
+        ]
 
     def __str__(self):
         return self.session_title or f"Session {self.id[:8]}"
@@ -130,3 +142,172 @@ class ChatMessage(models.Model):
     def __str__(self):
         preview = self.content[:50] + "..." if len(self.content) > 50 else self.content
         return f"{self.message_type}: {preview}"
+
+
+class ExtractedText(models.Model):
+    """Cached plain text of a knowledge base PDF, keyed by its storage path"""
+    file_path = models.CharField(
+        max_length=500,
+        unique=True,
+        help_text="Storage path of the PDF relative to MEDIA_ROOT"
+    )
+    file_size = models.BigIntegerField(help_text="File size in bytes at extraction time")
+    file_mtime = models.FloatField(help_text="File modification time at extraction time")
+    content_hash = models.CharField(max_length=64, help_text="SHA-256 of the file contents")
+    text = models.TextField(blank=True, help_text="Extracted plain text")
+    page_offsets = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Character offset in the text at which each page starts"
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['file_path']
+        verbose_name = 'Extracted Text'
+        verbose_name_plural = 'Extracted Texts'
+
+    def __str__(self):
+        return self.file_path
+
+
+class DocumentChunk(models.Model):
+    """A passage of extracted text used as the unit of retrieval"""
+    extracted_text = models.ForeignKey(
+        ExtractedText,
+        on_delete=models.CASCADE,
+        related_name='chunks',
+        help_text="The extracted text this chunk was cut from"
+    )
+    position = models.PositiveIntegerField(help_text="Order of the chunk within the document")
+    text = models.TextField()
+    length = models.PositiveIntegerField(default=0, help_text="Number of indexed terms in the chunk")
+    page_start = models.PositiveIntegerField(blank=True, null=True, help_text="First PDF page of the chunk")
+    page_end = models.PositiveIntegerField(blank=True, null=True, help_text="Last PDF page of the chunk")
+
+    class Meta:
+        ordering = ['extracted_text', 'position']
+        verbose_name = 'Document Chunk'
+        verbose_name_plural = 'Document Chunks'
+        constraints = [
+            models.UniqueConstraint(fields=['extracted_text', 'position'], name='unique_chunk_position'),
+        ]
+
+    def __str__(self):
+        return f"{self.extracted_text.file_path} #{self.position}"
+
+
+class ChunkTerm(models.Model):
+    """Inverted index posting: how often a term occurs in a chunk"""
+    chunk = models.ForeignKey(DocumentChunk, on_delete=models.CASCADE, related_name='terms')
+    term = models.CharField(max_length=64)
+    frequency = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        verbose_name = 'Chunk Term'
+        verbose_name_plural = 'Chunk Terms'
+        indexes = [
+            models.Index(fields=['term']),
+        ]
+
+    def __str__(self):
+        return f"{self.term} ({self.frequency})"
+
+
+class IngestionJob(models.Model):
+    """Queued extraction/indexing work for a knowledge base source"""
+    SOURCE_TYPES = [
+        ('document', 'Document'),
+        ('publication', 'Publication'),
+    ]
+    ACTIONS = [
+        ('index', 'Extract and index'),
+        ('remove', 'Remove from index'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    source_type = models.CharField(max_length=20, choices=SOURCE_TYPES)
+    source_id = models.CharField(max_length=255, help_text="Primary key of the Document or Publication")
+    action = models.CharField(max_length=20, choices=ACTIONS, default='index')
+    file_path = models.CharField(
+        max_length=500,
+        blank=True,
+        help_text="Storage path of the PDF when the job was queued"
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    chunk_count = models.PositiveIntegerField(default=0, help_text="Chunks indexed by this job")
+    created_at = models.DateTimeField(default=timezone.now)
+    run_after = models.DateTimeField(default=timezone.now, help_text="Not claimed before this time (retry backoff)")
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Ingestion Job'
+        verbose_name_plural = 'Ingestion Jobs'
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+            models.Index(fields=['source_type', 'source_id']),
+        ]
+        constraints = [
+            # At most one pending job per source and action, however many saves race to queue one
+            models.UniqueConstraint(
+                fields=['source_type', 'source_id', 'action'],
+                condition=models.Q(status='pending'),
+                name='unique_pending_ingestion_job',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.source_type} {self.source_id} ({self.status})"
+
+
+class ChatMetric(models.Model):
+    """Per-stage timings and token usage of one answered chat request"""
+    ENDPOINTS = [
+        ('chat', 'Chat'),
+        ('stream', 'Streaming chat'),
+    ]
+    # Timed stages of the chat pipeline, in order, with their admin labels
+    STAGES = [
+        ('context', 'Session & history'),
+        ('cache', 'Answer cache'),
+        ('retrieval', 'Retrieval'),
+        ('llm', 'LLM'),
+        ('persist', 'DB writes'),
+        ('total', 'Total'),
+    ]
+
+    message = models.OneToOneField(
+        ChatMessage,
+        on_delete=models.CASCADE,
+        related_name='metrics',
+        help_text="The assistant message produced by the request"
+    )
+    endpoint = models.CharField(max_length=20, choices=ENDPOINTS, default='chat')
+    cache_hit = models.BooleanField(default=False, help_text="Answered from the answer cache")
+    context_ms = models.FloatField(blank=True, null=True)
+    cache_ms = models.FloatField(blank=True, null=True)
+    retrieval_ms = models.FloatField(blank=True, null=True)
+    llm_ms = models.FloatField(blank=True, null=True)
+    persist_ms = models.FloatField(blank=True, null=True)
+    total_ms = models.FloatField(blank=True, null=True)
+    input_tokens = models.PositiveIntegerField(blank=True, null=True)
+    output_tokens = models.PositiveIntegerField(blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Chat Metric'
+        verbose_name_plural = 'Chat Metrics'
+
+    def __str__(self):
+        return f"{self.endpoint} {self.total_ms or 0:.0f} ms"
@@ -0,0 +1,220 @@
+"""
+Local BM25 retrieval over chunks of extracted knowledge base text.
+
+Extracted text is cut into paragraph-sized chunks and every chunk's term
+frequencies are stored in ChunkTerm, which acts as an inverted index. A chat
+query only reads the postings of its own terms, so selecting context no
+longer requires sending the whole corpus to the LLM.
+"""
+import math
+import re
+from bisect import bisect_right
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count
+
+from .models import ExtractedText, DocumentChunk, ChunkTerm
+
+CHUNK_TARGET_CHARS = 1200
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+PARAGRAPH_RE = re.compile(r'\n\s*\n')
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been
+before being below between both but by can could did do does doing down during
+each few for from further had has have having he her here hers herself him
+himself his how i if in into is it its itself just me more most my myself no
+nor not now of off on once only or other our ours ourselves out over own same
+she should so some such than that the their theirs them themselves then there
+these they this those through to too under until up very was we were what when
+where which while who whom why will with would you your yours yourself
+yourselves tell please
+""".split())
+
+
+def tokenize(text):
+    """Lowercase text and return its indexable terms"""
+    return [
+        token[:64]
+        for token in TOKEN_RE.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def _split_long(paragraph, limit):
+    """Split a paragraph longer than `limit` on whitespace"""
+    pieces, current = [], ""
+    for word in paragraph.split():
+        if current and len(current) + len(word) + 1 > limit:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _paragraph_spans(text):
+    """Yield (paragraph, offset) for the blank-line separated paragraphs of text"""
+    position = 0
+    for match in PARAGRAPH_RE.finditer(text):
+        yield text[position:match.start()], position
+        position = match.end()
+    yield text[position:], position
+
+
+def chunk_spans(text, target=CHUNK_TARGET_CHARS):
+    """
+    Group paragraphs of `text` into chunks of roughly `target` characters.
+    Returns (chunk, start, end) tuples with the chunk's character offsets in
+    `text` (approximate inside paragraphs that had to be split).
+    """
+    chunks, current, start, end = [], "", 0, 0
+    for paragraph, offset in _paragraph_spans(text):
+        stripped = paragraph.strip()
+        if not stripped:
+            continue
+        offset += len(paragraph) - len(paragraph.lstrip())
+        for piece in _split_long(stripped, target) if len(stripped) > target else [stripped]:
+            if current and len(current) + len(piece) + 2 > target:
+                chunks.append((current, start, end))
+                current, start = piece, offset
+            elif current:
+                current = f"{current}\n\n{piece}"
+            else:
+                current, start = piece, offset
+            end = offset + len(piece)
+            offset = end + 1
+    if current:
+        chunks.append((current, start, end))
+    return chunks
+
+
+def chunk_text(text, target=CHUNK_TARGET_CHARS):
+    """Group paragraphs of `text` into chunks of roughly `target` characters"""
+    return [chunk for chunk, start, end in chunk_spans(text, target)]
+
+
+def page_for_offset(page_offsets, offset):
+    """Return the 1-based page containing a character offset, if pages are known"""
+    if not page_offsets:
+        return None
+    return max(1, bisect_right(page_offsets, offset))
+
+
+def format_pages(page_start, page_end):
+    """Format a chunk's page range for citations ("p. 3", "pp. 3-4" or "")"""
+    if not page_start:
+        return ""
+    if page_end and page_end != page_start:
+        return f"pp. {page_start}-{page_end}"
+    return f"p. {page_start}"
+
+
+def index_extracted_text(extracted):
+    """(Re)build the chunks and postings for one ExtractedText row"""
+    with transaction.atomic():
+        DocumentChunk.objects.filter(extracted_text=extracted).delete()
+        spans = chunk_spans(extracted.text)
+        term_counts = [Counter(tokenize(text)) for text, start, end in spans]
+        chunks = DocumentChunk.objects.bulk_create([
+            DocumentChunk(
+                extracted_text=extracted,
+                position=position,
+                text=text,
+                length=sum(counts.values()),
+                page_start=page_for_offset(extracted.page_offsets, start),
+                page_end=page_for_offset(extracted.page_offsets, max(start, end - 1)),
+            )
+            for position, ((text, start, end), counts) in enumerate(zip(spans, term_counts))
+        ])
+        ChunkTerm.objects.bulk_create(
+            [
+                ChunkTerm(chunk=chunk, term=term, frequency=frequency)
+                for chunk, counts in zip(chunks, term_counts)
+                for term, frequency in counts.items()
+            ],
+            batch_size=1000,
+        )
+    return len(chunks)
+
+
+def indexed_file_names(file_names):
+    """Return the subset of `file_names` that have indexed, non-empty text"""
+    return set(
+        ExtractedText.objects.filter(file_path__in=file_names, chunks__isnull=False)
+        .values_list('file_path', flat=True)
+        .distinct()
+    )
+
+
+def search_chunks(query, file_names, limit=None):
+    """
+    Return the top BM25-scored chunks for `query` among the given files.
+
+    Each result is a dict with the chunk's `file_name`, `position`, `text`,
+    `page_start`, `page_end` and `score`, best match first.
+    """
+    if limit is None:
+        limit = getattr(settings, 'CHATBOT_RETRIEVAL_TOP_K', 5)
+    terms = set(tokenize(query))
+    if not terms or not file_names:
+        return []
+
+    chunks = DocumentChunk.objects.filter(extracted_text__file_path__in=file_names)
+    stats = chunks.aggregate(total=Count('id'), avg_length=Avg('length'))
+    total_chunks = stats['total']
+    avg_length = stats['avg_length'] or 1
+    if not total_chunks:
+        return []
+
+    postings = ChunkTerm.objects.filter(
+        term__in=terms,
+        chunk__extracted_text__file_path__in=file_names,
+    ).values_list('chunk_id', 'term', 'frequency', 'chunk__length')
+
+    postings_by_term = defaultdict(list)
+    for chunk_id, term, frequency, length in postings:
+        postings_by_term[term].append((chunk_id, frequency, length))
+
+    scores = defaultdict(float)
+    for term, term_postings in postings_by_term.items():
+        doc_freq = len(term_postings)
+        idf = math.log(1 + (total_chunks - doc_freq + 0.5) / (doc_freq + 0.5))
+        for chunk_id, frequency, length in term_postings:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+            scores[chunk_id] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+    top_ids = sorted(scores, key=scores.get, reverse=True)[:limit]
+    rows = chunks.filter(id__in=top_ids).values(
+        'id', 'position', 'text', 'page_start', 'page_end', 'extracted_text__file_path'
+    )
+    by_id = {row['id']: row for row in rows}
+    return [
+        {
+            'file_name': by_id[chunk_id]['extracted_text__file_path'],
+            'position': by_id[chunk_id]['position'],
+            'text': by_id[chunk_id]['text'],
+            'page_start': by_id[chunk_id]['page_start'],
+            'page_end': by_id[chunk_id]['page_end'],
+            'score': scores[chunk_id],
+        }
+        for chunk_id in top_ids
+        if chunk_id in by_id
+    ]
+
+
+def leading_chunks(file_name, limit=None):
+    """Return the first chunks of a file, used when a query matches nothing"""
+    if limit is None:
+        limit = getattr(settings, 'CHATBOT_RETRIEVAL_TOP_K', 5)
+    rows = DocumentChunk.objects.filter(
+        extracted_text__file_path=file_name
+    ).order_by('position').values('position', 'text', 'page_start', 'page_end')[:limit]
+    return [dict(row, file_name=file_name, score=0.0) for row in rows]
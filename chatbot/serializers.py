@@ -94,5 +94,6 @@ class ChatResponseSerializer(serializers.Serializer):
     source_document_name = serializers.CharField()
     source_document_url = serializers.CharField()
     source_document_type = serializers.CharField()
+    source_pages = serializers.ListField(child=serializers.IntegerField(), required=False)
     confidence = serializers.FloatField()
     timestamp = serializers.DateTimeField()
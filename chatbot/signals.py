@@ -0,0 +1,32 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from resources.models import Publication
+from .models import Document
+from .ingestion import enqueue_after_commit
+
+
+@receiver(post_save, sender=Document)
+def queue_document_ingestion(sender, instance, **kwargs):
+    """Queue (re)indexing when a document is created, updated or deactivated"""
+    enqueue_after_commit('document', instance.pk, 'index', instance.file.name if instance.file else '')
+
+
+@receiver(post_save, sender=Publication)
+def queue_publication_ingestion(sender, instance, **kwargs):
+    """Queue (re)indexing when a publication is created or updated"""
+    enqueue_after_commit('publication', instance.pk, 'index', instance.pdf.name if instance.pdf else '')
+
+
+@receiver(post_delete, sender=Document)
+def queue_document_removal(sender, instance, **kwargs):
+    """Queue removal of a deleted document's indexed text"""
+    if instance.file:
+        enqueue_after_commit('document', instance.pk, 'remove', instance.file.name)
+
+
+@receiver(post_delete, sender=Publication)
+def queue_publication_removal(sender, instance, **kwargs):
+    """Queue removal of a deleted publication's indexed text"""
+    if instance.pdf:
+        enqueue_after_commit('publication', instance.pk, 'remove', instance.pdf.name)
@@ -1,3 +1,475 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Document, ChatSession, ChatMessage, ChatMetric, ExtractedText, DocumentChunk, IngestionJob
+from .extraction import extract_pdf_pages, get_texts_for_documents
+from .ingestion import enqueue_job, run_pending_jobs
+from . import llm
+from .answer_cache import get_cache as get_answer_cache
+from .context import build_conversation_context, estimate_tokens
+from .metrics import stage_percentiles
+from .retrieval import chunk_text, index_extracted_text, search_chunks, page_for_offset
+from .views import get_all_knowledge_base_documents
+
+
+TEST_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+class KnowledgeBaseMixin:
+    """Helpers for creating ingested knowledge base documents"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def create_document(self, name='Budget Report', text='Budget text', page_offsets=None):
+        """Create an active Document with a small PDF upload and ingest it"""
+        with self.captureOnCommitCallbacks(execute=True):
+            document = Document.objects.create(
+                name=name,
+                file=SimpleUploadedFile('report.pdf', b'%PDF-1.4 test', content_type='application/pdf'),
+            )
+        with mock.patch('chatbot.extraction.extract_pdf_pages', return_value=(text, page_offsets or [0])):
+            run_pending_jobs()
+        return document
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ExtractedTextCacheTestCase(KnowledgeBaseMixin, TestCase):
+    """Test cases for the persistent PDF text cache"""
+
+    def test_text_is_cached_by_ingestion(self):
+        """Ingesting a saved document stores its extracted text"""
+        document = self.create_document()
+        cached = ExtractedText.objects.get(file_path=document.file.name)
+        self.assertEqual(cached.text, 'Budget text')
+        self.assertEqual(cached.file_size, document.file.size)
+
+    def test_unchanged_file_is_not_parsed_again(self):
+        """Chat lookups reuse the cached text without parsing the PDF"""
+        document = self.create_document()
+        documents = get_all_knowledge_base_documents()
+        with mock.patch('chatbot.extraction.extract_pdf_pages') as extract:
+            texts = get_texts_for_documents(documents)
+        extract.assert_not_called()
+        self.assertEqual(texts[document.file.name], 'Budget text')
+
+    def test_deleting_document_removes_cached_text(self):
+        """Deleting a document drops its cached text"""
+        document = self.create_document()
+        file_name = document.file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            document.delete()
+        run_pending_jobs()
+        self.assertFalse(ExtractedText.objects.filter(file_path=file_name).exists())
+
+    def test_deactivating_document_removes_it_from_index(self):
+        """A deactivated document's chunks are removed by the worker"""
+        document = self.create_document()
+        self.assertTrue(DocumentChunk.objects.exists())
+        document.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            document.save()
+        run_pending_jobs()
+        self.assertFalse(DocumentChunk.objects.exists())
+        self.assertEqual(IngestionJob.objects.filter(status='done').count(), 2)
+
+    def test_pending_jobs_are_coalesced(self):
+        """Repeated saves before the worker runs queue a single job"""
+        with self.captureOnCommitCallbacks(execute=True):
+            document = Document.objects.create(
+                name='Draft',
+                file=SimpleUploadedFile('draft.pdf', b'%PDF-1.4 test', content_type='application/pdf'),
+            )
+            document.save()
+        self.assertEqual(IngestionJob.objects.filter(status='pending').count(), 1)
+        # The unique constraint, not a prior lookup, turns away the duplicate
+        self.assertIsNone(enqueue_job('document', document.pk))
+        self.assertEqual(IngestionJob.objects.filter(status='pending').count(), 1)
+
+    def test_failed_job_is_retried_after_backoff(self):
+        """A failing job waits before it is claimed again, longer after each attempt"""
+        with self.captureOnCommitCallbacks(execute=True):
+            Document.objects.create(
+                name='Broken',
+                file=SimpleUploadedFile('broken.pdf', b'%PDF-1.4 test', content_type='application/pdf'),
+            )
+        with mock.patch('chatbot.ingestion.refresh_extracted_text', side_effect=OSError('unreadable')):
+            self.assertEqual(run_pending_jobs(), 1)
+            job = IngestionJob.objects.get()
+            self.assertEqual((job.status, job.error), ('pending', 'unreadable'))
+            self.assertGreater(job.run_after, timezone.now())
+            self.assertEqual(run_pending_jobs(), 0)
+
+            IngestionJob.objects.update(run_after=timezone.now())
+            self.assertEqual(run_pending_jobs(), 1)
+            job.refresh_from_db()
+            self.assertGreater(job.run_after - job.finished_at, timedelta(minutes=1))
+
+
+def fake_pdf_reader(page_texts):
+    """Return a PdfReader stand-in whose pages record when they are parsed"""
+    pages = [mock.Mock(**{'extract_text.return_value': text}) for text in page_texts]
+    return mock.Mock(return_value=mock.Mock(pages=pages)), pages
+
+
+class PageExtractionTestCase(TestCase):
+    """Test cases for page-streaming PDF extraction"""
+
+    def test_pages_are_joined_with_offsets(self):
+        reader, pages = fake_pdf_reader(['First page.', '', 'Third page.'])
+        with mock.patch('chatbot.extraction.PdfReader', reader):
+            text, offsets = extract_pdf_pages('report.pdf')
+        self.assertEqual(text, 'First page.\n\nThird page.')
+        self.assertEqual(offsets, [0, 13, 13])
+        self.assertEqual(page_for_offset(offsets, text.index('Third')), 3)
+        self.assertEqual(page_for_offset(offsets, 0), 1)
+
+    def test_extraction_stops_at_character_budget(self):
+        """Pages after the budget are never parsed"""
+        reader, pages = fake_pdf_reader(['a' * 60, 'b' * 60, 'c' * 60])
+        with mock.patch('chatbot.extraction.PdfReader', reader):
+            text, offsets = extract_pdf_pages('report.pdf', max_chars=100)
+        self.assertEqual(len(text), 100)
+        self.assertEqual(len(offsets), 2)
+        pages[2].extract_text.assert_not_called()
+
+
+class RetrievalIndexTestCase(TestCase):
+    """Test cases for the BM25 chunk index"""
+
+    def setUp(self):
+        self.budget = self.index('budget.pdf', (
+            "The national budget is read in June.\n\n"
+            "Parliament debates the budget estimates before appropriation."
+        ))
+        self.bills = self.index('bills.pdf', (
+            "A bill is published in the gazette.\n\n"
+            "After three readings a bill becomes law once the President assents."
+        ))
+
+    def index(self, file_path, text):
+        extracted = ExtractedText.objects.create(
+            file_path=file_path, file_size=len(text), file_mtime=0, content_hash='x', text=text
+        )
+        index_extracted_text(extracted)
+        return extracted
+
+    def test_chunk_text_respects_target_size(self):
+        """Long text is split into chunks close to the target size"""
+        text = "\n\n".join(["word " * 50] * 10)
+        chunks = chunk_text(text, target=600)
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) <= 600 for chunk in chunks))
+
+    def test_search_ranks_matching_document_first(self):
+        """The document containing the query terms is ranked first"""
+        results = search_chunks('How does a bill become law?', ['budget.pdf', 'bills.pdf'])
+        self.assertEqual(results[0]['file_name'], 'bills.pdf')
+        self.assertIn('President', results[0]['text'])
+
+    def test_chunks_record_their_pages(self):
+        text = "Budget speech opening.\n\n" + "Revenue estimates. " * 80 + "\n\nClosing remarks on debt."
+        extracted = ExtractedText.objects.create(
+            file_path='speech.pdf', file_size=len(text), file_mtime=0, content_hash='x', text=text,
+            page_offsets=[0, 24, text.index('Closing')],
+        )
+        index_extracted_text(extracted)
+        chunks = list(extracted.chunks.order_by('position'))
+        self.assertEqual((chunks[0].page_start, chunks[-1].page_end), (1, 3))
+        results = search_chunks('closing debt', ['speech.pdf'])
+        self.assertEqual(results[0]['page_end'], 3)
+
+    def test_search_is_limited_to_given_files(self):
+        """Chunks of files outside the knowledge base are ignored"""
+        results = search_chunks('bill law', ['budget.pdf'])
+        self.assertEqual(results, [])
+
+    def test_reindex_replaces_chunks(self):
+        """Re-indexing a document replaces its previous chunks"""
+        self.budget.text = "Supplementary budget."
+        index_extracted_text(self.budget)
+        self.assertEqual(DocumentChunk.objects.filter(extracted_text=self.budget).count(), 1)
+
+
+class FakeStream:
+    """Stand-in for the AsyncAnthropic streaming context manager"""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    @property
+    async def text_stream(self):
+        for text in ['The budget ', 'is read in June.']:
+            yield text
+
+    async def get_final_message(self):
+        return mock.Mock(usage=mock.Mock(input_tokens=120, output_tokens=8))
+
+
+def fake_llm_client(answer='CEPA is a think tank.'):
+    """Return a mock AsyncAnthropic client"""
+    client = mock.Mock()
+    client.messages.create = mock.AsyncMock(return_value=mock.Mock(
+        content=[mock.Mock(text=answer)],
+        usage=mock.Mock(input_tokens=150, output_tokens=10),
+    ))
+    client.messages.stream.side_effect = lambda **kwargs: FakeStream()
+    return client
+
+
+class FakeLLMMixin:
+    """Patch the shared LLM client for the duration of a test"""
+
+    def patch_llm(self):
+        self.llm = fake_llm_client()
+        patchers = [
+            mock.patch('chatbot.llm.get_api_key', return_value='test-key'),
+            mock.patch('chatbot.llm.get_async_client', return_value=self.llm),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ChatStreamTestCase(FakeLLMMixin, KnowledgeBaseMixin, TestCase):
+    """Test cases for the server-sent events chat endpoint"""
+
+    def setUp(self):
+        get_answer_cache().clear()
+        self.create_document(text='The national budget is read in June.')
+        self.patch_llm()
+
+    async def test_stream_emits_source_tokens_and_done(self):
+        """Source is sent first, then tokens, then the persisted message IDs"""
+        response = await self.async_client.post('/chatbot/chat/stream/', {'query': 'When is the budget read?'},
+                                                content_type='application/json')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        events = [line.split(': ', 1)[1] for line in body.splitlines() if line.startswith('event: ')]
+        self.assertEqual(events, ['source', 'token', 'token', 'done'])
+        answer = await ChatMessage.objects.aget(message_type='assistant')
+        self.assertEqual(answer.content, 'The budget is read in June.')
+        self.assertIn(answer.id, body)
+        metric = await ChatMetric.objects.aget(message=answer)
+        self.assertEqual((metric.endpoint, metric.input_tokens, metric.output_tokens), ('stream', 120, 8))
+
+    def test_invalid_query_returns_json_error(self):
+        """Validation errors are returned before the stream starts"""
+        response = self.client.post('/chatbot/chat/stream/', {}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class AnswerCacheTestCase(FakeLLMMixin, KnowledgeBaseMixin, TestCase):
+    """Test cases for the repeated-question answer cache"""
+
+    def setUp(self):
+        get_answer_cache().clear()
+        self.document = self.create_document(text='CEPA is a policy think tank in Uganda.')
+        self.patch_llm()
+
+    def ask(self, query, session_id=None):
+        data = {'query': query}
+        if session_id:
+            data['session_id'] = session_id
+        return self.client.post('/chatbot/chat/', data, content_type='application/json').json()
+
+    def test_answer_cites_source_pages(self):
+        """Page numbers of the retrieved excerpts reach the prompt and the response"""
+        text = 'Budget overview.\n\nThe budget is read in June.'
+        self.create_document(name='Budget Speech', text=text, page_offsets=[0, text.index('The budget')])
+        result = self.ask('When is the budget read in June?')
+        self.assertEqual(result['source_document_name'], 'Budget Speech')
+        self.assertEqual(result['source_pages'], [1, 2])
+        prompt = self.llm.messages.create.call_args.kwargs['messages'][0]['content']
+        self.assertIn('Budget Speech (document), pp. 1-2', prompt)
+        self.assertEqual(self.ask('When is the budget read in June?')['source_pages'], [1, 2])
+
+    def test_repeated_question_is_served_from_cache(self):
+        """A normalized repeat of a new-session question skips the LLM"""
+        first = self.ask('What is CEPA?')
+        second = self.ask('what is cepa')
+        self.assertEqual(self.llm.messages.create.call_count, 1)
+        self.assertEqual(second['answer'], first['answer'])
+        self.assertEqual(second['source_document_name'], 'Budget Report')
+        stats = self.client.get('/chatbot/cache-stats/').json()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_questions_differing_in_question_word_or_negation_are_not_shared(self):
+        """Words a search index would drop still tell questions apart"""
+        for query in ('When was CEPA founded?', 'Why was CEPA founded?', 'Is CEPA partisan?',
+                      'Is CEPA not partisan?', 'What is CEPA?', 'Who is CEPA?'):
+            self.ask(query)
+        self.assertEqual(self.llm.messages.create.call_count, 6)
+
+    def test_follow_up_questions_bypass_cache(self):
+        """Questions with conversation history are always answered by the LLM"""
+        first = self.ask('What is CEPA?')
+        self.ask('What is CEPA?', session_id=first['session_id'])
+        self.assertEqual(self.llm.messages.create.call_count, 2)
+
+    def test_knowledge_base_change_invalidates_cache(self):
+        """Editing a document changes the version stamp and misses the cache"""
+        self.ask('What is CEPA?')
+        self.document.name = 'CEPA Profile'
+        self.document.save()
+        self.ask('What is CEPA?')
+        self.assertEqual(self.llm.messages.create.call_count, 2)
+
+
+@override_settings(CHATBOT_CONTEXT_TOKEN_BUDGET=400)
+class ConversationContextTestCase(TestCase):
+    """Test cases for the token-budgeted conversation context"""
+
+    def setUp(self):
+        self.session = ChatSession.objects.create(session_title='Budget questions')
+        self.start = timezone.now()
+        self.count = 0
+
+    def add_turn(self, question, answer):
+        for message_type, content in (('user', question), ('assistant', answer)):
+            self.count += 1
+            ChatMessage.objects.create(
+                session=self.session, message_type=message_type, content=content,
+                created_at=self.start + timedelta(seconds=self.count),
+            )
+
+    def test_empty_session_has_no_context(self):
+        self.assertEqual(build_conversation_context(self.session), "")
+
+    def test_context_stays_within_budget_as_session_grows(self):
+        """Long answers are truncated and old turns summarized"""
+        sizes = []
+        for i in range(12):
+            self.add_turn(f"Question {i} about the budget?", f"Answer {i}. " + "Long detail. " * 200)
+            sizes.append(estimate_tokens(build_conversation_context(self.session)))
+        self.assertTrue(all(size <= 450 for size in sizes))
+        self.session.refresh_from_db()
+        # Summary lines are capped too: the oldest ones fall away first
+        self.assertIn("Question 10 about the budget?", self.session.context_summary)
+        self.assertNotIn("Question 0 about the budget?", self.session.context_summary)
+        self.assertIsNotNone(self.session.summarized_until)
+
+    def test_summary_is_updated_incrementally(self):
+        """Messages already folded into the summary are not read again"""
+        for i in range(6):
+            self.add_turn(f"Question {i}?", "Answer. " * 150)
+        build_conversation_context(self.session)
+        self.session.refresh_from_db()
+        summarized_until = self.session.summarized_until
+        with self.assertNumQueries(1):
+            build_conversation_context(self.session)
+        self.assertEqual(self.session.summarized_until, summarized_until)
+
+
+STUB_SETTINGS = {'latency': 0.0, 'tokens': 12, 'token_delay': 0.0}
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, CHATBOT_LLM_BACKEND='stub', CHATBOT_LLM_STUB=STUB_SETTINGS)
+class StubBackendTestCase(KnowledgeBaseMixin, TestCase):
+    """Test cases for the offline stub LLM backend"""
+
+    def setUp(self):
+        get_answer_cache().clear()
+        self.create_document(text='CEPA is a policy think tank in Uganda.')
+
+    async def test_stub_is_deterministic(self):
+        backend = llm.get_backend()
+        self.assertIsInstance(backend, llm.StubBackend)
+        first = await llm.complete('What is CEPA?', max_tokens=500)
+        streamed = "".join([text async for text in llm.stream('What is CEPA?', max_tokens=500)])
+        self.assertEqual(first, streamed)
+        self.assertEqual(len(first.split()), 12)
+        self.assertNotEqual(first, await llm.complete('Something else', max_tokens=500))
+
+    def test_chat_runs_without_api_key(self):
+        """The stub needs no credentials, network or anthropic package"""
+        with mock.patch('chatbot.llm.get_api_key', return_value=None), mock.patch('chatbot.llm.anthropic', None):
+            response = self.client.post('/chatbot/chat/', {'query': 'What is CEPA?'},
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['answer'].startswith('Stub-'))
+
+    def test_unknown_backend_is_rejected(self):
+        with override_settings(CHATBOT_LLM_BACKEND='missing'):
+            with self.assertRaises(ValueError):
+                llm.get_backend()
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_chatbot', requests=4, concurrency=2, latency=0.0, stdout=out)
+        self.assertIn('4 ok, 0 failed', out.getvalue())
+        # Nothing the benchmark wrote is left behind
+        self.assertFalse(ChatSession.objects.exists())
+        self.assertFalse(ChatMessage.objects.exists())
+        self.assertFalse(ChatMetric.objects.exists())
+
+    def test_unconfigured_backend_is_reported(self):
+        with override_settings(CHATBOT_LLM_BACKEND='anthropic'), mock.patch('chatbot.llm.get_api_key', return_value=None):
+            response = self.client.post('/chatbot/chat/', {'query': 'What is CEPA?'},
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('LLM backend not configured', response.json()['error'])
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ChatMetricsTestCase(FakeLLMMixin, KnowledgeBaseMixin, TestCase):
+    """Test cases for per-stage chat instrumentation"""
+
+    def setUp(self):
+        get_answer_cache().clear()
+        self.create_document(text='CEPA is a policy think tank in Uganda.')
+        self.patch_llm()
+
+    def ask(self, query):
+        return self.client.post('/chatbot/chat/', {'query': query}, content_type='application/json').json()
+
+    def test_chat_records_stage_timings_and_tokens(self):
+        result = self.ask('What is CEPA?')
+        metric = ChatMetric.objects.get(message_id=result['assistant_message_id'])
+        for field in ('context_ms', 'cache_ms', 'retrieval_ms', 'llm_ms', 'persist_ms', 'total_ms'):
+            self.assertIsNotNone(getattr(metric, field), field)
+        self.assertGreaterEqual(metric.total_ms, metric.llm_ms)
+        self.assertEqual((metric.input_tokens, metric.output_tokens), (150, 10))
+        self.assertFalse(metric.cache_hit)
+
+    def test_cache_hit_skips_llm_stages(self):
+        self.ask('What is CEPA?')
+        result = self.ask('What is CEPA?')
+        metric = ChatMetric.objects.get(message_id=result['assistant_message_id'])
+        self.assertTrue(metric.cache_hit)
+        self.assertIsNone(metric.llm_ms)
+        self.assertIsNone(metric.retrieval_ms)
+
+    def test_stage_percentiles(self):
+        for i in range(1, 21):
+            message = ChatMessage.objects.create(session=ChatSession.objects.create(), message_type='assistant',
+                                                 content='answer')
+            ChatMetric.objects.create(message=message, llm_ms=i * 10.0, total_ms=i * 20.0)
+        rows = {row['stage']: row for row in stage_percentiles(ChatMetric.objects.all())}
+        self.assertEqual((rows['LLM']['p50'], rows['LLM']['p95']), (110.0, 190.0))
+        self.assertEqual(rows['Total']['count'], 20)
+        self.assertEqual((rows['Retrieval']['count'], rows['Retrieval']['p50']), (0, None))
+
+    def test_admin_changelist_shows_percentiles(self):
+        self.ask('What is CEPA?')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.get('/admin/chatbot/chatmetric/?endpoint=chat')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Stage latency (ms)')
+        self.assertEqual(len(response.context['stage_percentiles']), len(ChatMetric.STAGES))
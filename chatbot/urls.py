@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DocumentViewSet, ChatSessionViewSet, ChatViewSet
+from .views import DocumentViewSet, ChatSessionViewSet, ChatViewSet, chat_view, chat_stream_view
 
 router = DefaultRouter()
 router.register(r'documents', DocumentViewSet, basename='document')
@@ -8,5 +8,8 @@ router.register(r'sessions', ChatSessionViewSet, basename='session')
 router.register(r'', ChatViewSet, basename='chat')
 
 urlpatterns = [
+    # Async views: LLM calls do not block a worker thread
+    path('chat/', chat_view, name='chat-chat'),
+    path('chat/stream/', chat_stream_view, name='chat-chat-stream'),
     path('', include(router.urls)),
 ]
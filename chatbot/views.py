@@ -1,45 +1,33 @@
-import os
-import re
+import json
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
-from decouple import config
-
 from .models import Document, ChatSession, ChatMessage
+from .context import build_conversation_context
+from .metrics import StageTimer, record_chat_metrics
+from .retrieval import indexed_file_names, search_chunks, leading_chunks, format_pages
+from .answer_cache import (
+    knowledge_base_version, get_cached_answer, store_answer,
+    get_stats as get_answer_cache_stats,
+)
+from . import llm
 from .serializers import (
     DocumentSerializer,
     ChatSessionSerializer,
     ChatSessionDetailSerializer,
-    ChatMessageSerializer,
     ChatQuerySerializer,
-    ChatResponseSerializer
 )
 
-try:
-    import anthropic
-    from PyPDF2 import PdfReader
-    HAS_DEPENDENCIES = True
-except ImportError:
-    HAS_DEPENDENCIES = False
-
 
 # ==================== Helper Functions ====================
 
-def extract_text_from_pdf(file_path):
-    """Extract text from a PDF file using PyPDF2"""
-    try:
-        reader = PdfReader(file_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text.strip()
-    except Exception as e:
-        print(f"Error reading PDF {file_path}: {str(e)}")
-        return ""
-
-
 def get_all_knowledge_base_documents():
     """
     Scan both Document model AND Publication model for PDFs.
@@ -55,6 +43,7 @@ def get_all_knowledge_base_documents():
                 'id': doc.id,
                 'name': doc.name,
                 'path': doc.file.path,
+                'file_name': doc.file.name,
                 'url': doc.file_url,
                 'type': 'document',
                 'description': doc.description or ''
@@ -76,6 +65,7 @@ def get_all_knowledge_base_documents():
                     'id': pub.id,
                     'name': pub.title,
                     'path': pub.pdf.path,
+                    'file_name': pub.pdf.name,
                     'url': pdf_url,
                     'type': 'publication',
                     'description': pub.description
@@ -85,6 +75,7 @@ def get_all_knowledge_base_documents():
                     'id': pub.id,
                     'name': pub.title,
                     'path': None,
+                    'file_name': None,
                     'url': pub.url,
                     'type': 'publication',
                     'description': pub.description
@@ -98,117 +89,211 @@ def get_all_knowledge_base_documents():
     return documents
 
 
-def build_conversation_context(session_id):
+def find_relevant_chunks(query, documents):
     """
-    Build conversation history for Claude context.
-    Returns formatted string of last 5 message pairs.
+    Stage 1: Select the most relevant passages with the local BM25 index.
+    Returns a list of chunk dicts (each carrying its source document), best first.
     """
-    if not session_id:
-        return ""
-
-    try:
-        session = ChatSession.objects.get(id=session_id)
-        # Get last 10 messages (5 pairs of user/assistant)
-        recent_messages = session.messages.all().order_by('-created_at')[:10]
-
-        if not recent_messages:
-            return ""
-
-        context = "\n\nPrevious conversation:\n"
-        for msg in reversed(recent_messages):
-            role = "User" if msg.message_type == "user" else "Assistant"
-            context += f"{role}: {msg.content}\n"
+    docs_by_file = {doc['file_name']: doc for doc in documents}
+    chunks = search_chunks(query, list(docs_by_file))
+    if not chunks and documents:
+        # Nothing matched: fall back to the opening of the first document
+        chunks = leading_chunks(documents[0]['file_name'])
+    for chunk in chunks:
+        chunk['document'] = docs_by_file[chunk['file_name']]
+    return chunks
+
+
+def format_excerpts(chunks):
+    """Format retrieved chunks as labelled excerpts (with page numbers) for the answer prompt"""
+    excerpts = []
+    for i, chunk in enumerate(chunks):
+        pages = format_pages(chunk.get('page_start'), chunk.get('page_end'))
+        label = f"{chunk['document']['name']} ({chunk['document']['type']}){', ' + pages if pages else ''}"
+        excerpts.append(f"[Excerpt {i+1} - {label}]\n{chunk['text']}")
+    return "\n\n".join(excerpts)
+
+
+def source_pages(chunks, selected_doc):
+    """Return the sorted page numbers of the excerpts taken from the selected document"""
+    pages = set()
+    for chunk in chunks:
+        if chunk['document'] is selected_doc and chunk.get('page_start'):
+            pages.update(range(chunk['page_start'], (chunk.get('page_end') or chunk['page_start']) + 1))
+    return sorted(pages)
+
+
+def build_answer_prompt(query, chunks, conversation_context=""):
+    """Build the Stage 2 prompt from the question and retrieved excerpts"""
+    return f"""You are a helpful assistant answering questions about CEPA (Centre for Parliamentary Accountability) and parliamentary proceedings in Uganda.
 
-        return context
-    except ChatSession.DoesNotExist:
-        return ""
-
-
-def find_relevant_document(query, documents, conversation_context="", client=None):
-    """
-    Stage 1: Use Claude Haiku to select most relevant document.
-    Returns index of selected document.
-    """
-    if not client or not documents:
-        return 0
-
-    # Prepare document summaries
-    doc_summaries = "\n\n".join([
-        f"Document {i+1}: {doc['name']} ({doc['type']})\n"
-        f"Description: {doc.get('description', 'N/A')}\n"
-        f"Preview: {doc.get('preview', '')[:500]}..."
-        for i, doc in enumerate(documents)
-    ])
-
-    prompt = f"""You are a document search assistant for CEPA (Centre for Parliamentary Accountability).
-    Given a user question and a list of documents, identify which document is most relevant.
-    
     {conversation_context}
     
     User Question: {query}
     
-    Available Documents:
-    {doc_summaries}
+    Document Excerpts:
+    {format_excerpts(chunks)}
     
-    Respond with ONLY the document number (1, 2, 3, etc.) that is most relevant to the question.
-    If no document is relevant, respond with "1"."""
+    Please provide a clear, concise answer to the user's question based on the document excerpts.
+    Cite page numbers from the excerpt labels where they are given, e.g. "(p. 12)".
+    If the answer is not in the excerpts, say so clearly. Keep your answer under 300 words."""
+
 
+async def generate_answer(query, chunks, conversation_context="", usage=None):
+    """
+    Stage 2: Use Claude Haiku to generate answer from the retrieved excerpts.
+    Returns answer text; token counts are written to `usage` if given.
+    """
     try:
-        response = client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=10,
-            messages=[{"role": "user", "content": prompt}]
+        return await llm.complete(
+            build_answer_prompt(query, chunks, conversation_context), max_tokens=500, usage=usage
         )
+    except Exception as e:
+        return f"Error generating answer: {str(e)}"
 
-        selected_doc_num = response.content[0].text.strip()
 
-        # Parse document number
-        try:
-            doc_index = int(re.search(r'\d+', selected_doc_num).group()) - 1
-            if doc_index < 0 or doc_index >= len(documents):
-                doc_index = 0  # Default to first document
-        except:
-            doc_index = 0
+async def stream_answer(query, chunks, conversation_context="", usage=None):
+    """
+    Stage 2 (streaming): yield answer text deltas as Claude produces them.
+    """
+    async for text in llm.stream(
+        build_answer_prompt(query, chunks, conversation_context), max_tokens=500, usage=usage
+    ):
+        yield text
 
-        return doc_index
-    except Exception as e:
-        print(f"Error in find_relevant_document: {str(e)}")
-        return 0
 
+def format_sse(event, data):
+    """Encode one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
 
-def generate_answer(query, selected_doc, conversation_context="", client=None):
+
+# ==================== Chat Pipeline ====================
+# Synchronous ORM steps of a chat request; the async views run them in a
+# worker thread with sync_to_async so the event loop stays free for LLM I/O.
+
+def prepare_chat(data, timer=None):
     """
-    Stage 2: Use Claude Haiku to generate answer from selected document.
-    Returns answer text.
+    Validate the query, resolve the session and retrieve context.
+    Returns (chat_context, None) on success or (None, (error_payload, status)).
+    Stage durations are collected on `timer` if given.
     """
-    if not client:
-        return "Error: Claude API client not initialized."
+    timer = timer or StageTimer()
 
-    prompt = f"""You are a helpful assistant answering questions about CEPA (Centre for Parliamentary Accountability) and parliamentary proceedings in Uganda.
+    # Validate request
+    serializer = ChatQuerySerializer(data=data)
+    if not serializer.is_valid():
+        return None, (serializer.errors, status.HTTP_400_BAD_REQUEST)
 
-    {conversation_context}
-    
-    User Question: {query}
-    
-    Document Name: {selected_doc['name']}
-    Document Type: {selected_doc['type']}
-    
-    Document Content:
-    {selected_doc.get('full_text', '')[:50000]}
-    
-    Please provide a clear, concise answer to the user's question based on the document content.
-    If the answer is not in the document, say so clearly. Keep your answer under 300 words."""
+    query = serializer.validated_data['query']
+    session_id = serializer.validated_data.get('session_id')
 
-    try:
-        response = client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=500,
-            messages=[{"role": "user", "content": prompt}]
+    with timer.stage('context'):
+        # Get or create session
+        if session_id:
+            try:
+                session = ChatSession.objects.get(id=session_id)
+            except ChatSession.DoesNotExist:
+                return None, ({'error': 'Session not found'}, status.HTTP_404_NOT_FOUND)
+        else:
+            # Create new session with title from query preview
+            session_title = query[:50] + "..." if len(query) > 50 else query
+            session = ChatSession.objects.create(session_title=session_title)
+
+        conversation_context = build_conversation_context(session)
+
+    # Session-independent questions can be answered from the cache
+    kb_version = None
+    if not conversation_context:
+        with timer.stage('cache'):
+            kb_version = knowledge_base_version()
+            cached = get_cached_answer(query, kb_version)
+        if cached:
+            return {
+                'query': query,
+                'session': session,
+                'selected_doc': cached['source'],
+                'source_pages': cached['source'].get('pages', []),
+                'cached_answer': cached['answer'],
+                'kb_version': kb_version,
+            }, None
+
+    # Check the LLM backend (the Anthropic one needs the anthropic package and an API key)
+    if not llm.get_backend().is_configured():
+        return None, (
+            {'error': 'LLM backend not configured. Please install anthropic and set CLAUDE_API_KEY '
+                      'in environment variables, or set CHATBOT_LLM_BACKEND.'},
+            status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
-        return response.content[0].text.strip()
-    except Exception as e:
-        return f"Error generating answer: {str(e)}"
+    with timer.stage('retrieval'):
+        # Get all documents from both sources
+        documents = get_all_knowledge_base_documents()
+        if not documents:
+            return None, ({'error': 'No documents found in knowledge base'}, status.HTTP_404_NOT_FOUND)
+
+        # Only documents already ingested by the worker are searchable
+        indexed = indexed_file_names([doc['file_name'] for doc in documents if doc['file_name']])
+        document_contents = [doc for doc in documents if doc['file_name'] in indexed]
+
+        # Stage 1: Retrieve relevant passages from the local index
+        chunks = find_relevant_chunks(query, document_contents)
+    if not chunks:
+        return None, ({'error': 'No readable text found in documents'}, status.HTTP_404_NOT_FOUND)
+
+    return {
+        'query': query,
+        'session': session,
+        'chunks': chunks,
+        'selected_doc': chunks[0]['document'],
+        'source_pages': source_pages(chunks, chunks[0]['document']),
+        'conversation_context': conversation_context,
+        'kb_version': kb_version,
+    }, None
+
+
+def remember_answer(chat_context, answer, timer=None):
+    """Cache a freshly generated answer if the question was session-independent"""
+    timer = timer or StageTimer()
+    if chat_context['kb_version'] and not answer.startswith('Error'):
+        with timer.stage('cache'):
+            store_answer(chat_context['query'], chat_context['kb_version'], answer,
+                         chat_context['selected_doc'], chat_context['source_pages'])
+
+
+def save_exchange(chat_context, answer, timer=None, endpoint='chat'):
+    """
+    Persist the user question and assistant answer, then the request's
+    stage metrics. Returns both messages.
+    """
+    timer = timer or StageTimer()
+    selected_doc = chat_context['selected_doc']
+    with timer.stage('persist'):
+        user_message = ChatMessage.objects.create(
+            session=chat_context['session'],
+            message_type='user',
+            content=chat_context['query']
+        )
+        assistant_message = ChatMessage.objects.create(
+            session=chat_context['session'],
+            message_type='assistant',
+            content=answer,
+            source_document_name=selected_doc['name'],
+            source_document_url=selected_doc['url'],
+            source_document_type=selected_doc['type'],
+            confidence=0.8
+        )
+    record_chat_metrics(timer, assistant_message, endpoint, cache_hit='cached_answer' in chat_context)
+    return user_message, assistant_message
+
+
+def parse_request_data(request):
+    """Return the JSON or form payload of a request, or None if the JSON is invalid"""
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+    return request.POST
 
 
 # ==================== ViewSets ====================
@@ -251,131 +336,139 @@ class ChatSessionViewSet(viewsets.ModelViewSet):
 
 
 class ChatViewSet(viewsets.ViewSet):
-    """Main chatbot logic"""
-
-    @action(detail=False, methods=['post'])
-    def chat(self, request):
-        """
-        Process a chat query and return AI response.
-        Creates or continues a session.
-        """
-        # Check dependencies
-        if not HAS_DEPENDENCIES:
-            return Response(
-                {'error': 'Required dependencies not installed. Please install: anthropic, PyPDF2'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+    """Chatbot utilities (the chat endpoints themselves are async views below)"""
 
-        # Validate request
-        serializer = ChatQuerySerializer(data=request.data)
-        if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    @action(detail=False, methods=['get'], url_path='cache-stats')
+    def cache_stats(self, request):
+        """Get answer cache hit/miss counters"""
+        return Response(get_answer_cache_stats())
 
-        query = serializer.validated_data['query']
-        session_id = serializer.validated_data.get('session_id')
 
-        # Get or create session
-        if session_id:
-            try:
-                session = ChatSession.objects.get(id=session_id)
-            except ChatSession.DoesNotExist:
-                return Response(
-                    {'error': 'Session not found'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-        else:
-            # Create new session with title from query preview
-            session_title = query[:50] + "..." if len(query) > 50 else query
-            session = ChatSession.objects.create(session_title=session_title)
+# ==================== Async Chat Views ====================
 
-        # Get Claude API key
-        claude_api_key = config('CLAUDE_API_KEY', default=None)
-        if not claude_api_key:
-            return Response(
-                {'error': 'Claude API key not configured. Please set CLAUDE_API_KEY in environment variables.'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+@csrf_exempt
+@require_POST
+async def chat_view(request):
+    """
+    Process a chat query and return AI response.
+    Creates or continues a session.
+    """
+    data = parse_request_data(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            # Initialize Claude client
-            client = anthropic.Anthropic(api_key=claude_api_key)
-
-            # Get all documents from both sources
-            documents = get_all_knowledge_base_documents()
-            if not documents:
-                return Response(
-                    {'error': 'No documents found in knowledge base'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
+    timer = StageTimer()
+    try:
+        chat_context, error = await sync_to_async(prepare_chat)(data, timer)
+        if error:
+            return JsonResponse(error[0], status=error[1])
+        selected_doc = chat_context['selected_doc']
 
-            # Extract text from all documents
-            document_contents = []
-            for doc in documents:
-                text = extract_text_from_pdf(doc['path'])
-                if text:
-                    # Take first 10000 characters for relevance check
-                    preview = text[:10000]
-                    document_contents.append({
-                        **doc,
-                        'preview': preview,
-                        'full_text': text
-                    })
-
-            if not document_contents:
-                return Response(
-                    {'error': 'No readable text found in documents'},
-                    status=status.HTTP_404_NOT_FOUND
+        if 'cached_answer' in chat_context:
+            answer = chat_context['cached_answer']
+        else:
+            # Stage 2: Generate answer
+            with timer.stage('llm'):
+                answer = await generate_answer(
+                    chat_context['query'], chat_context['chunks'], chat_context['conversation_context'],
+                    usage=timer.usage
                 )
+            await sync_to_async(remember_answer)(chat_context, answer, timer)
+
+        user_message, assistant_message = await sync_to_async(save_exchange)(chat_context, answer, timer)
+
+        # Build response
+        response_data = {
+            'session_id': chat_context['session'].id,
+            'user_message_id': user_message.id,
+            'assistant_message_id': assistant_message.id,
+            'answer': answer,
+            'source_document_name': selected_doc['name'],
+            'source_document_url': selected_doc['url'],
+            'source_document_type': selected_doc['type'],
+            'source_pages': chat_context['source_pages'],
+            'confidence': 0.8,
+            'timestamp': assistant_message.created_at
+        }
+
+        return JsonResponse(response_data, status=status.HTTP_200_OK)
 
-            # Build conversation context
-            conversation_context = build_conversation_context(session.id)
-
-            # Stage 1: Find relevant document
-            doc_index = find_relevant_document(
-                query, document_contents, conversation_context, client
-            )
-            selected_doc = document_contents[doc_index]
+    except Exception as e:
+        return JsonResponse(
+            {'error': f'Error processing request: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
 
-            # Stage 2: Generate answer
-            answer = generate_answer(
-                query, selected_doc, conversation_context, client
-            )
 
-            # Create user message
-            user_message = ChatMessage.objects.create(
-                session=session,
-                message_type='user',
-                content=query
-            )
+@csrf_exempt
+@require_POST
+async def chat_stream_view(request):
+    """
+    Process a chat query and stream the answer as server-sent events.
 
-            # Create assistant message
-            assistant_message = ChatMessage.objects.create(
-                session=session,
-                message_type='assistant',
-                content=answer,
-                source_document_name=selected_doc['name'],
-                source_document_url=selected_doc['url'],
-                source_document_type=selected_doc['type'],
-                confidence=0.8
-            )
+    Events: `source` (selected document, sent as soon as retrieval is done),
+    `token` (answer text deltas), `done` (persisted message IDs) and
+    `error`. Validation errors are returned as regular JSON responses.
+    """
+    data = parse_request_data(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Build response
-            response_data = {
-                'session_id': session.id,
-                'user_message_id': user_message.id,
-                'assistant_message_id': assistant_message.id,
-                'answer': answer,
-                'source_document_name': selected_doc['name'],
-                'source_document_url': selected_doc['url'],
-                'source_document_type': selected_doc['type'],
-                'confidence': 0.8,
-                'timestamp': assistant_message.created_at
-            }
-
-            return Response(response_data, status=status.HTTP_200_OK)
+    timer = StageTimer()
+    try:
+        chat_context, error = await sync_to_async(prepare_chat)(data, timer)
+    except Exception as e:
+        return JsonResponse(
+            {'error': f'Error processing request: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    if error:
+        return JsonResponse(error[0], status=error[1])
+
+    async def event_stream():
+        selected_doc = chat_context['selected_doc']
+        yield format_sse('source', {
+            'session_id': chat_context['session'].id,
+            'source_document_name': selected_doc['name'],
+            'source_document_url': selected_doc['url'],
+            'source_document_type': selected_doc['type'],
+            'source_pages': chat_context['source_pages'],
+        })
 
-        except Exception as e:
-            return Response(
-                {'error': f'Error processing request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        try:
+            if 'cached_answer' in chat_context:
+                answer = chat_context['cached_answer']
+                yield format_sse('token', {'text': answer})
+            else:
+                answer_parts = []
+                # Includes the time spent writing tokens to the client
+                with timer.stage('llm'):
+                    async for text in stream_answer(
+                        chat_context['query'], chat_context['chunks'], chat_context['conversation_context'],
+                        usage=timer.usage
+                    ):
+                        answer_parts.append(text)
+                        yield format_sse('token', {'text': text})
+                answer = "".join(answer_parts).strip()
+                await sync_to_async(remember_answer)(chat_context, answer, timer)
+
+            user_message, assistant_message = await sync_to_async(save_exchange)(
+                chat_context, answer, timer, 'stream'
             )
+        except Exception as e:
+            yield format_sse('error', {'error': f'Error generating answer: {str(e)}'})
+            return
+
+        yield format_sse('done', {
+            'session_id': chat_context['session'].id,
+            'user_message_id': user_message.id,
+            'assistant_message_id': assistant_message.id,
+            'confidence': 0.8,
+            'timestamp': assistant_message.created_at,
+        })
+
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
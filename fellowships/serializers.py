@@ -1,15 +1,18 @@
 from rest_framework import serializers
 from django.conf import settings
+from multimedia.derivatives import ImageVariantsField, ImageVariantsListSerializer
 from .models import Cohort, Fellow, CohortProject, CohortEvent, CohortGalleryImage
 
 
 class FellowSerializer(serializers.ModelSerializer):
     """Serializer for Fellow model"""
     profile_image_url = serializers.SerializerMethodField()
+    profile_image_variants = ImageVariantsField(source='profile_image')
 
     class Meta:
         model = Fellow
-        fields = ['id', 'name', 'bio', 'profile_image', 'profile_image_url', 'position', 'linkedin_url',
+        list_serializer_class = ImageVariantsListSerializer
+        fields = ['id', 'name', 'bio', 'profile_image', 'profile_image_url', 'profile_image_variants', 'position', 'linkedin_url',
                   'twitter_url', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
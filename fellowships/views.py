@@ -3,6 +3,8 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from main.caching import ConditionalGetMixin
+from multimedia.models import ImageDerivative
 from .models import Cohort, Fellow, CohortProject, CohortEvent, CohortGalleryImage
 from .serializers import (
     CohortListSerializer, CohortDetailSerializer, FellowSerializer,
@@ -10,7 +12,7 @@ from .serializers import (
 )
 
 
-class CohortViewSet(viewsets.ReadOnlyModelViewSet):
+class CohortViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for viewing cohorts.
     List endpoint returns simplified data, detail endpoint returns full data with related objects.
@@ -22,6 +24,7 @@ class CohortViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ['year', 'created_at']
     ordering = ['-year']
     lookup_field = 'slug'
+    conditional_models = [Fellow, CohortProject, CohortEvent, CohortGalleryImage, ImageDerivative]
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -36,10 +39,13 @@ class CohortViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
 
 
-class FellowViewSet(viewsets.ReadOnlyModelViewSet):
+class FellowViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for viewing fellows"""
     queryset = Fellow.objects.all()
     serializer_class = FellowSerializer
+    # Image variants appear as their derivatives are generated
+    conditional_models = [ImageDerivative]
+    conditional_timestamp_models = [ImageDerivative]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['cohort']
     search_fields = ['name', 'bio', 'position']
@@ -47,7 +53,7 @@ class FellowViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['name']
 
 
-class CohortProjectViewSet(viewsets.ReadOnlyModelViewSet):
+class CohortProjectViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for viewing cohort projects"""
     queryset = CohortProject.objects.all()
     serializer_class = CohortProjectSerializer
@@ -58,7 +64,7 @@ class CohortProjectViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['-created_at']
 
 
-class CohortEventViewSet(viewsets.ReadOnlyModelViewSet):
+class CohortEventViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for viewing cohort events"""
     queryset = CohortEvent.objects.all()
     serializer_class = CohortEventSerializer
@@ -69,7 +75,7 @@ class CohortEventViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['-event_date']
 
 
-class CohortGalleryImageViewSet(viewsets.ReadOnlyModelViewSet):
+class CohortGalleryImageViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for viewing cohort gallery images"""
     queryset = CohortGalleryImage.objects.all()
     serializer_class = CohortGalleryImageSerializer
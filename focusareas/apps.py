@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class FocusareasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'focusareas'
+
+    def ready(self):
+        from main.caching import track_model_versions
+        track_model_versions(self)
@@ -23,6 +23,7 @@ class FocusArea(models.Model):
     slug = models.SlugField(max_length=200, unique=True)
     title = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['title']
@@ -66,6 +67,7 @@ class FocusAreaObjective(models.Model):
     focus_area = models.ForeignKey(FocusArea, on_delete=models.CASCADE, related_name='objectives')
     text = models.TextField()
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order']
@@ -82,6 +84,7 @@ class FocusAreaActivity(models.Model):
     focus_area = models.ForeignKey(FocusArea, on_delete=models.CASCADE, related_name='activities')
     text = models.TextField()
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order']
@@ -100,6 +103,7 @@ class FocusAreaOutcome(models.Model):
     description = models.TextField()
     metric = models.CharField(max_length=100, help_text="E.g., '50+ Reports', '500+ Trained'")
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order']
@@ -129,6 +133,7 @@ class FocusAreaPartner(models.Model):
     role = models.TextField(help_text="Description of their role in this focus area")
     logo = models.ImageField(upload_to=upload_to_partner_logos, blank=True, null=True, help_text="Partner organization logo")
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order']
@@ -146,6 +151,7 @@ class FocusAreaMilestone(models.Model):
     year = models.CharField(max_length=10)
     event = models.TextField()
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order']
@@ -163,6 +169,7 @@ class FocusAreaResources(models.Model):
     name = models.CharField(max_length=255)
     file = models.FileField(upload_to='resources/focus-area')
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order', 'name']
@@ -3,7 +3,11 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import FocusArea
+from main.caching import ConditionalGetMixin
+from .models import (
+    FocusArea, FocusAreaBasicInformation, FocusAreaObjective, FocusAreaActivity,
+    FocusAreaOutcome, FocusAreaPartner, FocusAreaMilestone, FocusAreaResources,
+)
 from .serializers import FocusAreaSerializer, FocusAreaListSerializer
 
 
@@ -14,7 +18,7 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class FocusAreaViewSet(viewsets.ModelViewSet):
+class FocusAreaViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for FocusArea model with full CRUD operations"""
     queryset = FocusArea.objects.all().select_related('basic_information').prefetch_related(
         'objectives', 'activities', 'outcomes', 'partners', 'milestones', 'resources'
@@ -26,6 +30,10 @@ class FocusAreaViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'basic_information__overview_summary']
     ordering_fields = ['basic_information__order', 'title', 'created_at']
     ordering = ['basic_information__order', 'title']
+    conditional_models = [
+        FocusAreaBasicInformation, FocusAreaObjective, FocusAreaActivity,
+        FocusAreaOutcome, FocusAreaPartner, FocusAreaMilestone, FocusAreaResources,
+    ]
 
     def get_serializer_class(self):
         """Use list serializer for list view, detail serializer for others"""
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('getinvolved', '0002_announcement'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['created_at', 'id'], name='getinvolved_created_7a201d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='careeropportunity',
+            index=models.Index(fields=['created_at', 'id'], name='getinvolved_created_6b7f43_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.utils import timezone
+from main.slugs import UniqueSlugMixin
 import uuid
 import os
 
@@ -19,7 +20,7 @@ def upload_to_announcement_images(instance, filename):
     return os.path.join('announcements', 'images', filename)
 
 
-class CareerOpportunity(models.Model):
+class CareerOpportunity(UniqueSlugMixin, models.Model):
     """Model for career opportunities, internships, fellowships, and consultancies"""
     OPPORTUNITY_TYPES = [
         ('Full-time', 'Full-time Position'),
@@ -56,6 +57,9 @@ class CareerOpportunity(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Career Opportunity'
         verbose_name_plural = 'Career Opportunities'
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.type}"
@@ -100,6 +104,9 @@ class Announcement(models.Model):
         ordering = ['-published_date', '-created_at']
         verbose_name = 'Announcement'
         verbose_name_plural = 'Announcements'
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.type}"
\ No newline at end of file
@@ -1,20 +1,21 @@
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
+from main.pagination import CursorOptInPagination
+from main.caching import ConditionalGetMixin
 from .models import CareerOpportunity, Announcement
 from .serializers import CareerOpportunitySerializer, AnnouncementSerializer
 
 
-class StandardResultsSetPagination(PageNumberPagination):
-    """Custom pagination class"""
+class StandardResultsSetPagination(CursorOptInPagination):
+    """Custom pagination class; `?cursor=` switches to keyset pages"""
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
 
 
-class CareerOpportunityViewSet(viewsets.ModelViewSet):
+class CareerOpportunityViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for CareerOpportunity model with full CRUD operations"""
     queryset = CareerOpportunity.objects.all()
     serializer_class = CareerOpportunitySerializer
@@ -66,7 +67,7 @@ class CareerOpportunityViewSet(viewsets.ModelViewSet):
             )
 
 
-class AnnouncementViewSet(viewsets.ModelViewSet):
+class AnnouncementViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for Announcement model with full CRUD operations"""
     queryset = Announcement.objects.all()
     serializer_class = AnnouncementSerializer
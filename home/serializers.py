@@ -1,14 +1,17 @@
 from rest_framework import serializers
 from .models import HeroSlide
 from django.conf import settings
+from multimedia.derivatives import ImageVariantsField, ImageVariantsListSerializer
 
 
 class HeroSlideSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    image_variants = ImageVariantsField(source='image')
 
     class Meta:
         model = HeroSlide
-        fields = ['id', 'title', 'image', 'image_url', 'order', 'is_active']
+        list_serializer_class = ImageVariantsListSerializer
+        fields = ['id', 'title', 'image', 'image_url', 'image_variants', 'order', 'is_active']
 
     def get_image_url(self, obj):
         """Return full URL for the image"""
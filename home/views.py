@@ -1,16 +1,21 @@
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from main.caching import ConditionalGetMixin
+from multimedia.models import ImageDerivative
 from .models import HeroSlide
 from .serializers import HeroSlideSerializer
 
 
-class HeroSlideViewSet(viewsets.ReadOnlyModelViewSet):
+class HeroSlideViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for retrieving hero slides.
     Only active slides are returned by default.
     """
     serializer_class = HeroSlideSerializer
+    # Image variants appear as their derivatives are generated
+    conditional_models = [ImageDerivative]
+    conditional_timestamp_models = [ImageDerivative]
 
     def get_queryset(self):
         """Return only active hero slides, ordered by order field"""
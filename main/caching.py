@@ -0,0 +1,301 @@
+"""
+Conditional GET for the public content APIs.
+
+ConditionalGetMixin answers GET/HEAD requests with 304 Not Modified while
+the client's copy is still current, before anything is serialized. The
+validator of a request is computed with one aggregate query over the rows
+the action reads:
+
+- COUNT(*) and MAX(updated_at) of the view's queryset (filtered for list
+  routes, narrowed to the looked-up object for detail routes). Every save
+  moves MAX(updated_at) forward through auto_now and every insert or delete
+  changes the count, so any edit changes the validator;
+- the sum of each of `conditional_counters`, fields such as views_count
+  and comment_count that are updated without touching updated_at (or
+  expressions over them, for values that move with the clock);
+- the same figures for `conditional_models`, models whose rows are nested
+  into the response (e.g. a cohort's fellows).
+
+Responses carry an ETag built from the validator and the CONTENT_CACHE_CONTROL
+header, so a CDN can cache them and revalidate with the same ETag. Last-Modified
+is only sent for a single row without nested models or counters, the one case
+where MAX(updated_at) alone captures every change (deleting a row from a list
+leaves it unchanged).
+
+Rendered responses are also kept in the RESPONSE_CACHE_ALIAS cache, keyed by
+path, query parameters and the content version of every model the view reads
+(its queryset's model plus `conditional_models`). Each app that calls
+track_model_versions() in its AppConfig.ready() bumps a model's version on
+post_save/post_delete, so an admin edit to a BlogPost moves on the keys of
+the blog endpoints and the homepage, and leaves the others cached. A hit is
+served straight from the cache without touching the database.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import transaction
+from django.db.models import CharField, Count, F, IntegerField, Max, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Concat
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+DEFAULT_CACHE_CONTROL = 'public, max-age=0, s-maxage=60, stale-while-revalidate=300'
+RESPONSE_KEY_PREFIX = 'response'
+VERSION_KEY_PREFIX = 'content-version'
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def version_key(model):
+    return f'{VERSION_KEY_PREFIX}:{model._meta.label_lower}'
+
+
+def bump_version(model):
+    """Move a model's content version on, retiring every response that read it"""
+    cache = get_cache()
+    try:
+        cache.incr(version_key(model))
+    except ValueError:
+        cache.set(version_key(model), time.time_ns(), timeout=None)
+
+
+def get_versions(models):
+    """Return the current content version of each model"""
+    cache = get_cache()
+    keys = [version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Seeded from the clock, so a counter lost to eviction or a
+            # restart never comes back with a number already used for a key
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def track_model_versions(app_config, ignore_fields=(), exclude=()):
+    """
+    Bump the content version of the app's models when they are saved or deleted.
+    Saves that only write `ignore_fields` (e.g. a views_count increment) are
+    left out, so such counters lag in cached responses by RESPONSE_CACHE_TTL.
+    Models in `exclude` (e.g. bulk-written analytics) are not tracked at all.
+    """
+    def bump(sender, update_fields=None, **kwargs):
+        if update_fields and set(update_fields) <= set(ignore_fields):
+            return
+        bump_version(sender)
+        # Again once committed: a request that read the new version before the
+        # commit may have cached the old rows under it
+        transaction.on_commit(lambda: bump_version(sender))
+
+    for model in app_config.get_models():
+        if model in exclude:
+            continue
+        uid = f'{VERSION_KEY_PREFIX}:{model._meta.label_lower}'
+        post_save.connect(bump, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(bump, sender=model, weak=False, dispatch_uid=uid)
+
+
+def prerendered_response(request, content, etag):
+    """Serve pre-rendered JSON bytes, or a 304, with its ETag and CDN cache headers"""
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = getattr(settings, 'CONTENT_CACHE_CONTROL', DEFAULT_CACHE_CONTROL)
+    return response
+
+
+class _EarlyResponse(Exception):
+    """Carries a 304/412 or cached response out of APIView.initial()"""
+
+    def __init__(self, response):
+        self.response = response
+
+
+def validator_query(parts):
+    """
+    Build one query returning (count, latest, counters) for each part.
+    `parts` is a list of (queryset, counters); counters are field names or
+    expressions. Each is summed on its own, so a counter going down (e.g. a
+    deleted comment) cannot cancel out another going up.
+    """
+    queries = []
+    for index, (queryset, counters) in enumerate(parts):
+        if not any(field.name == 'updated_at' for field in queryset.model._meta.concrete_fields):
+            raise ImproperlyConfigured(f'{queryset.model.__name__} has no updated_at field to validate against')
+        sums = []
+        for term in counters:
+            term = F(term) if isinstance(term, str) else term
+            sums += [Cast(Coalesce(Sum(term), 0, output_field=IntegerField()), CharField()), Value(':')]
+        if not sums:
+            counter = Value('', output_field=CharField())
+        elif len(sums) == 2:
+            counter = sums[0]
+        else:
+            counter = Concat(*sums[:-1], output_field=CharField())
+        queries.append(
+            queryset.order_by().values(part=Value(index)).annotate(
+                count=Count('pk'), latest=Max('updated_at'), counter=counter
+            ).values_list('part', 'count', 'latest', 'counter')
+        )
+    if len(queries) == 1:
+        return queries[0]
+    return queries[0].union(*queries[1:], all=True)
+
+
+class ConditionalGetMixin:
+    """
+    Add ETag validation and CDN cache headers to a read endpoint.
+
+    Works on viewsets and plain APIViews; views without a queryset validate
+    against `conditional_models` alone. Actions listed in
+    `conditional_exempt_actions` (e.g. ones reading rows the validator does
+    not cover) are served as usual. Set `cache_responses = False` for views
+    whose rows change without signals (e.g. F() counter updates).
+    `conditional_timestamp_models` lists those of `conditional_models` whose
+    rows shown are rewritten, never deleted (e.g. image derivatives), so that
+    MAX(updated_at) still covers them and single rows keep Last-Modified.
+    """
+    conditional_counters = ()
+    conditional_models = ()
+    conditional_timestamp_models = ()
+    conditional_exempt_actions = ()
+    cache_responses = True
+
+    def get_conditional_queryset(self):
+        """The rows this request reads, or None for views without a queryset"""
+        if not hasattr(self, 'get_queryset'):
+            return None
+        queryset = self.get_queryset()
+        # Custom actions read self.queryset directly, so filter params would
+        # narrow the validator below what they actually return
+        if getattr(self, 'action', None) in ('list', 'retrieve'):
+            queryset = self.filter_queryset(queryset)
+        lookup_url_kwarg = getattr(self, 'lookup_url_kwarg', None) or getattr(self, 'lookup_field', None)
+        if lookup_url_kwarg and lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_conditional_parts(self):
+        parts = []
+        queryset = self.get_conditional_queryset()
+        if queryset is not None:
+            parts.append((queryset, tuple(self.conditional_counters)))
+        for entry in self.conditional_models:
+            model, counters = entry if isinstance(entry, tuple) else (entry, ())
+            parts.append((model._default_manager.all(), tuple(counters)))
+        return parts
+
+    def get_validators(self):
+        """Return (etag, last_modified timestamp or None) for this request"""
+        parts = self.get_conditional_parts()
+        rows = sorted(validator_query(parts))
+        latest = max((row[2] for row in rows if row[2] is not None), default=None)
+        state = '|'.join(
+            [getattr(self, 'action', None) or '', getattr(self.request, 'accepted_media_type', '') or '']
+            + [f'{count}:{when.isoformat() if when else "-"}:{counter}' for _, count, when, counter in rows]
+        )
+        etag = '"' + hashlib.md5(state.encode()).hexdigest() + '"'
+
+        # With at most one row, an insert or edit moves MAX(updated_at) forward
+        # and a deletion leaves nothing to be "not modified"
+        validated = [
+            index for index, (queryset, _) in enumerate(parts)
+            if index == 0 or queryset.model not in self.conditional_timestamp_models
+        ]
+        single_object = validated == [0] and not parts[0][1] and rows[0][1] <= 1
+        last_modified = int(latest.timestamp()) if single_object and latest else None
+        return etag, last_modified
+
+    def is_conditional_request(self, request):
+        return (
+            request.method in ('GET', 'HEAD')
+            and getattr(self, 'action', None) not in self.conditional_exempt_actions
+        )
+
+    def get_cache_models(self):
+        """Models whose content version is part of this view's cache keys"""
+        models = []
+        if hasattr(self, 'get_queryset'):
+            models.append(self.get_queryset().model)
+        for entry in self.conditional_models:
+            models.append(entry[0] if isinstance(entry, tuple) else entry)
+        return models
+
+    def get_response_cache_key(self, request):
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        versions = get_versions(self.get_cache_models())
+        state = '|'.join(
+            [request.path, query, getattr(request, 'accepted_media_type', '') or '']
+            + [str(version) for version in versions]
+        )
+        return f'{RESPONSE_KEY_PREFIX}:{hashlib.md5(state.encode()).hexdigest()}'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.conditional_validators = None
+        self.response_cache_key = None
+        if not self.is_conditional_request(request):
+            return
+
+        if self.cache_responses and getattr(settings, 'RESPONSE_CACHE_TTL', 300) > 0:
+            key = self.get_response_cache_key(request)
+            entry = get_cache().get(key)
+            if entry is not None:
+                self.conditional_validators = (entry['etag'], entry['last_modified'])
+                response = get_conditional_response(
+                    request, etag=entry['etag'], last_modified=entry['last_modified']
+                )
+                raise _EarlyResponse(response or HttpResponse(entry['content'], content_type=entry['content_type']))
+            self.response_cache_key = key
+
+        try:
+            self.conditional_validators = self.get_validators()
+        except (TypeError, ValueError, ValidationError):
+            # Malformed lookup value; the action answers with its usual 404
+            return
+        etag, last_modified = self.conditional_validators
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            raise _EarlyResponse(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _EarlyResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def store_response(self, response):
+        """Render a successful response and keep it under this request's key"""
+        response.render()
+        etag, last_modified = self.conditional_validators
+        get_cache().set(self.response_cache_key, {
+            'content': response.content,
+            'content_type': response['Content-Type'],
+            'etag': etag,
+            'last_modified': last_modified,
+        }, timeout=getattr(settings, 'RESPONSE_CACHE_TTL', 300))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, 'conditional_validators', None)
+        if validators and response.status_code == 200 and getattr(self, 'response_cache_key', None):
+            self.store_response(response)
+        if validators and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response.headers.setdefault('ETag', etag)
+            if last_modified is not None:
+                response.headers.setdefault('Last-Modified', http_date(last_modified))
+            response.headers.setdefault(
+                'Cache-Control', getattr(settings, 'CONTENT_CACHE_CONTROL', DEFAULT_CACHE_CONTROL)
+            )
+            patch_vary_headers(response, ['Accept'])
+        return response
@@ -0,0 +1,136 @@
+"""
+Pagination for the content list endpoints and large admin listings.
+
+Page-number pagination runs COUNT(*) on every page and skips rows with
+OFFSET, so both grow with the table and the page number. List endpoints
+using CursorOptInPagination keep that behaviour by default, and clients that
+scroll through a listing can opt into keyset pagination instead by sending
+`?cursor=` (empty for the first page, then the `next` link of each page):
+
+- rows are ordered newest first on (created_at, id), the order of the
+  composite index on each paginated model, and a page continues strictly
+  after the last row of the previous one, so page 1000 reads the same
+  `page_size + 1` index entries as page 1;
+- no count is run unless asked for with `?count=exact`, or `?count=estimate`
+  for the planner's row estimate (exact on small tables and non-PostgreSQL
+  databases).
+
+Keyset pages ignore `?ordering=` and `?page=`; filters and search apply as usual.
+Listings without page numbers (e.g. comment threads) set `cursor_only`.
+"""
+import base64
+import binascii
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Below this many estimated rows an exact COUNT(*) is cheap enough
+EXACT_COUNT_THRESHOLD = 10000
+
+
+def estimate_count(queryset):
+    """
+    Approximate number of rows in a queryset, from the PostgreSQL planner's
+    estimate for its query. Falls back to COUNT(*) on other databases and
+    when the estimate is small, where it would be least accurate.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = int(plan[0]['Plan']['Plan Rows'])
+        if estimate >= EXACT_COUNT_THRESHOLD:
+            return estimate
+    return queryset.count()
+
+
+class EstimatedCountPaginator(Paginator):
+    """Django paginator (e.g. for ModelAdmin.paginator) that counts with estimate_count()"""
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, 'query'):
+            return estimate_count(self.object_list)
+        return super().count
+
+
+class CursorOptInPagination(PageNumberPagination):
+    """Page-number pagination with opt-in keyset pages (see module docstring)"""
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    keyset_ordering = ('-created_at', '-pk')
+    cursor_only = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_keyset = self.cursor_only or self.cursor_query_param in request.query_params
+        if not self.use_keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.keyset_ordering)
+        self.count = self.get_keyset_count(queryset, request)
+        position = self.decode_cursor(request)
+        if position is not None:
+            created_at, pk = position
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page_rows = rows[:page_size]
+        return self.page_rows
+
+    def get_keyset_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'estimate':
+            return estimate_count(queryset)
+        return None
+
+    def decode_cursor(self, request):
+        """Return the (created_at, pk) position to continue after, or None for the first page"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            created_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            created_at = parse_datetime(created_at)
+        except (binascii.Error, TypeError, ValueError, UnicodeDecodeError):
+            created_at = None
+        if created_at is None or not isinstance(pk, str):
+            raise NotFound('Invalid cursor')
+        return created_at, pk
+
+    def encode_cursor(self, row):
+        position = json.dumps([row.created_at.isoformat(), str(row.pk)], separators=(',', ':'))
+        return base64.urlsafe_b64encode(position.encode()).decode().rstrip('=')
+
+    def get_next_link(self):
+        if not self.use_keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page_rows[-1]))
+
+    def get_paginated_response(self, data):
+        if not self.use_keyset:
+            return super().get_paginated_response(data)
+        payload = {'next': self.get_next_link(), 'results': data}
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return Response(payload)
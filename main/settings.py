@@ -108,6 +108,34 @@ else:
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Redis when REDIS_URL is set (requires the `redis` package). Otherwise a file-based cache, which is
+# shared by all worker processes on the host, so content version bumps reach every worker;
+# CACHE_BACKEND=locmem keeps a private cache per process (single-process setups only).
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+elif os.environ.get('CACHE_BACKEND') == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', str(BASE_DIR / 'var' / 'cache')),
+            'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 5000))},
+        }
+    }
     
     
 
@@ -275,3 +303,67 @@ CKEDITOR_CONFIGS = {
 }
 
 
+
+# Chatbot configuration
+# Number of indexed passages sent to the LLM as context for each answer
+CHATBOT_RETRIEVAL_TOP_K = int(os.environ.get('CHATBOT_RETRIEVAL_TOP_K', 5))
+# Repeated session-independent questions are answered from the cache for this many seconds
+CHATBOT_ANSWER_CACHE_TTL = int(os.environ.get('CHATBOT_ANSWER_CACHE_TTL', 3600))
+# Approximate token budget for conversation history included in chatbot prompts
+CHATBOT_CONTEXT_TOKEN_BUDGET = int(os.environ.get('CHATBOT_CONTEXT_TOKEN_BUDGET', 800))
+# LLM backend for chatbot answers: 'anthropic', or 'stub' for offline load testing and CI benchmarks
+CHATBOT_LLM_BACKEND = os.environ.get('CHATBOT_LLM_BACKEND', 'anthropic')
+# Simulated behaviour of the stub backend
+CHATBOT_LLM_STUB = {
+    'latency': float(os.environ.get('CHATBOT_LLM_STUB_LATENCY', 0.5)),
+    'tokens': int(os.environ.get('CHATBOT_LLM_STUB_TOKENS', 150)),
+    'token_delay': float(os.environ.get('CHATBOT_LLM_STUB_TOKEN_DELAY', 0.0)),
+}
+# PDF text beyond this many characters is not extracted (bounds worker memory on very large reports)
+CHATBOT_EXTRACTION_MAX_CHARS = int(os.environ.get('CHATBOT_EXTRACTION_MAX_CHARS', 2000000))
+
+# Live poll results: seconds between pushes of coalesced result deltas to listeners
+POLL_RESULTS_PUSH_INTERVAL = float(os.environ.get('POLL_RESULTS_PUSH_INTERVAL', 1.0))
+# Write-behind buffer for poll votes during traffic spikes: votes are journaled to disk, acknowledged,
+# and bulk-inserted every interval_ms or max_votes (run `flush_poll_votes` after a crash or deploy)
+POLL_VOTE_BUFFER = {
+    'enabled': os.environ.get('POLL_VOTE_BUFFER_ENABLED', 'False').lower() == 'true',
+    'directory': os.environ.get('POLL_VOTE_BUFFER_DIR', str(BASE_DIR / 'var' / 'poll-votes')),
+    'max_votes': int(os.environ.get('POLL_VOTE_BUFFER_MAX_VOTES', 200)),
+    'interval_ms': int(os.environ.get('POLL_VOTE_BUFFER_INTERVAL_MS', 250)),
+}
+# Blog and news views are counted in memory and added to views_count every interval_ms with batched
+# UPDATEs; views of exited processes are left in `directory` for `flush_view_counts`
+VIEW_COUNTER = {
+    'directory': os.environ.get('VIEW_COUNTER_DIR', str(BASE_DIR / 'var' / 'view-counts')),
+    'interval_ms': int(os.environ.get('VIEW_COUNTER_INTERVAL_MS', 1000)),
+}
+# Trending content: views within window_days, halved in weight every half_life_hours; the top `limit`
+# are ranked by `compact_view_events`, which should run every few minutes
+TRENDING = {
+    'window_days': int(os.environ.get('TRENDING_WINDOW_DAYS', 7)),
+    'half_life_hours': float(os.environ.get('TRENDING_HALF_LIFE_HOURS', 24)),
+    'limit': int(os.environ.get('TRENDING_LIMIT', 20)),
+}
+
+# Cache-Control sent with validated content API responses: browsers revalidate every time
+# (a cheap 304 when unchanged), shared caches/CDNs may serve a copy for s-maxage seconds
+CONTENT_CACHE_CONTROL = os.environ.get(
+    'CONTENT_CACHE_CONTROL', 'public, max-age=0, s-maxage=60, stale-while-revalidate=300'
+)
+# Rendered content API responses are cached for this many seconds, keyed by content version (0 disables)
+RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))
+# Most matches of a ?search= on the content list endpoints, taken in relevance order from the search index
+SEARCH_MAX_MATCHES = int(os.environ.get('SEARCH_MAX_MATCHES', 1000))
+# Responsive image derivatives: uploaded images are resized to each width (never enlarged) and re-encoded in
+# `formats` (PNG replaces JPEG for transparent images) on `workers` threads per process (0 renders inline)
+IMAGE_DERIVATIVES = {
+    'widths': {
+        'thumbnail': int(os.environ.get('IMAGE_THUMBNAIL_WIDTH', 320)),
+        'card': int(os.environ.get('IMAGE_CARD_WIDTH', 768)),
+        'hero': int(os.environ.get('IMAGE_HERO_WIDTH', 1600)),
+    },
+    'formats': os.environ.get('IMAGE_DERIVATIVE_FORMATS', 'webp,jpeg').split(','),
+    'quality': int(os.environ.get('IMAGE_DERIVATIVE_QUALITY', 80)),
+    'workers': int(os.environ.get('IMAGE_DERIVATIVE_WORKERS', 2)),
+}
@@ -0,0 +1,80 @@
+"""
+Unique slugs for content models.
+
+A title shared by many rows ("Parliamentary Breakfast Meeting") gets
+numbered slugs: the-title, the-title-1, the-title-2, ... allocate_slug()
+reads the series with one indexed prefix query and takes the lowest free
+number, so saving the thousandth duplicate takes as many queries as the
+second. Only suffixes of up to SUFFIX_DIGITS digits count as numbers, so a
+separate title ending in a year or date ("budget-2024") is not mistaken for
+part of the series. UniqueSlugMixin fills in blank slugs on save and, if a
+concurrent save claims the same slug first, allocates again.
+"""
+import uuid
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+SLUG_ATTEMPTS = 5
+# Longest number allocate_slug() issues; longer suffixes belong to other titles
+SUFFIX_DIGITS = 4
+
+
+def allocate_slug(model, base, exclude_pk=None, field='slug'):
+    """
+    Return `base`, or `base-<n>` with n the lowest number not in use.
+    `base` must be slugify() output, which has no regex metacharacters.
+    """
+    max_length = model._meta.get_field(field).max_length
+    base = base[:max_length]
+    taken = model._default_manager.filter(
+        Q(**{field: base}) | Q(**{
+            f'{field}__startswith': f'{base}-',
+            f'{field}__regex': rf'^{base}-[1-9][0-9]{{0,{SUFFIX_DIGITS - 1}}}$',
+        })
+    )
+    if exclude_pk is not None:
+        taken = taken.exclude(pk=exclude_pk)
+    slugs = set(taken.values_list(field, flat=True))
+    if base not in slugs:
+        return base
+    numbers = {int(slug[len(base) + 1:]) for slug in slugs if slug != base}
+    number = next((n for n in range(1, 10 ** SUFFIX_DIGITS) if n not in numbers), None)
+    if number is None:
+        # The numbered series is full; a random suffix is too long to join it
+        return f'{base[:max_length - 9]}-{uuid.uuid4().hex[:8]}'
+    candidate = f'{base}-{number}'
+    if len(candidate) > max_length:
+        # Numbering a shortened base starts a series of its own
+        return allocate_slug(model, base[:max_length - len(str(number)) - 1], exclude_pk, field)
+    return candidate
+
+
+class UniqueSlugMixin:
+    """
+    Fill in a blank `slug` from `slug_source` (e.g. the title) on save.
+    Titles without any slug characters get `<model name>-<id>`.
+    """
+    slug_source = 'title'
+
+    def get_slug_base(self):
+        base = slugify(getattr(self, self.slug_source) or '')
+        return base or f'{self._meta.model_name}-{self.pk or uuid.uuid4().hex[:8]}'
+
+    def save(self, *args, **kwargs):
+        if self.slug or not getattr(self, self.slug_source):
+            return super().save(*args, **kwargs)
+        model = type(self)
+        base = self.get_slug_base()
+        for attempt in range(SLUG_ATTEMPTS):
+            self.slug = allocate_slug(model, base, exclude_pk=self.pk)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Retry only if a concurrent save took the slug first
+                taken = model._default_manager.filter(slug=self.slug).exclude(pk=self.pk).exists()
+                if not taken or attempt == SLUG_ATTEMPTS - 1:
+                    self.slug = ''
+                    raise
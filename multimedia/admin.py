@@ -2,8 +2,9 @@ from django.contrib import admin
 from django.utils.html import format_html
 from .models import (
     Podcast, Video, GalleryGroup, GalleryImage,
-    Poll, PollOption, PollVote, XPollEmbed, Trivia, TriviaQuestion, TriviaOption,
+    Poll, PollOption, PollVote, XPollEmbed, Trivia, TriviaQuestion, TriviaOption, ImageDerivative,
 )
+from .votes import reconcile_vote_counts
 
 
 @admin.register(Podcast)
@@ -68,11 +69,17 @@ class PollAdmin(admin.ModelAdmin):
     list_editable = ['featured', 'status']
     inlines = [PollOptionInline]
     ordering = ['-featured', '-created_at']
+    actions = ['reconcile_votes']
 
     def total_votes_display(self, obj):
         return obj.total_votes
     total_votes_display.short_description = 'Total Votes'
 
+    @admin.action(description='Recount votes for selected polls')
+    def reconcile_votes(self, request, queryset):
+        fixed = reconcile_vote_counts(queryset)
+        self.message_user(request, f'Vote counters corrected on {fixed} polls.')
+
 
 @admin.register(PollOption)
 class PollOptionAdmin(admin.ModelAdmin):
@@ -80,6 +87,7 @@ class PollOptionAdmin(admin.ModelAdmin):
     list_filter = ['poll', 'created_at']
     search_fields = ['text', 'poll__title']
     ordering = ['poll', 'order']
+    list_select_related = ['poll']
 
     def vote_count_display(self, obj):
         return obj.vote_count
@@ -159,4 +167,17 @@ class TriviaOptionAdmin(admin.ModelAdmin):
 
     def text_preview(self, obj):
         return obj.text[:50] + ('...' if len(obj.text) > 50 else '')
-    text_preview.short_description = 'Option'
\ No newline at end of file
+    text_preview.short_description = 'Option'
+
+
+@admin.register(ImageDerivative)
+class ImageDerivativeAdmin(admin.ModelAdmin):
+    """Admin interface for generated image derivatives"""
+    list_display = ['source', 'variant', 'format', 'width', 'height', 'created_at']
+    list_filter = ['variant', 'format', 'created_at']
+    search_fields = ['source', 'file']
+    readonly_fields = ['source', 'variant', 'format', 'file', 'width', 'height', 'created_at']
+    ordering = ['source', 'width']
+
+    def has_add_permission(self, request):
+        return False
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class MultimediaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'multimedia'
+
+    def ready(self):
+        from main.caching import track_model_versions
+        from .models import ImageDerivative
+        # Responses embed derivatives through the models showing the image,
+        # whose versions are bumped once an image's derivatives are stored
+        track_model_versions(self, exclude=[ImageDerivative])
+        from . import derivatives
+        derivatives.connect_signals()
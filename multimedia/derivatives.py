@@ -0,0 +1,329 @@
+"""
+Responsive image derivatives for every ImageField in the project.
+
+Editors upload images at whatever size they have, often multi-megabyte
+phone photos. Saving a model with an image that has no derivatives yet
+queues it, once the transaction commits, on a small per-process thread pool
+(Pillow releases the GIL while decoding, resizing and encoding), which:
+
+- renders each variant in IMAGE_DERIVATIVES['widths'] (thumbnail, card,
+  hero), never wider than the original, straightened by its EXIF
+  orientation and without its metadata. Large JPEGs are decoded at a reduced
+  scale, and each variant is resized from the next larger one;
+- encodes each variant in IMAGE_DERIVATIVES['formats'], WebP plus a JPEG
+  fallback by default (PNG instead of JPEG for images with transparency),
+  under derivatives/<original path>/ in the default storage;
+- records the files and their dimensions as ImageDerivative rows and bumps
+  the content versions of ImageDerivative and the model using the image.
+  Views showing images list ImageDerivative in their conditional_models, so
+  their ETags and cached responses pick the derivatives up without the
+  content rows being written.
+
+Serializers expose them with ImageVariantsField, as srcset strings per
+format plus the URL and size of each variant; ImageVariantsListSerializer
+loads the derivatives of a whole list in one query. Until an image has
+derivatives the field is null and clients use the original.
+
+`generate_image_derivatives` covers images saved while no pool ran (imports,
+a process exiting with jobs queued) and removes derivatives of images no
+longer used.
+"""
+import io
+import math
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, models, transaction
+from django.db.models.signals import post_save
+from PIL import ExifTags, Image, ImageOps
+from rest_framework import serializers
+
+from main.caching import bump_version
+from main.utils import get_full_media_url
+from .models import ImageDerivative
+
+DERIVATIVES_DIR = 'derivatives'
+# Format -> (Pillow encoder, file extension, MIME type)
+ENCODINGS = {
+    'avif': ('AVIF', 'avif', 'image/avif'),
+    'webp': ('WEBP', 'webp', 'image/webp'),
+    'jpeg': ('JPEG', 'jpg', 'image/jpeg'),
+    'png': ('PNG', 'png', 'image/png'),
+}
+# EXIF orientations that turn the image by 90 degrees
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+_pool = None
+_pool_lock = threading.Lock()
+# Images queued on this process's pool and not finished yet
+_queued = set()
+
+
+def get_config():
+    config = {
+        'widths': {'thumbnail': 320, 'card': 768, 'hero': 1600},
+        'formats': ['webp', 'jpeg'],
+        'quality': 80,
+        'workers': 2,
+    }
+    config.update(getattr(settings, 'IMAGE_DERIVATIVES', {}))
+    return config
+
+
+def can_encode(format):
+    """Whether this Pillow build can write a format (AVIF needs Pillow 11.2 or a plugin)"""
+    Image.init()
+    return format in ENCODINGS and ENCODINGS[format][0] in Image.SAVE
+
+
+def image_field_names(model):
+    return [field.name for field in model._meta.concrete_fields if isinstance(field, models.ImageField)]
+
+
+def image_fields():
+    """(model, field name) of every ImageField of the installed models"""
+    return [(model, name) for model in apps.get_models() for name in image_field_names(model)]
+
+
+def derivative_path(source, variant, format):
+    root = os.path.splitext(source)[0]
+    return f'{DERIVATIVES_DIR}/{root}/{variant}.{ENCODINGS[format][1]}'
+
+
+def _open_image(source, widest):
+    """Decode a stored image upright, at a reduced scale where the format allows it"""
+    with default_storage.open(source, 'rb') as f:
+        image = Image.open(f)
+        width, height = image.size
+        if image.getexif().get(ExifTags.Base.Orientation) in TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+        if width > widest:
+            # JPEG decodes at 1/2, 1/4 or 1/8 scale if that still covers the widest variant
+            scale = widest / width
+            image.draft(image.mode, (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+    return image.convert('RGBA' if has_alpha else 'RGB'), has_alpha
+
+
+def _encode(image, format, quality):
+    options = {
+        'avif': {'quality': quality},
+        'webp': {'quality': quality, 'method': 4},
+        'jpeg': {'quality': quality, 'optimize': True, 'progressive': True},
+        'png': {'optimize': True},
+    }[format]
+    buffer = io.BytesIO()
+    image.save(buffer, ENCODINGS[format][0], **options)
+    return buffer.getvalue()
+
+
+def _store(path, content):
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    return default_storage.save(path, ContentFile(content))
+
+
+def generate_derivatives(source):
+    """Render, store and record every variant of the stored image `source`; returns its ImageDerivatives"""
+    config = get_config()
+    widths = sorted(config['widths'].items(), key=lambda item: item[1], reverse=True)
+    image, has_alpha = _open_image(source, widths[0][1])
+    formats = []
+    for format in config['formats']:
+        if format == 'jpeg' and has_alpha:
+            format = 'png'
+        if can_encode(format) and format not in formats:
+            formats.append(format)
+
+    derivatives = []
+    for variant, width in widths:
+        if image.width > width:
+            # Downscaled from the previous, larger variant rather than the original
+            image = image.resize(
+                (width, max(1, round(image.height * width / image.width))), Image.Resampling.LANCZOS
+            )
+        for format in formats:
+            path = _store(derivative_path(source, variant, format), _encode(image, format, config['quality']))
+            derivatives.append(ImageDerivative(
+                source=source, variant=variant, format=format, file=path,
+                width=image.width, height=image.height,
+            ))
+    with transaction.atomic():
+        ImageDerivative.objects.filter(source=source).delete()
+        ImageDerivative.objects.bulk_create(derivatives)
+    return derivatives
+
+
+def refresh_versions(*models):
+    # bulk_create() sends no signals; snapshots such as the homepage key on the model's version
+    for model in models:
+        bump_version(model)
+        transaction.on_commit(lambda model=model: bump_version(model))
+
+
+def process_image(model, source):
+    """Generate the derivatives of an image used by a model and retire cached responses showing it"""
+    derivatives = generate_derivatives(source)
+    refresh_versions(ImageDerivative, model)
+    return derivatives
+
+
+def _run(model, source):
+    try:
+        process_image(model, source)
+    except Exception as e:
+        print(f"Error generating image derivatives of {source}: {str(e)}")
+    finally:
+        with _pool_lock:
+            _queued.discard(source)
+        close_old_connections()
+
+
+def schedule(model, source):
+    """Generate an image's derivatives on this process's pool, or inline when IMAGE_DERIVATIVES['workers'] is 0"""
+    global _pool
+    workers = get_config()['workers']
+    if workers <= 0:
+        process_image(model, source)
+        return
+    with _pool_lock:
+        if source in _queued:
+            return
+        _queued.add(source)
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-derivatives')
+    _pool.submit(_run, model, source)
+
+
+def queue_new_images(sender, instance, raw=False, **kwargs):
+    """Schedule derivatives for images of a saved row that have none yet"""
+    if raw:
+        return
+    sources = {getattr(instance, field_name).name for field_name in image_field_names(sender)} - {'', None}
+    if not sources:
+        return
+    done = set(ImageDerivative.objects.filter(source__in=sources).values_list('source', flat=True))
+    for source in sources - done:
+        transaction.on_commit(lambda source=source: schedule(sender, source))
+
+
+def connect_signals():
+    for model in {model for model, _ in image_fields()}:
+        post_save.connect(queue_new_images, sender=model, dispatch_uid=f'image-derivatives:{model._meta.label_lower}')
+
+
+def generate_missing(threads=2, rebuild=False):
+    """Generate derivatives for every image without them (all images with `rebuild`); returns the number processed"""
+    done = set() if rebuild else set(ImageDerivative.objects.values_list('source', flat=True).distinct())
+    pending = {}
+    for model, field_name in image_fields():
+        names = model._default_manager.exclude(**{field_name: ''}).exclude(
+            **{f'{field_name}__isnull': True}
+        ).values_list(field_name, flat=True).distinct()
+        for name in names:
+            if name not in done and name not in pending:
+                pending[name] = model
+
+    def generate(item):
+        source, model = item
+        try:
+            process_image(model, source)
+            return 1
+        except Exception as e:
+            print(f"Error generating image derivatives of {source}: {str(e)}")
+            return 0
+        finally:
+            close_old_connections()
+
+    if threads <= 1:
+        return sum(map(generate, pending.items()))
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return sum(executor.map(generate, pending.items()))
+
+
+def prune_derivatives():
+    """Delete derivatives (rows and files) of images no model uses any more; returns the number of images pruned"""
+    used = set()
+    for model, field_name in image_fields():
+        used.update(model._default_manager.values_list(field_name, flat=True).distinct())
+    orphans = ImageDerivative.objects.exclude(source__in=used)
+    sources = set(orphans.values_list('source', flat=True))
+    for path in orphans.values_list('file', flat=True):
+        default_storage.delete(path)
+    orphans.delete()
+    return len(sources)
+
+
+def load_derivatives(sources):
+    """Map each source path to its ImageDerivatives, smallest first"""
+    loaded = {source: [] for source in sources}
+    if loaded:
+        for derivative in ImageDerivative.objects.filter(source__in=loaded).order_by('width', 'variant', 'format'):
+            loaded[derivative.source].append(derivative)
+    return loaded
+
+
+def describe(derivatives):
+    """The srcset structure of an image's derivatives, or None without any"""
+    if not derivatives:
+        return None
+    variants = {}
+    srcsets = defaultdict(dict)
+    for derivative in derivatives:
+        url = get_full_media_url(default_storage.url(derivative.file))
+        variant = variants.setdefault(derivative.variant, {'width': derivative.width, 'height': derivative.height})
+        variant[derivative.format] = url
+        # Variants of a small original share a width; each width is listed once
+        srcsets[derivative.format].setdefault(derivative.width, url)
+    return {
+        **variants,
+        'srcset': {
+            format: ', '.join(f'{url} {width}w' for width, url in sorted(by_width.items()))
+            for format, by_width in srcsets.items()
+        },
+        'types': {format: ENCODINGS[format][2] for format in srcsets},
+    }
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    Read-only derivatives of an image field, e.g. `ImageVariantsField(source='image')`:
+    {"thumbnail": {"width", "height", "webp": url, "jpeg": url}, "card": ..., "hero": ...,
+     "srcset": {"webp": "<url> 320w, <url> 768w, ...", "jpeg": ...}, "types": {"webp": "image/webp", ...}}
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        loaded = getattr(self.parent, 'image_derivatives', None)
+        if loaded is None or value.name not in loaded:
+            loaded = load_derivatives([value.name])
+        return describe(loaded[value.name])
+
+
+class ImageVariantsListSerializer(serializers.ListSerializer):
+    """List serializer (Meta.list_serializer_class) that loads the derivatives of every item in one query"""
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        sources = set()
+        for field in self.child.fields.values():
+            if isinstance(field, ImageVariantsField):
+                for item in items:
+                    value = field.get_attribute(item)
+                    if value:
+                        sources.add(value.name)
+        self.child.image_derivatives = load_derivatives(sources)
+        return super().to_representation(items)
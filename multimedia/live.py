@@ -0,0 +1,164 @@
+"""
+Live poll results pushed over server-sent events.
+
+Each poll with at least one listener gets a single ticker task per event
+loop. Every POLL_RESULTS_PUSH_INTERVAL seconds the ticker reads the stored
+vote counters once and, if they changed, fans a compact delta out to every
+listener, so the cost per tick is one read however many viewers there are.
+A slow listener's pending deltas are merged instead of queued.
+"""
+import asyncio
+import hashlib
+import json
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .models import Poll, PollOption
+
+_channels = weakref.WeakKeyDictionary()
+
+
+def percentage(count, total):
+    return round((count / total) * 100, 1) if total else 0
+
+
+def results_etag(total_votes, counts):
+    """Strong validator for a poll's results, derived from its counters"""
+    state = f"{total_votes}:" + ",".join(f"{option_id}={count}" for option_id, count in counts)
+    return '"' + hashlib.md5(state.encode()).hexdigest() + '"'
+
+
+def results_snapshot(poll_id):
+    """Return the current results of a poll, or None if it does not exist"""
+    poll = Poll.objects.filter(pk=poll_id).values('id', 'title', 'total_votes').first()
+    if poll is None:
+        return None
+    options = list(
+        PollOption.objects.filter(poll_id=poll_id)
+        .order_by('order', 'created_at')
+        .values('id', 'text', 'vote_count')
+    )
+    total = poll['total_votes']
+    return {
+        'poll_id': poll['id'],
+        'poll_title': poll['title'],
+        'total_votes': total,
+        'results': [
+            {
+                'option_id': option['id'],
+                'text': option['text'],
+                'vote_count': option['vote_count'],
+                'percentage': percentage(option['vote_count'], total),
+            }
+            for option in options
+        ],
+        'etag': results_etag(total, [(option['id'], option['vote_count']) for option in options]),
+    }
+
+
+def results_delta(previous, current):
+    """
+    Describe what changed between two snapshots, or return None.
+    `changed` maps option IDs to new counts; percentages are sent for every
+    option because they all move when the total changes.
+    """
+    if previous is None or current is None or previous['etag'] == current['etag']:
+        return None
+    before = {row['option_id']: row['vote_count'] for row in previous['results']}
+    return {
+        'total_votes': current['total_votes'],
+        'changed': {
+            str(row['option_id']): row['vote_count']
+            for row in current['results'] if before.get(row['option_id']) != row['vote_count']
+        },
+        'percentages': {str(row['option_id']): row['percentage'] for row in current['results']},
+        'etag': current['etag'],
+    }
+
+
+def format_sse(event, data):
+    """Encode one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def merge_deltas(older, newer):
+    """Combine two undelivered deltas into one"""
+    merged = dict(newer)
+    merged['changed'] = {**older['changed'], **newer['changed']}
+    return merged
+
+
+def publish(queue, delta):
+    """Deliver a delta to a listener, coalescing with one it has not read yet"""
+    if queue.full():
+        delta = merge_deltas(queue.get_nowait(), delta)
+    queue.put_nowait(delta)
+
+
+class PollChannel:
+    """Listeners of one poll and the ticker task that feeds them"""
+
+    def __init__(self, poll_id, interval):
+        self.poll_id = poll_id
+        self.interval = interval
+        self.listeners = set()
+        self.snapshot = None
+        self.task = None
+
+    async def run(self):
+        while self.listeners:
+            await asyncio.sleep(self.interval)
+            snapshot = await sync_to_async(results_snapshot)(self.poll_id)
+            delta = results_delta(self.snapshot, snapshot)
+            if snapshot is not None:
+                self.snapshot = snapshot
+            if delta:
+                for queue in self.listeners:
+                    publish(queue, delta)
+
+
+def get_channels():
+    loop = asyncio.get_running_loop()
+    if loop not in _channels:
+        _channels[loop] = {}
+    return _channels[loop]
+
+
+async def subscribe(poll_id):
+    """
+    Register a listener for a poll.
+    Returns (queue, snapshot); the snapshot is None if the poll does not exist.
+    """
+    channels = get_channels()
+    channel = channels.get(poll_id)
+    if channel is None:
+        snapshot = await sync_to_async(results_snapshot)(poll_id)
+        if snapshot is None:
+            return None, None
+        # Another listener may have created the channel while we read
+        channel = channels.get(poll_id)
+        if channel is None:
+            channel = PollChannel(poll_id, getattr(settings, 'POLL_RESULTS_PUSH_INTERVAL', 1.0))
+            channel.snapshot = snapshot
+            channels[poll_id] = channel
+
+    queue = asyncio.Queue(maxsize=1)
+    channel.listeners.add(queue)
+    if channel.task is None or channel.task.done():
+        channel.task = asyncio.get_running_loop().create_task(channel.run())
+    return queue, channel.snapshot
+
+
+def unsubscribe(poll_id, queue):
+    """Remove a listener; the ticker stops once a poll has none left"""
+    channels = get_channels()
+    channel = channels.get(poll_id)
+    if channel is None:
+        return
+    channel.listeners.discard(queue)
+    if not channel.listeners:
+        if channel.task is not None:
+            channel.task.cancel()
+        del channels[poll_id]
@@ -0,0 +1,88 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection
+
+from multimedia.models import Poll, PollOption, PollVote
+from multimedia.votes import DuplicateVote, record_vote
+
+
+class Command(BaseCommand):
+    help = ('Measure sustained votes/second through the voting path on the configured database, '
+            'using a throwaway poll and concurrent voter threads')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--votes', type=int, default=2000, help='Total number of votes to cast')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent voter threads')
+        parser.add_argument('--options', type=int, default=4, help='Options on the benchmark poll')
+        parser.add_argument('--duplicate-every', type=int, default=10,
+                            help='Every Nth vote repeats an earlier voter and must be rejected (0 disables)')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark poll afterwards')
+
+    def handle(self, *args, **options):
+        total = options['votes']
+        threads = max(1, options['threads'])
+        # A draft poll: kept out of the homepage and active-poll listings while the run lasts
+        poll = Poll.objects.create(title='Vote benchmark', status='draft', category='benchmark')
+        try:
+            self.run(poll, total, threads, options)
+        finally:
+            if not options['keep']:
+                poll.delete()
+
+    def run(self, poll, total, threads, options):
+        PollOption.objects.bulk_create(
+            PollOption(poll=poll, text=f'Option {i}', order=i) for i in range(options['options'])
+        )
+        poll_options = list(poll.options.all())
+
+        def voter_for(index):
+            every = options['duplicate_every']
+            if every and index and index % every == 0:
+                return f'voter-{index - 1}'
+            return f'voter-{index}'
+
+        def cast(indexes):
+            outcome = {'accepted': 0, 'duplicates': 0, 'errors': 0}
+            try:
+                for index in indexes:
+                    try:
+                        record_vote(poll, poll_options[index % len(poll_options)],
+                                    ip_address='10.0.0.1', session_id=voter_for(index))
+                        outcome['accepted'] += 1
+                    except DuplicateVote:
+                        outcome['duplicates'] += 1
+                    except OperationalError:
+                        # e.g. "database is locked" under SQLite write contention
+                        outcome['errors'] += 1
+            finally:
+                if threads > 1:
+                    close_old_connections()
+            return outcome
+
+        batches = [range(start, total, threads) for start in range(threads)]
+        start = time.perf_counter()
+        if threads == 1:
+            results = [cast(batches[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                results = list(executor.map(cast, batches))
+        elapsed = time.perf_counter() - start
+
+        totals = {key: sum(result[key] for result in results) for key in results[0]}
+        poll.refresh_from_db()
+        stored = PollVote.objects.filter(poll=poll).count()
+        option_sum = sum(option.vote_count for option in poll.options.all())
+
+        self.stdout.write(
+            f'{connection.vendor}: {totals["accepted"]} votes accepted, {totals["duplicates"]} duplicates '
+            f'rejected, {totals["errors"]} errors in {elapsed:.2f}s with {threads} threads'
+        )
+        self.stdout.write(f'Throughput: {(totals["accepted"] + totals["duplicates"]) / elapsed:.0f} votes/s')
+
+        if not poll.total_votes == stored == option_sum == totals['accepted']:
+            raise CommandError(
+                f'Counters out of sync: poll={poll.total_votes} options={option_sum} rows={stored}'
+            )
+        self.stdout.write(self.style.SUCCESS('✓ Counters match recorded votes'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from multimedia import vote_buffer
+
+
+class Command(BaseCommand):
+    help = 'Write votes held in the poll vote buffer (including batches left by a crash) to the database'
+
+    def handle(self, *args, **options):
+        written = vote_buffer.flush()
+        self.stdout.write(self.style.SUCCESS(f'✓ Flushed {written} buffered votes'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from multimedia import derivatives
+
+
+class Command(BaseCommand):
+    help = 'Generate responsive derivatives (thumbnail, card, hero) of uploaded images that have none yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2, help='Number of worker threads (1 renders in this thread)')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Regenerate every image, e.g. after changing IMAGE_DERIVATIVES')
+        parser.add_argument('--prune', action='store_true',
+                            help='Also delete derivatives of images no longer used')
+
+    def handle(self, *args, **options):
+        generated = derivatives.generate_missing(threads=options['threads'], rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Generated derivatives of {generated} images'))
+        if options['prune']:
+            pruned = derivatives.prune_derivatives()
+            self.stdout.write(self.style.SUCCESS(f'✓ Pruned derivatives of {pruned} unused images'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from multimedia.models import Poll
+from multimedia.votes import reconcile_vote_counts
+
+
+class Command(BaseCommand):
+    help = 'Rebuild stored poll and option vote counters from recorded votes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('poll_ids', nargs='*', type=int, help='Only reconcile these polls')
+
+    def handle(self, *args, **options):
+        polls = Poll.objects.all()
+        if options['poll_ids']:
+            polls = polls.filter(pk__in=options['poll_ids'])
+        fixed = reconcile_vote_counts(polls)
+        if fixed:
+            self.stdout.write(self.style.WARNING(f'⚠ Corrected vote counters on {fixed} polls'))
+        self.stdout.write(self.style.SUCCESS(f'✓ Reconciled {polls.count()} polls'))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:26
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_vote_counters(apps, schema_editor):
+    """Fill the new counters from existing votes"""
+    Poll = apps.get_model('multimedia', 'Poll')
+    PollOption = apps.get_model('multimedia', 'PollOption')
+    PollVote = apps.get_model('multimedia', 'PollVote')
+    for row in PollVote.objects.values('option').annotate(total=Count('pk')):
+        PollOption.objects.filter(pk=row['option']).update(vote_count=row['total'])
+    for row in PollVote.objects.values('poll').annotate(total=Count('pk')):
+        Poll.objects.filter(pk=row['poll']).update(total_votes=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multimedia', '0002_poll_trivia_xpollembed_polloption_pollvote_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poll',
+            name='total_votes',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Stored vote tally, updated with each vote (see reconcile_poll_votes)'),
+        ),
+        migrations.AddField(
+            model_name='polloption',
+            name='vote_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Stored vote tally, updated with each vote (see reconcile_poll_votes)'),
+        ),
+        migrations.RunPython(populate_vote_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:27
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_votes(apps, schema_editor):
+    """
+    Flag votes on multiple-vote polls and drop duplicates that slipped past
+    the old lookup-then-insert check, so the unique constraint can be added.
+    Counters of affected polls are recomputed.
+    """
+    Poll = apps.get_model('multimedia', 'Poll')
+    PollOption = apps.get_model('multimedia', 'PollOption')
+    PollVote = apps.get_model('multimedia', 'PollVote')
+    PollVote.objects.filter(poll__allow_multiple_votes=True).update(single_vote=False)
+
+    duplicates = (
+        PollVote.objects.filter(single_vote=True)
+        .values('poll', 'ip_address', 'session_id')
+        .annotate(first_id=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    affected_polls = set()
+    for row in duplicates:
+        PollVote.objects.filter(
+            poll=row['poll'], ip_address=row['ip_address'], session_id=row['session_id'], single_vote=True,
+        ).exclude(id=row['first_id']).delete()
+        affected_polls.add(row['poll'])
+
+    for poll_id in affected_polls:
+        Poll.objects.filter(pk=poll_id).update(total_votes=PollVote.objects.filter(poll_id=poll_id).count())
+        for option in PollOption.objects.filter(poll_id=poll_id):
+            option.vote_count = PollVote.objects.filter(option=option).count()
+            option.save(update_fields=['vote_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multimedia', '0003_poll_vote_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pollvote',
+            name='single_vote',
+            field=models.BooleanField(default=True, help_text='Cast on a one-vote-per-voter poll (enforced by a unique constraint)'),
+        ),
+        migrations.RunPython(remove_duplicate_votes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='pollvote',
+            constraint=models.UniqueConstraint(condition=models.Q(('single_vote', True)), fields=('poll', 'ip_address', 'session_id'), name='unique_single_vote_per_voter'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multimedia', '0004_pollvote_unique_single_vote'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pollvote',
+            name='buffer_token',
+            field=models.CharField(blank=True, editable=False, help_text='Idempotency key of a vote written by the vote buffer', max_length=36, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multimedia', '0005_pollvote_buffer_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='polloption',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='triviaoption',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='triviaquestion',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multimedia', '0006_content_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageDerivative',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(help_text='Storage path of the original image relative to MEDIA_ROOT', max_length=500)),
+                ('variant', models.CharField(choices=[('thumbnail', 'Thumbnail'), ('card', 'Card'), ('hero', 'Hero')], max_length=20)),
+                ('format', models.CharField(choices=[('avif', 'AVIF'), ('webp', 'WebP'), ('jpeg', 'JPEG'), ('png', 'PNG')], max_length=10)),
+                ('file', models.CharField(help_text='Storage path of the derivative', max_length=500)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Image Derivative',
+                'verbose_name_plural': 'Image Derivatives',
+                'ordering': ['source', 'width'],
+                'constraints': [models.UniqueConstraint(fields=('source', 'variant', 'format'), name='unique_image_derivative')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multimedia', '0007_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagederivative',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
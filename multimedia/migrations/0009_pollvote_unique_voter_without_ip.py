@@ -0,0 +1,54 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:19
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_votes_without_ip(apps, schema_editor):
+    """
+    Drop repeat votes of voters without an IP address, which the old
+    constraint let through because NULLs never collide, and recompute the
+    counters of affected polls.
+    """
+    Poll = apps.get_model('multimedia', 'Poll')
+    PollOption = apps.get_model('multimedia', 'PollOption')
+    PollVote = apps.get_model('multimedia', 'PollVote')
+
+    duplicates = (
+        PollVote.objects.filter(single_vote=True, ip_address__isnull=True)
+        .values('poll', 'session_id')
+        .annotate(first_id=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    affected_polls = set()
+    for row in duplicates:
+        PollVote.objects.filter(
+            poll=row['poll'], ip_address__isnull=True, session_id=row['session_id'], single_vote=True,
+        ).exclude(id=row['first_id']).delete()
+        affected_polls.add(row['poll'])
+
+    for poll_id in affected_polls:
+        Poll.objects.filter(pk=poll_id).update(total_votes=PollVote.objects.filter(poll_id=poll_id).count())
+        for option in PollOption.objects.filter(poll_id=poll_id):
+            option.vote_count = PollVote.objects.filter(option=option).count()
+            option.save(update_fields=['vote_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multimedia', '0008_imagederivative_updated_at'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='pollvote',
+            name='unique_single_vote_per_voter',
+        ),
+        migrations.RunPython(remove_duplicate_votes_without_ip, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='pollvote',
+            constraint=models.UniqueConstraint(models.F('poll'), django.db.models.functions.comparison.Coalesce(django.db.models.functions.comparison.Cast('ip_address', models.TextField()), models.Value('')), models.F('session_id'), condition=models.Q(('single_vote', True)), name='unique_single_vote_per_voter'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Cast, Coalesce
 from django.utils import timezone
 import uuid
 
@@ -148,6 +149,11 @@ class Poll(models.Model):
     allow_multiple_votes = models.BooleanField(default=False, help_text="Allow users to vote multiple times")
     show_results_before_voting = models.BooleanField(default=False, help_text="Show results before user votes")
     featured = models.BooleanField(default=False, help_text="Feature this poll on the homepage")
+    total_votes = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Stored vote tally, updated with each vote (see reconcile_poll_votes)",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -159,10 +165,6 @@ class Poll(models.Model):
     def __str__(self):
         return self.title
 
-    @property
-    def total_votes(self):
-        return PollVote.objects.filter(poll=self).count()
-
     @property
     def is_active(self):
         if self.status != 'active':
@@ -180,7 +182,13 @@ class PollOption(models.Model):
     poll = models.ForeignKey(Poll, on_delete=models.CASCADE, related_name='options')
     text = models.CharField(max_length=500, help_text="Option text")
     order = models.IntegerField(default=0, help_text="Display order")
+    vote_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Stored vote tally, updated with each vote (see reconcile_poll_votes)",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order', 'created_at']
@@ -190,10 +198,6 @@ class PollOption(models.Model):
     def __str__(self):
         return f"{self.poll.title} - {self.text}"
 
-    @property
-    def vote_count(self):
-        return PollVote.objects.filter(poll=self.poll, option=self).count()
-
     @property
     def vote_percentage(self):
         total = self.poll.total_votes
@@ -208,12 +212,35 @@ class PollVote(models.Model):
     option = models.ForeignKey(PollOption, on_delete=models.CASCADE, related_name='votes')
     ip_address = models.GenericIPAddressField(null=True, blank=True, help_text="Voter's IP address")
     session_id = models.CharField(max_length=100, blank=True, help_text="Session identifier")
+    single_vote = models.BooleanField(
+        default=True,
+        help_text="Cast on a one-vote-per-voter poll (enforced by a unique constraint)",
+    )
+    buffer_token = models.CharField(
+        max_length=36,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Idempotency key of a vote written by the vote buffer",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Poll Vote'
         verbose_name_plural = 'Poll Votes'
+        constraints = [
+            # ip_address is NULL when the client IP is unknown and NULLs never collide in a
+            # unique index, so it is compared as text with NULL read as ''
+            models.UniqueConstraint(
+                'poll',
+                Coalesce(Cast('ip_address', models.TextField()), models.Value('')),
+                'session_id',
+                condition=models.Q(single_vote=True),
+                name='unique_single_vote_per_voter',
+            ),
+        ]
 
     def __str__(self):
         return f"Vote for {self.option.text} in {self.poll.title}"
@@ -279,6 +306,7 @@ class TriviaQuestion(models.Model):
     )
     order = models.PositiveIntegerField(default=0, help_text="Order within the trivia")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order', 'created_at']
@@ -296,6 +324,7 @@ class TriviaOption(models.Model):
     is_correct = models.BooleanField(default=False, help_text="Whether this is the correct answer")
     order = models.PositiveIntegerField(default=0, help_text="Display order")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order', 'created_at']
@@ -303,4 +332,40 @@ class TriviaOption(models.Model):
         verbose_name_plural = 'Trivia Options'
 
     def __str__(self):
-        return f"{self.question.question_text[:30]}... - {self.text}"
\ No newline at end of file
+        return f"{self.question.question_text[:30]}... - {self.text}"
+
+
+class ImageDerivative(models.Model):
+    """Resized, re-encoded copy of an uploaded image (see derivatives.py)"""
+    VARIANT_CHOICES = [
+        ('thumbnail', 'Thumbnail'),
+        ('card', 'Card'),
+        ('hero', 'Hero'),
+    ]
+    FORMAT_CHOICES = [
+        ('avif', 'AVIF'),
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG'),
+        ('png', 'PNG'),
+    ]
+
+    source = models.CharField(max_length=500, help_text="Storage path of the original image relative to MEDIA_ROOT")
+    variant = models.CharField(max_length=20, choices=VARIANT_CHOICES)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    file = models.CharField(max_length=500, help_text="Storage path of the derivative")
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+    # Read by the ETag validators of views showing images (conditional_models)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['source', 'width']
+        verbose_name = 'Image Derivative'
+        verbose_name_plural = 'Image Derivatives'
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'variant', 'format'], name='unique_image_derivative'),
+        ]
+
+    def __str__(self):
+        return f"{self.source} ({self.variant}, {self.format})"
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from main.utils import get_full_media_url
+from .derivatives import ImageVariantsField, ImageVariantsListSerializer
 from .models import (
     Podcast, Video, GalleryGroup, GalleryImage,
     Poll, PollOption, PollVote, XPollEmbed,
@@ -36,11 +37,13 @@ class VideoSerializer(serializers.ModelSerializer):
 class GalleryImageSerializer(serializers.ModelSerializer):
     """Serializer for GalleryImage model"""
     image = serializers.SerializerMethodField()
+    image_variants = ImageVariantsField(source='image')
 
     class Meta:
         model = GalleryImage
+        list_serializer_class = ImageVariantsListSerializer
         fields = [
-            'id', 'title', 'alt_text', 'image', 'caption', 'order',
+            'id', 'title', 'alt_text', 'image', 'image_variants', 'caption', 'order',
             'created_at', 'updated_at'
         ]
 
@@ -1,3 +1,378 @@
-from django.test import TestCase
+import fcntl
+import io
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from datetime import date
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+from resources.models import BlogPost
+from .models import Poll, PollOption, PollVote, ImageDerivative
+from . import derivatives, vote_buffer
+from .votes import DuplicateVote, record_vote, reconcile_vote_counts
+
+
+class PollVoteCounterTestCase(TestCase):
+    """Test cases for stored poll vote counters"""
+
+    def setUp(self):
+        self.poll = Poll.objects.create(title='Should budgets be published early?', status='active')
+        self.yes = PollOption.objects.create(poll=self.poll, text='Yes', order=1)
+        self.no = PollOption.objects.create(poll=self.poll, text='No', order=2)
+
+    def vote(self, option, session_id):
+        return self.client.post(f'/multimedia/polls/{self.poll.id}/vote/',
+                                {'option_id': option.id, 'session_id': session_id},
+                                content_type='application/json')
+
+    def test_vote_increments_counters(self):
+        self.assertEqual(self.vote(self.yes, 'a').status_code, 201)
+        self.assertEqual(self.vote(self.yes, 'b').status_code, 201)
+        self.assertEqual(self.vote(self.no, 'c').status_code, 201)
+        self.poll.refresh_from_db()
+        self.yes.refresh_from_db()
+        self.assertEqual((self.poll.total_votes, self.yes.vote_count), (3, 2))
+        self.assertEqual(self.yes.vote_percentage, 66.7)
+
+    def test_listing_runs_no_count_queries(self):
+        """Polls and their options are serialized from two queries"""
+        for i in range(5):
+            poll = Poll.objects.create(title=f'Poll {i}', status='active')
+            for j in range(4):
+                record_vote(poll, PollOption.objects.create(poll=poll, text=f'Option {j}'), session_id=str(j))
+        with self.assertNumQueries(4):  # validator, page count, polls, prefetched options
+            response = self.client.get('/multimedia/polls/')
+        results = response.json()['results']
+        self.assertEqual({poll['total_votes'] for poll in results if poll['title'].startswith('Poll ')}, {4})
+
+    def test_reconcile_rebuilds_drifted_counters(self):
+        record_vote(self.poll, self.yes, session_id='a')
+        record_vote(self.poll, self.no, session_id='b')
+        PollVote.objects.filter(option=self.no).delete()
+        Poll.objects.filter(pk=self.poll.pk).update(total_votes=10)
+
+        out = StringIO()
+        call_command('reconcile_poll_votes', stdout=out)
+        self.assertIn('Corrected vote counters on 1 polls', out.getvalue())
+        self.poll.refresh_from_db()
+        self.no.refresh_from_db()
+        self.assertEqual((self.poll.total_votes, self.no.vote_count), (1, 0))
+        self.assertEqual(reconcile_vote_counts(), 0)
+
+
+class PollVotingTestCase(TestCase):
+    """Test cases for the constraint-backed voting path"""
+
+    def setUp(self):
+        self.poll = Poll.objects.create(title='Is the budget on time?', status='active')
+        self.option = PollOption.objects.create(poll=self.poll, text='Yes')
+
+    def vote(self, poll_id=None, option_id=None, session_id='voter'):
+        return self.client.post(f'/multimedia/polls/{poll_id or self.poll.id}/vote/',
+                                {'option_id': option_id or self.option.id, 'session_id': session_id},
+                                content_type='application/json')
+
+    def test_second_vote_from_same_voter_is_rejected(self):
+        self.assertEqual(self.vote().status_code, 201)
+        response = self.vote()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'You have already voted on this poll.')
+        self.poll.refresh_from_db()
+        self.assertEqual(self.poll.total_votes, 1)
+
+    def test_unique_constraint_rejects_direct_duplicates(self):
+        record_vote(self.poll, self.option, ip_address='10.0.0.1', session_id='a')
+        with self.assertRaises(DuplicateVote):
+            record_vote(self.poll, self.option, ip_address='10.0.0.1', session_id='a')
+        self.assertEqual(PollVote.objects.count(), 1)
+
+    def test_unique_constraint_rejects_duplicates_without_ip(self):
+        record_vote(self.poll, self.option, session_id='a')
+        with self.assertRaises(DuplicateVote):
+            record_vote(self.poll, self.option, session_id='a')
+        record_vote(self.poll, self.option, session_id='b')
+        self.assertEqual(PollVote.objects.filter(ip_address__isnull=True).count(), 2)
+
+    def test_other_integrity_errors_are_not_duplicates(self):
+        with mock.patch.object(PollVote.objects, 'create', side_effect=IntegrityError('FOREIGN KEY constraint failed')):
+            with self.assertRaises(IntegrityError):
+                record_vote(self.poll, self.option, ip_address='10.0.0.1', session_id='a')
+
+    def test_multiple_vote_polls_accept_repeat_votes(self):
+        Poll.objects.filter(pk=self.poll.pk).update(allow_multiple_votes=True)
+        self.assertEqual(self.vote().status_code, 201)
+        self.assertEqual(self.vote().status_code, 201)
+        self.assertEqual(PollVote.objects.filter(single_vote=False).count(), 2)
+
+    def test_invalid_option_and_missing_poll(self):
+        other = Poll.objects.create(title='Other', status='active')
+        other_option = PollOption.objects.create(poll=other, text='No')
+        self.assertEqual(self.vote(option_id=other_option.id).status_code, 400)
+        self.assertEqual(self.vote(poll_id=999999).status_code, 404)
+
+    def test_inactive_poll_rejects_votes(self):
+        Poll.objects.filter(pk=self.poll.pk).update(status='closed')
+        self.assertEqual(self.vote().status_code, 400)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_poll_votes', votes=50, threads=1, duplicate_every=5, stdout=out)
+        self.assertIn('41 votes accepted, 9 duplicates rejected', out.getvalue())
+        self.assertFalse(Poll.objects.filter(category='benchmark').exists())
+
+    def test_benchmark_poll_is_removed_when_the_run_fails(self):
+        with mock.patch('multimedia.management.commands.benchmark_poll_votes.record_vote',
+                        side_effect=RuntimeError('interrupted')):
+            with self.assertRaises(RuntimeError):
+                call_command('benchmark_poll_votes', votes=5, threads=1, stdout=StringIO())
+        self.assertFalse(Poll.objects.filter(category='benchmark').exists())
+
+
+@override_settings(POLL_RESULTS_PUSH_INTERVAL=0.01)
+class LivePollResultsTestCase(TestCase):
+    """Test cases for pushed and conditional poll results"""
+
+    def setUp(self):
+        self.poll = Poll.objects.create(title='Should MPs declare assets?', status='active')
+        self.yes = PollOption.objects.create(poll=self.poll, text='Yes', order=1)
+        self.no = PollOption.objects.create(poll=self.poll, text='No', order=2)
+
+    def test_results_support_etag(self):
+        url = f'/multimedia/polls/{self.poll.id}/results/'
+        response = self.client.get(url)
+        self.assertEqual(response.json()['total_votes'], 0)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        record_vote(self.poll, self.yes, session_id='a')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['percentage'], 100.0)
+
+    async def read_event(self, stream):
+        event = await anext(stream)
+        event = event.decode() if isinstance(event, bytes) else event
+        name, data = event.strip().split('\n')
+        return name.split(': ', 1)[1], json.loads(data.split(': ', 1)[1])
+
+    async def test_stream_pushes_coalesced_deltas(self):
+        response = await self.async_client.get(f'/multimedia/polls/{self.poll.id}/results/stream/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        event, data = await self.read_event(stream)
+        self.assertEqual((event, data['total_votes']), ('results', 0))
+
+        # Votes landing between ticks arrive as one delta
+        await sync_to_async(record_vote)(self.poll, self.yes, session_id='a')
+        await sync_to_async(record_vote)(self.poll, self.yes, session_id='b')
+        await sync_to_async(record_vote)(self.poll, self.no, session_id='c')
+        data = {'total_votes': 0}
+        while data['total_votes'] < 3:
+            event, data = await self.read_event(stream)
+            self.assertEqual(event, 'delta')
+        self.assertEqual(data['percentages'][str(self.yes.id)], 66.7)
+        await stream.aclose()
+
+    async def test_stream_for_missing_poll_is_404(self):
+        response = await self.async_client.get('/multimedia/polls/999999/results/stream/')
+        self.assertEqual(response.status_code, 404)
+
+
+class VoteBufferTestCase(TestCase):
+    """Test cases for the write-behind vote buffer"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        config = {'enabled': True, 'directory': directory, 'max_votes': 100, 'interval_ms': 0}
+        override = override_settings(POLL_VOTE_BUFFER=config)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.directory = directory
+        self.poll = Poll.objects.create(title='Should votes be buffered?', status='active')
+        self.yes = PollOption.objects.create(poll=self.poll, text='Yes')
+        self.no = PollOption.objects.create(poll=self.poll, text='No')
+
+    def vote(self, option, session_id):
+        return self.client.post(f'/multimedia/polls/{self.poll.id}/vote/',
+                                {'option_id': option.id, 'session_id': session_id},
+                                content_type='application/json')
+
+    def test_votes_are_acknowledged_then_flushed_in_bulk(self):
+        first = self.vote(self.yes, 'a')
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(first.json()['total_votes'], 1)
+        self.assertEqual(self.vote(self.yes, 'b').json()['vote_count'], 2)
+        self.vote(self.no, 'c')
+        self.assertEqual(PollVote.objects.count(), 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(vote_buffer.flush(), 3)
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        # Counters move by the inserted votes, without recounting the poll's votes
+        self.assertFalse([query for query in queries.captured_queries if 'COUNT(' in query['sql']])
+        self.poll.refresh_from_db()
+        self.yes.refresh_from_db()
+        self.assertEqual((self.poll.total_votes, self.yes.vote_count), (3, 2))
+        self.assertEqual(self.vote(self.no, 'd').json()['total_votes'], 4)
+
+    def test_duplicates_are_rejected_before_and_after_flush(self):
+        self.assertEqual(self.vote(self.yes, 'a').status_code, 202)
+        self.assertEqual(self.vote(self.no, 'a').status_code, 400)
+        vote_buffer.flush()
+        self.assertEqual(self.vote(self.no, 'a').status_code, 400)
+        self.assertEqual(PollVote.objects.count(), 1)
+
+    def test_voters_stay_pending_while_another_flusher_holds_their_batch(self):
+        """Duplicates are still rejected while a batch locked by another process is unwritten"""
+        self.vote(self.yes, 'a')
+        # Another process rotated the journal and is flushing it
+        batch_path = os.path.join(self.directory, 'votes.1.1.flushing')
+        os.rename(os.path.join(self.directory, vote_buffer.JOURNAL_NAME), batch_path)
+        with open(batch_path) as batch:
+            fcntl.flock(batch, fcntl.LOCK_EX)
+            self.vote(self.no, 'b')
+            self.assertEqual(vote_buffer.flush(), 1)
+            self.assertEqual(self.vote(self.no, 'a').status_code, 400)
+        vote_buffer.flush()
+        self.poll.refresh_from_db()
+        self.assertEqual((PollVote.objects.count(), self.poll.total_votes), (2, 2))
+        self.assertEqual(self.vote(self.no, 'a').status_code, 400)
+
+    def test_replayed_batch_after_crash_is_not_double_counted(self):
+        """A batch whose flush was interrupted is written exactly once"""
+        Poll.objects.filter(pk=self.poll.pk).update(allow_multiple_votes=True)
+        self.poll.refresh_from_db()
+        self.vote(self.yes, 'a')
+        self.vote(self.yes, 'a')
+        journal = os.path.join(self.directory, vote_buffer.JOURNAL_NAME)
+        shutil.copy(journal, os.path.join(self.directory, 'copy'))
+        vote_buffer.flush()
+        # Simulate a crash after the insert but before the batch was removed
+        shutil.move(os.path.join(self.directory, 'copy'), os.path.join(self.directory, 'votes.1.1.flushing'))
+        call_command('flush_poll_votes', stdout=StringIO())
+        self.poll.refresh_from_db()
+        self.assertEqual((PollVote.objects.count(), self.poll.total_votes), (2, 2))
+        self.assertFalse([name for name in os.listdir(self.directory) if name.endswith('.flushing')])
+
+
+def upload(name, size, mode='RGB', format='JPEG', **save_options):
+    image = Image.new(mode, size, color=(200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30))
+    buffer = io.BytesIO()
+    image.save(buffer, format, **save_options)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{format.lower()}')
+
+
+@override_settings(
+    RESPONSE_CACHE_TTL=0,
+    IMAGE_DERIVATIVES={'widths': {'thumbnail': 320, 'card': 768, 'hero': 1600}, 'formats': ['webp', 'jpeg'],
+                       'workers': 0},
+)
+class ImageDerivativeTestCase(TestCase):
+    """Test responsive image derivatives and their srcset in API responses"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def create_post(self, title, image):
+        with self.captureOnCommitCallbacks(execute=True):
+            return BlogPost.objects.create(
+                title=title, date=date(2025, 9, 19), category="Policy", description="Test", image=image
+            )
+
+    def test_upload_generates_variants(self):
+        """Test saving an image renders each width in WebP and JPEG and lists them in the response"""
+        post = self.create_post("Budget Brief", upload('budget.jpg', (2400, 1200)))
+        rows = ImageDerivative.objects.filter(source=post.image.name)
+        self.assertEqual(
+            sorted(rows.values_list('variant', 'format', 'width', 'height')),
+            [('card', 'jpeg', 768, 384), ('card', 'webp', 768, 384),
+             ('hero', 'jpeg', 1600, 800), ('hero', 'webp', 1600, 800),
+             ('thumbnail', 'jpeg', 320, 160), ('thumbnail', 'webp', 320, 160)],
+        )
+        for row in rows:
+            self.assertTrue(default_storage.exists(row.file))
+        with default_storage.open(rows.get(variant='card', format='webp').file) as f:
+            self.assertEqual(Image.open(f).format, 'WEBP')
+
+        variants = self.client.get(f'/resources/blog/{post.pk}/').json()['image_variants']
+        self.assertEqual((variants['card']['width'], variants['card']['height']), (768, 384))
+        self.assertTrue(variants['card']['webp'].endswith('/card.webp'))
+        self.assertEqual(variants['srcset']['webp'].count('w, '), 2)
+        self.assertRegex(variants['srcset']['jpeg'], r'thumbnail\.jpg 320w, .*card\.jpg 768w, .*hero\.jpg 1600w$')
+
+    def test_small_transparent_image(self):
+        """Test originals are never enlarged and transparent images fall back to PNG"""
+        post = self.create_post("Logo", upload('logo.png', (200, 100), mode='RGBA', format='PNG'))
+        rows = ImageDerivative.objects.filter(source=post.image.name)
+        self.assertEqual(set(rows.values_list('format', flat=True)), {'webp', 'png'})
+        self.assertEqual(set(rows.values_list('width', 'height')), {(200, 100)})
+        variants = self.client.get(f'/resources/blog/{post.pk}/').json()['image_variants']
+        self.assertEqual(variants['types']['png'], 'image/png')
+        self.assertNotIn(',', variants['srcset']['png'])
+
+    def test_exif_orientation_is_applied(self):
+        """Test a photo stored sideways with an EXIF orientation is rendered upright"""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        post = self.create_post("Portrait", upload('portrait.jpg', (800, 400), exif=exif.tobytes()))
+        thumbnail = ImageDerivative.objects.get(source=post.image.name, variant='thumbnail', format='jpeg')
+        self.assertEqual((thumbnail.width, thumbnail.height), (320, 640))
+
+    def test_list_loads_derivatives_in_one_query(self):
+        """Test a list costs the same number of queries however many images it shows"""
+        self.create_post("Post 0", upload('post-0.jpg', (400, 300)))
+        with CaptureQueriesContext(connection) as one:
+            self.client.get('/resources/blog/')
+        for i in range(1, 4):
+            self.create_post(f"Post {i}", upload(f'post-{i}.jpg', (400, 300)))
+        with CaptureQueriesContext(connection) as four:
+            data = self.client.get('/resources/blog/').json()
+        self.assertEqual(len(four), len(one))
+        self.assertTrue(all(post['image_variants']['card']['width'] == 400 for post in data['results']))
+
+    def test_new_derivatives_change_etag_not_content(self):
+        """Test generating derivatives moves the ETag of responses showing the image, not the rows' updated_at"""
+        post = BlogPost.objects.create(
+            title="Imported", date=date(2025, 9, 19), category="Policy", description="Test",
+            image=upload('imported.jpg', (400, 300)),
+        )
+        etag = self.client.get(f'/resources/blog/{post.pk}/')['ETag']
+        call_command('generate_image_derivatives', '--threads', '1', stdout=StringIO())
+        response = self.client.get(f'/resources/blog/{post.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.json()['image_variants'])
+        self.assertEqual(BlogPost.objects.get(pk=post.pk).updated_at, post.updated_at)
+
+    def test_command_generates_missing_and_prunes(self):
+        """Test the command covers images saved without derivatives and drops unused ones"""
+        post = BlogPost.objects.create(
+            title="Imported", date=date(2025, 9, 19), category="Policy", description="Test",
+            image=upload('imported.jpg', (400, 300)),
+        )
+        self.assertFalse(ImageDerivative.objects.exists())
+        self.assertIsNone(self.client.get(f'/resources/blog/{post.pk}/').json()['image_variants'])
+
+        call_command('generate_image_derivatives', '--threads', '1', stdout=StringIO())
+        self.assertEqual(ImageDerivative.objects.filter(source=post.image.name).count(), 6)
+        files = list(ImageDerivative.objects.values_list('file', flat=True))
+
+        post.delete()
+        call_command('generate_image_derivatives', '--threads', '1', '--prune', stdout=StringIO())
+        self.assertFalse(ImageDerivative.objects.exists())
+        self.assertFalse(any(default_storage.exists(path) for path in files))
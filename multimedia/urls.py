@@ -2,7 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     PodcastViewSet, VideoViewSet, GalleryGroupViewSet, GalleryImageViewSet,
-    PollViewSet, XPollEmbedViewSet, TriviaViewSet,
+    PollViewSet, XPollEmbedViewSet, TriviaViewSet, poll_results_stream,
 )
 
 router = DefaultRouter()
@@ -15,5 +15,6 @@ router.register(r'x-poll-embeds', XPollEmbedViewSet, basename='xpollembed')
 router.register(r'trivia', TriviaViewSet, basename='trivia')
 
 urlpatterns = [
+    path('polls/<int:pk>/results/stream/', poll_results_stream, name='poll-results-stream'),
     path('', include(router.urls)),
 ]
@@ -1,13 +1,20 @@
+import asyncio
+
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.generics import get_object_or_404
 from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Now
+from main.caching import ConditionalGetMixin
 from .models import (
     Podcast, Video, GalleryGroup, GalleryImage,
-    Poll, PollOption, PollVote, XPollEmbed, Trivia, TriviaQuestion,
+    Poll, PollOption, XPollEmbed, Trivia, TriviaQuestion, TriviaOption, ImageDerivative,
 )
 from .serializers import (
     PodcastSerializer, VideoSerializer,
@@ -15,9 +22,14 @@ from .serializers import (
     PollSerializer, XPollEmbedSerializer,
     TriviaListSerializer, TriviaDetailSerializer,
 )
+from . import vote_buffer
+from .votes import DuplicateVote, record_vote
+from .live import format_sse, results_snapshot, subscribe, unsubscribe
+
+KEEPALIVE_SECONDS = 15
 
 
-class PodcastViewSet(viewsets.ModelViewSet):
+class PodcastViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for Podcast model with full CRUD operations"""
     queryset = Podcast.objects.all()
     serializer_class = PodcastSerializer
@@ -48,7 +60,7 @@ class PodcastViewSet(viewsets.ModelViewSet):
         return Response(list(categories))
 
 
-class VideoViewSet(viewsets.ModelViewSet):
+class VideoViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for Video model with full CRUD operations"""
     queryset = Video.objects.all()
     serializer_class = VideoSerializer
@@ -79,10 +91,11 @@ class VideoViewSet(viewsets.ModelViewSet):
         return Response(list(categories))
 
 
-class GalleryGroupViewSet(viewsets.ModelViewSet):
+class GalleryGroupViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for GalleryGroup model with full CRUD operations"""
     queryset = GalleryGroup.objects.all()
     serializer_class = GalleryGroupSerializer
+    conditional_models = [GalleryImage, ImageDerivative]
 
     @action(detail=False, methods=['get'])
     def featured(self, request):
@@ -111,10 +124,12 @@ class GalleryGroupViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class GalleryImageViewSet(viewsets.ModelViewSet):
+class GalleryImageViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for GalleryImage model with full CRUD operations"""
     queryset = GalleryImage.objects.all()
     serializer_class = GalleryImageSerializer
+    # `featured` follows the groups' featured flag; image variants follow their derivatives
+    conditional_models = [GalleryGroup, ImageDerivative]
 
     def get_queryset(self):
         """Filter images by gallery group if specified"""
@@ -139,8 +154,9 @@ class PollPagination(PageNumberPagination):
     max_page_size = 50
 
 
-class PollViewSet(viewsets.ModelViewSet):
-    queryset = Poll.objects.all().order_by('-featured', '-created_at')
+class PollViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    # Options carry stored vote counters, so one prefetch serves the whole page
+    queryset = Poll.objects.prefetch_related('options').order_by('-featured', '-created_at')
     serializer_class = PollSerializer
     pagination_class = PollPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -148,6 +164,18 @@ class PollViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'description', 'category']
     ordering_fields = ['created_at', 'start_date', 'end_date', 'title']
     ordering = ['-featured', '-created_at']
+    # Votes move the stored counters with F() updates, not updated_at, and
+    # is_active flips when a poll's window opens or closes without a save;
+    # results has its own ETag from the counters
+    conditional_counters = [
+        'total_votes',
+        Case(When(start_date__lte=Now(), then=Value(1)), default=Value(0), output_field=IntegerField()),
+        Case(When(end_date__lt=Now(), then=Value(1)), default=Value(0), output_field=IntegerField()),
+    ]
+    conditional_models = [PollOption]
+    conditional_exempt_actions = ['results']
+    # Counters change without signals, so responses are validated every time
+    cache_responses = False
 
     def dispatch(self, request, *args, **kwargs):
         if request.method == 'POST' and 'vote' in request.path:
@@ -156,12 +184,6 @@ class PollViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'], url_path='vote')
     def vote(self, request, pk=None):
-        poll = self.get_object()
-        if not poll.is_active:
-            return Response(
-                {'error': 'This poll is not currently active.'},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
         option_id = request.data.get('option_id')
         if option_id is None:
             return Response(
@@ -175,51 +197,51 @@ class PollViewSet(viewsets.ModelViewSet):
                 {'error': 'option_id must be a number.'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        # One query for the option and its poll; the poll itself is only
+        # looked up separately to tell a missing poll from a bad option
         try:
-            option = PollOption.objects.get(id=option_id, poll=poll)
-        except PollOption.DoesNotExist:
+            option = PollOption.objects.select_related('poll').get(id=option_id, poll_id=pk)
+        except (PollOption.DoesNotExist, ValueError):
+            get_object_or_404(Poll, pk=pk)
             return Response(
                 {'error': 'Invalid option selected.'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        poll = option.poll
+        if not poll.is_active:
+            return Response(
+                {'error': 'This poll is not currently active.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         ip_address = self._get_client_ip(request)
         session_id = (getattr(request.session, 'session_key', None) or '') or request.data.get('session_id', '')
-        if not poll.allow_multiple_votes:
-            existing = PollVote.objects.filter(
-                poll=poll, ip_address=ip_address, session_id=session_id,
-            ).first()
-            if existing:
-                return Response(
-                    {'error': 'You have already voted on this poll.'},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-        PollVote.objects.create(
-            poll=poll, option=option,
-            ip_address=ip_address or None,
-            session_id=session_id or '',
-        )
+        try:
+            if vote_buffer.is_enabled():
+                # Acknowledged once journaled; written to the database in batches
+                tally = vote_buffer.submit(poll, option, ip_address=ip_address, session_id=session_id)
+                return Response({'success': True, 'provisional': True, **tally}, status=status.HTTP_202_ACCEPTED)
+            record_vote(poll, option, ip_address=ip_address, session_id=session_id)
+        except DuplicateVote:
+            return Response(
+                {'error': 'You have already voted on this poll.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         return Response({'success': True}, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['get'], url_path='results')
     def results(self, request, pk=None):
-        poll = self.get_object()
-        options = PollOption.objects.filter(poll=poll).order_by('order', 'created_at')
-        total_votes = poll.total_votes
-        results_list = [
-            {
-                'option_id': opt.id,
-                'text': opt.text,
-                'vote_count': opt.vote_count,
-                'percentage': opt.vote_percentage,
-            }
-            for opt in options
-        ]
-        return Response({
-            'poll_id': poll.id,
-            'poll_title': poll.title,
-            'total_votes': total_votes,
-            'results': results_list,
-        })
+        """Current results, with an ETag so unchanged results cost a 304"""
+        try:
+            snapshot = results_snapshot(pk)
+        except ValueError:
+            snapshot = None
+        if snapshot is None:
+            raise Http404
+        etag = snapshot.pop('etag')
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(snapshot, headers=headers)
 
     def _get_client_ip(self, request):
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -228,17 +250,51 @@ class PollViewSet(viewsets.ModelViewSet):
         return request.META.get('REMOTE_ADDR')
 
 
-class XPollEmbedViewSet(viewsets.ReadOnlyModelViewSet):
+class XPollEmbedViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = XPollEmbed.objects.all()
     serializer_class = XPollEmbedSerializer
     pagination_class = None
 
 
-class TriviaViewSet(viewsets.ReadOnlyModelViewSet):
+class TriviaViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Trivia.objects.filter(is_active=True).order_by('order', '-created_at')
     pagination_class = None
+    conditional_models = [TriviaQuestion, TriviaOption]
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return TriviaDetailSerializer
-        return TriviaListSerializer
\ No newline at end of file
+        return TriviaListSerializer
+
+
+@require_GET
+async def poll_results_stream(request, pk):
+    """
+    Push live poll results as server-sent events.
+
+    Sends a `results` event with the full results, then a `delta` event
+    (total, changed option counts and all percentages) at most once per
+    POLL_RESULTS_PUSH_INTERVAL when votes land.
+    """
+    queue, snapshot = await subscribe(pk)
+    if snapshot is None:
+        return JsonResponse({'error': 'Poll not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    async def event_stream():
+        try:
+            yield format_sse('results', snapshot)
+            while True:
+                try:
+                    delta = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse('delta', delta)
+        finally:
+            unsubscribe(pk, queue)
+
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
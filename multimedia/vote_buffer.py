@@ -0,0 +1,288 @@
+"""
+Optional write-behind buffer for poll votes (POLL_VOTE_BUFFER['enabled']).
+
+Accepted votes are appended to a journal file and fsynced before the voter
+gets a provisional tally, so an acknowledged vote survives a crash. A
+background thread in each process (or the `flush_poll_votes` command)
+rotates the journal and writes its votes with one bulk_create:
+
+- the journal is renamed under an exclusive file lock, so appends from any
+  thread or process land either in the batch being flushed or in the next;
+- each vote carries a unique buffer_token and the insert ignores conflicts,
+  so replaying a batch after a crash mid-flush never double counts;
+- duplicate voters are rejected at submit time (pending votes of this
+  process plus a lookup of flushed votes) and, across processes, by the
+  unique_single_vote_per_voter constraint during the flush;
+- counters are incremented with F() for the rows a batch actually
+  inserted (found by buffer_token), so a flush costs the same however many
+  votes a poll already has;
+- this process forgets its pending voters only once no batch is left on
+  disk, so a batch another flusher still holds keeps rejecting duplicates.
+"""
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from .models import Poll, PollOption, PollVote
+from main.caching import bump_version
+from .votes import DuplicateVote
+
+JOURNAL_NAME = 'votes.jsonl'
+LOCK_NAME = 'votes.lock'
+BATCH_PATTERN = 'votes.*.flushing'
+# Tokens per IN (...) lookup, below SQLite's bound parameter limit
+TOKEN_CHUNK = 500
+
+_state_lock = threading.Lock()
+# Votes this process acknowledged but has not flushed yet
+_pending_voters = set()
+_pending_counts = Counter()
+_flusher = None
+_wakeup = threading.Event()
+
+
+def get_config():
+    config = {
+        'enabled': False,
+        'directory': os.path.join(settings.BASE_DIR, 'var', 'poll-votes'),
+        'max_votes': 200,
+        'interval_ms': 250,
+    }
+    config.update(getattr(settings, 'POLL_VOTE_BUFFER', {}))
+    return config
+
+
+def is_enabled():
+    return bool(get_config()['enabled'])
+
+
+def _directory():
+    directory = str(get_config()['directory'])
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+class _JournalLock:
+    """Exclusive lock shared by appenders and the journal rotation"""
+
+    def __enter__(self):
+        self.file = open(os.path.join(_directory(), LOCK_NAME), 'a')
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+        return False
+
+
+def _append(entry):
+    """Durably append one vote to the journal"""
+    line = (json.dumps(entry) + '\n').encode()
+    with _JournalLock():
+        fd = os.open(os.path.join(_directory(), JOURNAL_NAME), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def submit(poll, option, ip_address=None, session_id=''):
+    """
+    Accept a vote into the buffer and return a provisional tally.
+    Raises DuplicateVote if the voter already voted on a one-vote poll.
+    """
+    ip_address = ip_address or None
+    session_id = session_id or ''
+    voter = (poll.pk, ip_address, session_id)
+    single_vote = not poll.allow_multiple_votes
+
+    if single_vote and PollVote.objects.filter(
+        poll=poll, ip_address=ip_address, session_id=session_id, single_vote=True
+    ).exists():
+        raise DuplicateVote(poll.pk)
+
+    with _state_lock:
+        if single_vote and voter in _pending_voters:
+            raise DuplicateVote(poll.pk)
+        _append({
+            'token': str(uuid.uuid4()),
+            'poll': poll.pk,
+            'option': option.pk,
+            'ip_address': ip_address,
+            'session_id': session_id,
+            'single_vote': single_vote,
+        })
+        if single_vote:
+            _pending_voters.add(voter)
+        _pending_counts[poll.pk] += 1
+        _pending_counts[(poll.pk, option.pk)] += 1
+        pending_total = _pending_counts[poll.pk]
+        pending_option = _pending_counts[(poll.pk, option.pk)]
+        buffered = sum(count for key, count in _pending_counts.items() if not isinstance(key, tuple))
+
+    _ensure_flusher()
+    if buffered >= get_config()['max_votes']:
+        _wakeup.set()
+    return {
+        'total_votes': poll.total_votes + pending_total,
+        'vote_count': option.vote_count + pending_option,
+    }
+
+
+def _rotate():
+    """
+    Move the live journal aside as a batch.
+    Returns the pending voters and counts of this process, all of which are
+    now in batch files (this one, or earlier ones rotated by any process).
+    """
+    journal = os.path.join(_directory(), JOURNAL_NAME)
+    # Same lock order as submit(): process state, then the journal
+    with _state_lock, _JournalLock():
+        if os.path.exists(journal) and os.path.getsize(journal):
+            os.rename(journal, os.path.join(_directory(), f'votes.{time.time_ns()}.{os.getpid()}.flushing'))
+        return set(_pending_voters), Counter(_pending_counts)
+
+
+def _read_batch(path):
+    entries = []
+    with open(path) as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # Torn final line of a write that was never acknowledged
+                continue
+    return entries
+
+
+def _flush_batch(path):
+    """Write one batch file unless another flusher holds it; returns votes written"""
+    try:
+        batch = open(path)
+    except FileNotFoundError:
+        return 0
+    with batch:
+        try:
+            fcntl.flock(batch, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return 0
+        if not os.path.exists(path):
+            # Finished by another flusher before we got the lock
+            return 0
+        written = _write_votes(_read_batch(path))
+        os.remove(path)
+    return written
+
+
+def _write_votes(entries):
+    option_ids = set(
+        PollOption.objects.filter(pk__in={entry['option'] for entry in entries}).values_list('pk', flat=True)
+    )
+    votes = [
+        PollVote(
+            poll_id=entry['poll'],
+            option_id=entry['option'],
+            ip_address=entry['ip_address'],
+            session_id=entry['session_id'],
+            single_vote=entry['single_vote'],
+            buffer_token=entry['token'],
+        )
+        for entry in entries
+        if entry['option'] in option_ids
+    ]
+    with transaction.atomic():
+        # A batch replayed after a crash may already be stored in part
+        stored = set(_by_tokens([vote.buffer_token for vote in votes], 'buffer_token'))
+        new_tokens = [vote.buffer_token for vote in votes if vote.buffer_token not in stored]
+        PollVote.objects.bulk_create(
+            [vote for vote in votes if vote.buffer_token not in stored], batch_size=500, ignore_conflicts=True
+        )
+        # ignore_conflicts drops duplicate voters silently; count what landed
+        inserted = _by_tokens(new_tokens, 'poll_id', 'option_id')
+        _add_to_counters(inserted)
+    return len(inserted)
+
+
+def _by_tokens(tokens, *fields):
+    """Values of `fields` for the stored votes with these buffer tokens"""
+    rows = []
+    for offset in range(0, len(tokens), TOKEN_CHUNK):
+        votes = PollVote.objects.filter(buffer_token__in=tokens[offset:offset + TOKEN_CHUNK])
+        rows.extend(votes.values_list(*fields, flat=len(fields) == 1))
+    return rows
+
+
+def _add_to_counters(inserted):
+    """Increment the counters by the inserted (poll, option) votes, one UPDATE per model and increment"""
+    if not inserted:
+        return
+    for model, counts, field in (
+        (Poll, Counter(poll for poll, _ in inserted), 'total_votes'),
+        (PollOption, Counter(option for _, option in inserted), 'vote_count'),
+    ):
+        by_increment = defaultdict(list)
+        for pk, count in counts.items():
+            by_increment[count].append(pk)
+        for count, pks in by_increment.items():
+            model.objects.filter(pk__in=sorted(pks)).update(**{field: F(field) + count})
+    # Counter updates and bulk-inserted votes send no signals
+    transaction.on_commit(lambda: bump_version(PollVote))
+
+
+def flush():
+    """
+    Write buffered votes to the database.
+    Batches left behind by a crashed flush are replayed first. Returns the
+    number of votes written (conflicting duplicates are dropped).
+    """
+    voters, counts = _rotate()
+    written = 0
+    for path in sorted(glob.glob(os.path.join(_directory(), BATCH_PATTERN))):
+        written += _flush_batch(path)
+    # A batch skipped because another flusher holds it may contain votes of
+    # this process; they stay pending until that flush finishes
+    if not glob.glob(os.path.join(_directory(), BATCH_PATTERN)):
+        # Those votes are now stored, where the duplicate lookup and the
+        # counters see them
+        with _state_lock:
+            _pending_voters.difference_update(voters)
+            _pending_counts.subtract(counts)
+            for key in [key for key, count in _pending_counts.items() if count <= 0]:
+                del _pending_counts[key]
+    return written
+
+
+def _run_flusher(interval):
+    while True:
+        _wakeup.wait(interval)
+        _wakeup.clear()
+        try:
+            flush()
+        except Exception as e:
+            # The batch stays on disk and is retried on the next tick
+            print(f"Error flushing poll votes: {str(e)}")
+        finally:
+            close_old_connections()
+
+
+def _ensure_flusher():
+    """Start this process's background flusher on the first buffered vote"""
+    global _flusher
+    interval = get_config()['interval_ms'] / 1000
+    if interval <= 0 or (_flusher is not None and _flusher.is_alive()):
+        return
+    with _state_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_run_flusher, args=(interval,), name='poll-vote-flusher', daemon=True)
+            _flusher.start()
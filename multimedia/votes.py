@@ -0,0 +1,81 @@
+"""
+Stored vote tallies for polls.
+
+Poll.total_votes and PollOption.vote_count are counters incremented with
+F() expressions in the same transaction that records a PollVote, so reading
+results never counts PollVote rows. Duplicate votes are rejected by a
+partial unique index on (poll, ip_address, session_id), with a missing IP
+address compared as ''. reconcile_vote_counts() rebuilds the
+counters from PollVote if they ever drift (e.g. after votes are deleted).
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from main.caching import bump_version
+from .models import Poll, PollOption, PollVote
+
+
+class DuplicateVote(Exception):
+    """The voter has already voted on a one-vote-per-voter poll"""
+
+
+def record_vote(poll, option, ip_address=None, session_id=''):
+    """
+    Store a vote and increment the option and poll counters atomically.
+
+    One-vote-per-voter is enforced by the unique_single_vote_per_voter
+    constraint rather than a prior lookup, so concurrent duplicate votes
+    cannot both succeed; the loser raises DuplicateVote. Other integrity
+    errors (e.g. an option deleted meanwhile) are raised as they are.
+    """
+    voter = {
+        'poll': poll,
+        'ip_address': ip_address or None,
+        'session_id': session_id or '',
+        'single_vote': not poll.allow_multiple_votes,
+    }
+    try:
+        with transaction.atomic():
+            vote = PollVote.objects.create(option=option, **voter)
+            PollOption.objects.filter(pk=option.pk).update(vote_count=F('vote_count') + 1)
+            Poll.objects.filter(pk=poll.pk).update(total_votes=F('total_votes') + 1)
+    except IntegrityError:
+        # Only a stored vote by the same voter makes this a duplicate
+        if voter['single_vote'] and PollVote.objects.filter(**voter).exists():
+            raise DuplicateVote(poll.pk)
+        raise
+    return vote
+
+
+def _vote_count_subquery(field):
+    """Number of PollVote rows whose `field` points at the outer row"""
+    votes = PollVote.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+    return Coalesce(Subquery(votes.annotate(total=Count('pk')).values('total')), Value(0))
+
+
+def reconcile_vote_counts(polls=None):
+    """
+    Rebuild stored counters from PollVote.
+    Returns the number of polls whose counters were out of date.
+    """
+    polls = Poll.objects.all() if polls is None else polls
+    options = PollOption.objects.filter(poll__in=polls)
+
+    with transaction.atomic():
+        drifted_polls = set(
+            polls.order_by().annotate(actual=_vote_count_subquery('poll'))
+            .filter(~Q(total_votes=F('actual')))
+            .values_list('pk', flat=True)
+        )
+        drifted_polls.update(
+            options.order_by().annotate(actual=_vote_count_subquery('option'))
+            .filter(~Q(vote_count=F('actual')))
+            .values_list('poll_id', flat=True)
+        )
+        if drifted_polls:
+            PollOption.objects.filter(poll__in=drifted_polls).update(vote_count=_vote_count_subquery('option'))
+            Poll.objects.filter(pk__in=drifted_polls).update(total_votes=_vote_count_subquery('poll'))
+            # Counter updates and bulk-inserted votes send no signals
+            transaction.on_commit(lambda: bump_version(PollVote))
+    return len(drifted_polls)
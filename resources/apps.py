@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ResourcesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'resources'
+
+    def ready(self):
+        from main.caching import track_model_versions
+        from .models import ViewEvent, ViewBucket
+        # A view-count increment would otherwise drop the cached blog and news
+        # responses on every page view; no endpoint reads the analytics rows,
+        # and without receivers their bulk deletes skip loading each row
+        track_model_versions(self, ignore_fields=['views_count'], exclude=[ViewEvent, ViewBucket])
+        from . import signals  # noqa: F401
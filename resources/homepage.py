@@ -0,0 +1,147 @@
+"""
+Precomputed homepage snapshot.
+
+Everything the homepage shows (featured resources, active hero slides and
+the featured poll) is kept as one pre-rendered JSON document in the cache,
+so serving it is a single cache lookup that returns bytes.
+
+The document is assembled from per-section fragments. Each fragment records
+the content versions (see main.caching) of the models it was rendered from;
+when a model changes, only the sections that read it are re-rendered and the
+document is reassembled from the rest. Sections are refreshed right after an
+admin edit commits (see signals.py) and, as a fallback, whenever a read
+finds them stale: votes, for instance, only bump PollVote's version and the
+poll section is re-rendered on the next homepage read. View counts are
+written without bumping versions, so sections showing them expire after
+RESPONSE_CACHE_TTL like other cached responses.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from home.models import HeroSlide
+from home.serializers import HeroSlideSerializer
+from main.caching import get_cache, get_versions, version_key
+from multimedia.models import Poll, PollOption, PollVote
+from multimedia.serializers import PollSerializer
+from .models import BlogPost, NewsArticle, Publication, Event
+from .serializers import BlogPostSerializer, NewsArticleSerializer, PublicationSerializer, EventSerializer
+from .view_counts import has_counter
+
+SNAPSHOT_KEY = 'homepage:snapshot'
+FEATURED_LIMIT = 3
+
+
+def featured(model, serializer_class):
+    def build():
+        data = serializer_class(model.objects.filter(featured=True)[:FEATURED_LIMIT], many=True).data
+        # Flushed views move views_count without a version bump
+        ttl = getattr(settings, 'RESPONSE_CACHE_TTL', 300) if has_counter(model) else None
+        return data, (timezone.now().timestamp() + ttl if ttl is not None else None)
+    return build
+
+
+def build_hero_slides():
+    slides = HeroSlide.objects.filter(is_active=True).order_by('order')
+    return HeroSlideSerializer(slides, many=True).data, None
+
+
+def build_featured_poll():
+    """
+    The newest featured poll that is open now. Opening and closing depend on
+    the clock, so the section expires at the next start or end date.
+    """
+    now = timezone.now()
+    polls = Poll.objects.filter(featured=True, status='active')
+    poll = (
+        polls.filter(Q(start_date__isnull=True) | Q(start_date__lte=now), Q(end_date__isnull=True) | Q(end_date__gte=now))
+        .prefetch_related('options').order_by('-created_at').first()
+    )
+    boundaries = [
+        moment for dates in polls.values_list('start_date', 'end_date')
+        for moment in dates if moment and moment > now
+    ]
+    expires = min(boundaries).timestamp() if boundaries else None
+    return (PollSerializer(poll).data if poll else None), expires
+
+
+# (name, models the section reads, builder returning (data, expiry timestamp or None))
+SECTIONS = [
+    ('featured_blog_posts', [BlogPost], featured(BlogPost, BlogPostSerializer)),
+    ('featured_news_articles', [NewsArticle], featured(NewsArticle, NewsArticleSerializer)),
+    ('featured_publications', [Publication], featured(Publication, PublicationSerializer)),
+    ('featured_events', [Event], featured(Event, EventSerializer)),
+    ('hero_slides', [HeroSlide], build_hero_slides),
+    ('featured_poll', [Poll, PollOption, PollVote], build_featured_poll),
+]
+MODELS = list(dict.fromkeys(model for _, models, _ in SECTIONS for model in models))
+
+
+def _is_stale(section, models, versions, now):
+    if section is None:
+        return True
+    if section['expires'] is not None and section['expires'] <= now:
+        return True
+    return section['versions'] != [versions[version_key(model)] for model in models]
+
+
+def _assemble(sections):
+    body = b','.join(
+        json.dumps(name).encode() + b':' + sections[name]['content'] for name, _, _ in SECTIONS
+    )
+    content = b'{' + body + b'}'
+    return {
+        'content': content,
+        'etag': '"' + hashlib.md5(content).hexdigest() + '"',
+        'sections': sections,
+    }
+
+
+def refresh_snapshot(snapshot=None, versions=None):
+    """
+    Re-render the sections whose models changed and store the document.
+    Returns the (possibly unchanged) snapshot.
+    """
+    if snapshot is None:
+        snapshot = get_cache().get(SNAPSHOT_KEY)
+    if versions is None:
+        versions = dict(zip((version_key(model) for model in MODELS), get_versions(MODELS)))
+    sections = dict(snapshot['sections']) if snapshot else {}
+    now = timezone.now().timestamp()
+    renderer = JSONRenderer()
+    rebuilt = False
+    for name, models, build in SECTIONS:
+        if not _is_stale(sections.get(name), models, versions, now):
+            continue
+        # Versions are read before the rows, so a change made while this
+        # section renders leaves it stale rather than lost
+        section_versions = [versions[version_key(model)] for model in models]
+        data, expires = build()
+        # JSONRenderer renders None as b'', which would leave the document invalid
+        content = renderer.render(data) if data is not None else b'null'
+        sections[name] = {'content': content, 'versions': section_versions, 'expires': expires}
+        rebuilt = True
+    if not rebuilt and snapshot:
+        return snapshot
+    snapshot = _assemble(sections)
+    get_cache().set(SNAPSHOT_KEY, snapshot, timeout=None)
+    return snapshot
+
+
+def get_snapshot():
+    """Return the current snapshot; one cache round trip when nothing changed"""
+    keys = [SNAPSHOT_KEY] + [version_key(model) for model in MODELS]
+    found = get_cache().get_many(keys)
+    snapshot = found.pop(SNAPSHOT_KEY, None)
+    if len(found) < len(MODELS):
+        found = dict(zip((version_key(model) for model in MODELS), get_versions(MODELS)))
+    now = timezone.now().timestamp()
+    if snapshot is None or any(
+        _is_stale(snapshot['sections'].get(name), models, found, now) for name, models, _ in SECTIONS
+    ):
+        snapshot = refresh_snapshot(snapshot, found)
+    return snapshot
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from resources import trending
+
+
+class Command(BaseCommand):
+    help = ('Roll view events up into hourly and daily buckets and refresh the trending ranking '
+            '(once, or every --every seconds)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=int, default=0,
+                            help='Keep running, compacting every this many seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            compacted = trending.compact()
+            self.stdout.write(self.style.SUCCESS(f'✓ Compacted {compacted} view events and refreshed trending'))
+            if options['every'] <= 0:
+                return
+            close_old_connections()
+            time.sleep(options['every'])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from resources import view_counts
+
+
+class Command(BaseCommand):
+    help = 'Write buffered blog and news view counts (including batches left by exited processes) to the database'
+
+    def handle(self, *args, **options):
+        written = view_counts.flush()
+        self.stdout.write(self.style.SUCCESS(f'✓ Flushed {written} buffered views'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from resources.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = ('Rewrite the search documents of all blog posts, news articles, publications and events, '
+            'e.g. after content was imported without signals')
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'✓ Indexed {indexed} items for search'))
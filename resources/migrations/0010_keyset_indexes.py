@@ -0,0 +1,29 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0009_alter_blogcomment_created_at_alter_event_slug_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['created_at', 'id'], name='resources_b_created_a1de93_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['created_at', 'id'], name='resources_e_created_f92bdf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newsarticle',
+            index=models.Index(fields=['created_at', 'id'], name='resources_n_created_5ef9cf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publication',
+            index=models.Index(fields=['created_at', 'id'], name='resources_p_created_191feb_idx'),
+        ),
+    ]
@@ -0,0 +1,119 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:47
+
+import html
+import re
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+TABLE = 'resources_searchdocument'
+FTS_TABLE = 'resources_searchdocument_fts'
+
+POSTGRESQL_INDEX = [
+    f"""
+    ALTER TABLE {TABLE} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(body, '')), 'B')
+    ) STORED
+    """,
+    f'CREATE INDEX resources_searchdocument_vector_idx ON {TABLE} USING GIN (search_vector)',
+]
+SQLITE_INDEX = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, body, content='{TABLE}', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {TABLE}_au AFTER UPDATE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+
+
+def create_search_index(apps, schema_editor):
+    """tsvector + GIN index on PostgreSQL, an FTS5 table on SQLite"""
+    statements = {'postgresql': POSTGRESQL_INDEX, 'sqlite': SQLITE_INDEX}.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(f'ALTER TABLE {TABLE} DROP COLUMN search_vector')
+    elif vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {TABLE}_{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def plain_text(value):
+    if not value:
+        return ''
+    text = html.unescape(strip_tags(str(value).replace('<', ' <')))
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def index_existing_content(apps, schema_editor):
+    """Write search documents for existing content, as resources.search.index_object does"""
+    SearchDocument = apps.get_model('resources', 'SearchDocument')
+    indexed = {
+        'BlogPost': ('blog', ['description', 'content', 'category']),
+        'NewsArticle': ('news', ['description', 'content', 'category']),
+        'Publication': ('publication', ['description', 'category', 'type']),
+        'Event': ('event', ['description', 'location', 'category']),
+    }
+    for model_name, (kind, fields) in indexed.items():
+        model = apps.get_model('resources', model_name)
+        SearchDocument.objects.bulk_create([
+            SearchDocument(
+                kind=kind,
+                object_id=str(instance.pk),
+                slug=getattr(instance, 'slug', '') or '',
+                title=plain_text(instance.title),
+                body=' '.join(filter(None, (plain_text(getattr(instance, field)) for field in fields))),
+            )
+            for instance in model.objects.iterator()
+        ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0010_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('blog', 'Blog Post'), ('news', 'News Article'), ('publication', 'Publication'), ('event', 'Event')], max_length=20)),
+                ('object_id', models.CharField(max_length=255)),
+                ('slug', models.CharField(blank=True, max_length=500)),
+                ('title', models.TextField()),
+                ('body', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(index_existing_content, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0011_searchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ViewEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('blog', 'Blog Post'), ('news', 'News Article'), ('publication', 'Publication'), ('event', 'Event')], max_length=20)),
+                ('object_id', models.CharField(max_length=255)),
+                ('occurred_at', models.DateTimeField()),
+                ('views', models.PositiveIntegerField()),
+            ],
+            options={
+                'verbose_name': 'View Event',
+                'verbose_name_plural': 'View Events',
+            },
+        ),
+        migrations.CreateModel(
+            name='ViewBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('blog', 'Blog Post'), ('news', 'News Article'), ('publication', 'Publication'), ('event', 'Event')], max_length=20)),
+                ('object_id', models.CharField(max_length=255)),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=10)),
+                ('start', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'View Bucket',
+                'verbose_name_plural': 'View Buckets',
+                'constraints': [models.UniqueConstraint(fields=('granularity', 'start', 'kind', 'object_id'), name='unique_view_bucket')],
+            },
+        ),
+    ]
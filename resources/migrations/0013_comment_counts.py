@@ -0,0 +1,47 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:55
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_existing_comments(apps, schema_editor):
+    """Set comment_count of existing posts and articles from their comments"""
+    for model_name, comment_model_name, field in [
+        ('BlogPost', 'BlogComment', 'post'),
+        ('NewsArticle', 'NewsComment', 'article'),
+    ]:
+        model = apps.get_model('resources', model_name)
+        comments = apps.get_model('resources', comment_model_name).objects.filter(
+            **{field: OuterRef('pk')}
+        ).order_by().values(field).annotate(total=Count('pk')).values('total')
+        model.objects.update(comment_count=Coalesce(Subquery(comments[:1]), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0012_view_analytics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Maintained as comments are added and deleted'),
+        ),
+        migrations.AddField(
+            model_name='newsarticle',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Maintained as comments are added and deleted'),
+        ),
+        migrations.AddIndex(
+            model_name='blogcomment',
+            index=models.Index(fields=['post', 'created_at', 'id'], name='resources_b_post_id_fb65a0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newscomment',
+            index=models.Index(fields=['article', 'created_at', 'id'], name='resources_n_article_361207_idx'),
+        ),
+        migrations.RunPython(count_existing_comments, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,8 @@
 from django.db import models
 from django.utils import timezone
-from django.utils.text import slugify
 from django.core.validators import URLValidator
 from ckeditor.fields import RichTextField
+from main.slugs import UniqueSlugMixin
 import uuid
 import os
 
@@ -36,7 +36,7 @@ def upload_to_publication_images(instance, filename):
     """Generate upload path for publication images"""
     return os.path.join('publications', 'images', filename)
 
-class BlogPost(models.Model):
+class BlogPost(UniqueSlugMixin, models.Model):
     """Model for blog posts and analysis articles"""
     id = models.CharField(max_length=255, primary_key=True, default=generate_uuid)
     title = models.TextField()
@@ -48,6 +48,7 @@ class BlogPost(models.Model):
     featured = models.BooleanField(default=False)
     content = RichTextField(blank=True, null=True)
     views_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0, editable=False, help_text="Maintained as comments are added and deleted")
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -55,12 +56,15 @@ class BlogPost(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Blog Post'
         verbose_name_plural = 'Blog Posts'
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return self.title
 
 
-class NewsArticle(models.Model):
+class NewsArticle(UniqueSlugMixin, models.Model):
     """Model for news articles and updates"""
     id = models.CharField(max_length=255, primary_key=True, default=generate_uuid)
     title = models.TextField()
@@ -72,6 +76,7 @@ class NewsArticle(models.Model):
     featured = models.BooleanField(default=False)
     content = RichTextField(blank=True, null=True)
     views_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0, editable=False, help_text="Maintained as comments are added and deleted")
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -79,6 +84,9 @@ class NewsArticle(models.Model):
         ordering = ['-created_at']
         verbose_name = 'News Article'
         verbose_name_plural = 'News Articles'
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return self.title
@@ -97,6 +105,9 @@ class BlogComment(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Blog Comment'
         verbose_name_plural = 'Blog Comments'
+        indexes = [
+            models.Index(fields=['post', 'created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author_name} on {self.post.title}"
@@ -115,6 +126,9 @@ class NewsComment(models.Model):
         ordering = ['-created_at']
         verbose_name = 'News Comment'
         verbose_name_plural = 'News Comments'
+        indexes = [
+            models.Index(fields=['article', 'created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author_name} on {self.article.title}"
@@ -146,12 +160,15 @@ class Publication(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Publication'
         verbose_name_plural = 'Publications'
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return self.title
 
 
-class Event(models.Model):
+class Event(UniqueSlugMixin, models.Model):
     """Model for events, conferences, workshops, and meetings"""
     EVENT_STATUS = [
         ('upcoming', 'Upcoming'),
@@ -182,26 +199,86 @@ class Event(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Event'
         verbose_name_plural = 'Events'
-
-    def _get_unique_slug(self, base_slug):
-        """Generate a unique slug; append number if base_slug is taken."""
-        slug = base_slug[:500]
-        queryset = Event.objects.filter(slug=slug).exclude(pk=self.pk)
-        if not queryset.exists():
-            return slug
-        for i in range(1, 10000):
-            candidate = f"{base_slug[:495]}-{i}" if len(base_slug) > 495 else f"{base_slug}-{i}"
-            if not Event.objects.filter(slug=candidate).exclude(pk=self.pk).exists():
-                return candidate
-        return f"{base_slug[:490]}-{uuid.uuid4().hex[:8]}"
-
-    def save(self, *args, **kwargs):
-        if not self.slug and self.title:
-            base_slug = slugify(self.title)
-            if not base_slug:
-                base_slug = f"event-{self.id or uuid.uuid4().hex[:8]}"
-            self.slug = self._get_unique_slug(base_slug)
-        super().save(*args, **kwargs)
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return self.title
+
+
+CONTENT_KINDS = [
+    ('blog', 'Blog Post'),
+    ('news', 'News Article'),
+    ('publication', 'Publication'),
+    ('event', 'Event'),
+]
+
+
+class SearchDocument(models.Model):
+    """
+    HTML-stripped text of a blog post, news article, publication or event.
+    Kept in sync on save and indexed by the database for full-text search
+    (see search.py).
+    """
+    KINDS = CONTENT_KINDS
+
+    kind = models.CharField(max_length=20, choices=KINDS)
+    object_id = models.CharField(max_length=255)
+    slug = models.CharField(max_length=500, blank=True)
+    title = models.TextField()
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Search Document'
+        verbose_name_plural = 'Search Documents'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}: {self.title}"
+
+
+class ViewEvent(models.Model):
+    """
+    Append-only stream of counted views: one row per item for each flush of
+    a process's view counter (see view_counts.py), rolled up into
+    ViewBucket by `compact_view_events` (see trending.py)
+    """
+    kind = models.CharField(max_length=20, choices=CONTENT_KINDS)
+    object_id = models.CharField(max_length=255)
+    occurred_at = models.DateTimeField()
+    views = models.PositiveIntegerField()
+
+    class Meta:
+        verbose_name = 'View Event'
+        verbose_name_plural = 'View Events'
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.views} at {self.occurred_at}"
+
+
+class ViewBucket(models.Model):
+    """Views of one item during one hour or day"""
+    GRANULARITIES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=CONTENT_KINDS)
+    object_id = models.CharField(max_length=255)
+    granularity = models.CharField(max_length=10, choices=GRANULARITIES)
+    start = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'View Bucket'
+        verbose_name_plural = 'View Buckets'
+        constraints = [
+            models.UniqueConstraint(fields=['granularity', 'start', 'kind', 'object_id'], name='unique_view_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.views} in {self.granularity} from {self.start}"
@@ -0,0 +1,234 @@
+"""
+Full-text search over blog posts, news articles, publications and events.
+
+Every item has a SearchDocument holding its title and an HTML-stripped body
+(description, rich text content and the other fields listed in INDEXED),
+rewritten whenever the item is saved (see signals.py). The database indexes
+those documents itself, so a search never scans the content tables:
+
+- PostgreSQL: a stored tsvector column generated from the title (weight A)
+  and body (weight B) with a GIN index; queries use websearch_to_tsquery,
+  ts_rank_cd and ts_headline;
+- SQLite: an external-content FTS5 table kept current by triggers, ranked
+  with bm25() and excerpted with snippet().
+
+Both are created by migration 0011_searchdocument. `rebuild_search_index`
+rewrites every document, e.g. after a bulk import that bypassed signals.
+"""
+import html
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, When
+from django.utils.html import strip_tags
+from rest_framework.filters import BaseFilterBackend
+
+from .models import BlogPost, NewsArticle, Publication, Event, SearchDocument
+
+# Model -> (kind, fields folded into the document body after the title)
+INDEXED = {
+    BlogPost: ('blog', ['description', 'content', 'category']),
+    NewsArticle: ('news', ['description', 'content', 'category']),
+    Publication: ('publication', ['description', 'category', 'type']),
+    Event: ('event', ['description', 'location', 'category']),
+}
+KINDS = [kind for kind, _ in INDEXED.values()]
+
+TEXT_SEARCH_CONFIG = 'english'
+FTS_TABLE = 'resources_searchdocument_fts'
+# Highlight markers: control characters never found in the stripped text,
+# swapped for <mark> once the snippet has been HTML-escaped
+START_MARK, STOP_MARK = '\x02', '\x03'
+SNIPPET_WORDS = 30
+
+WHITESPACE_RE = re.compile(r'\s+')
+TERM_RE = re.compile(r'\w+')
+
+
+def plain_text(value):
+    """Reduce rich text HTML to plain, single-spaced text"""
+    if not value:
+        return ''
+    # Tags become spaces, so words in adjacent blocks stay apart
+    text = html.unescape(strip_tags(str(value).replace('<', ' <')))
+    text = text.replace(START_MARK, ' ').replace(STOP_MARK, ' ')
+    return WHITESPACE_RE.sub(' ', text).strip()
+
+
+def index_object(instance):
+    """Write the search document of a blog post, news article, publication or event"""
+    kind, fields = INDEXED[type(instance)]
+    SearchDocument.objects.update_or_create(
+        kind=kind,
+        object_id=str(instance.pk),
+        defaults={
+            'slug': getattr(instance, 'slug', '') or '',
+            'title': plain_text(instance.title),
+            'body': ' '.join(filter(None, (plain_text(getattr(instance, field)) for field in fields))),
+        },
+    )
+
+
+def unindex_object(instance):
+    kind, _ = INDEXED[type(instance)]
+    SearchDocument.objects.filter(kind=kind, object_id=str(instance.pk)).delete()
+
+
+def rebuild_index():
+    """Rewrite every search document and drop orphans; returns the number indexed"""
+    indexed = 0
+    for model, (kind, _) in INDEXED.items():
+        ids = []
+        for instance in model.objects.iterator():
+            index_object(instance)
+            ids.append(str(instance.pk))
+        SearchDocument.objects.filter(kind=kind).exclude(object_id__in=ids).delete()
+        indexed += len(ids)
+    return indexed
+
+
+def format_snippet(snippet):
+    """HTML-escape a snippet and turn the highlight markers into <mark> tags"""
+    escaped = html.escape(snippet or '')
+    return escaped.replace(START_MARK, '<mark>').replace(STOP_MARK, '</mark>')
+
+
+def _kind_clause(kinds, column):
+    if not kinds:
+        return '', []
+    return f' AND {column} IN ({", ".join(["%s"] * len(kinds))})', list(kinds)
+
+
+def _search_postgresql(query, kinds, limit, snippets):
+    table = SearchDocument._meta.db_table
+    kind_sql, kind_params = _kind_clause(kinds, 'd.kind')
+    headline = "''"
+    params = []
+    if snippets:
+        headline = 'ts_headline(%s::regconfig, hits.body, hits.query, %s)'
+        params = [
+            TEXT_SEARCH_CONFIG,
+            f'StartSel="{START_MARK}", StopSel="{STOP_MARK}", MaxWords={SNIPPET_WORDS}, MinWords=10, '
+            f'MaxFragments=2, FragmentDelimiter=" … "',
+        ]
+    # Headlines are costly, so they are only built for the page of hits
+    sql = f"""
+        SELECT hits.kind, hits.object_id, hits.slug, hits.title, hits.rank, {headline}
+        FROM (
+            SELECT d.kind, d.object_id, d.slug, d.title, d.body, q.query,
+                   ts_rank_cd(d.search_vector, q.query) AS rank
+            FROM {table} d, websearch_to_tsquery(%s::regconfig, %s) AS q(query)
+            WHERE d.search_vector @@ q.query{kind_sql}
+            ORDER BY rank DESC, d.id
+            LIMIT %s
+        ) hits
+        ORDER BY hits.rank DESC, hits.kind, hits.object_id
+    """
+    params += [TEXT_SEARCH_CONFIG, query] + kind_params + [limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _fts5_query(query):
+    """Quote each term so user input cannot use FTS5 query syntax; terms are ANDed"""
+    return ' '.join('"' + term + '"' for term in TERM_RE.findall(query))
+
+
+def _search_sqlite(query, kinds, limit, snippets):
+    match = _fts5_query(query)
+    if not match:
+        return []
+    table = SearchDocument._meta.db_table
+    kind_sql, kind_params = _kind_clause(kinds, 'd.kind')
+    snippet = f"snippet({FTS_TABLE}, 1, %s, %s, ' … ', %s)" if snippets else "''"
+    sql = f"""
+        SELECT d.kind, d.object_id, d.slug, d.title, -bm25({FTS_TABLE}, 10.0, 1.0) AS rank, {snippet}
+        FROM {FTS_TABLE} JOIN {table} d ON d.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s{kind_sql}
+        ORDER BY rank DESC, d.id
+        LIMIT %s
+    """
+    params = ([START_MARK, STOP_MARK, SNIPPET_WORDS] if snippets else []) + [match] + kind_params + [limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _search_fallback(query, kinds, limit, snippets):
+    """Unranked substring match for databases without a full-text index here"""
+    terms = TERM_RE.findall(query)
+    if not terms:
+        return []
+    documents = SearchDocument.objects.all()
+    if kinds:
+        documents = documents.filter(kind__in=kinds)
+    for term in terms:
+        documents = documents.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    return [
+        (document.kind, document.object_id, document.slug, document.title, 0.0,
+         document.body[:SNIPPET_WORDS * 8] if snippets else '')
+        for document in documents.order_by('-updated_at')[:limit]
+    ]
+
+
+def _search(query, kinds, limit, snippets):
+    backend = {
+        'postgresql': _search_postgresql,
+        'sqlite': _search_sqlite,
+    }.get(connection.vendor, _search_fallback)
+    return backend(query, kinds, limit, snippets)
+
+
+def search(query, kinds=None, limit=20):
+    """
+    Return the best matches for a user query, most relevant first, as dicts
+    with kind, id, slug, title, rank and an HTML snippet whose matched terms
+    are wrapped in <mark>.
+    """
+    query = (query or '').strip()
+    if not query:
+        return []
+    return [
+        {
+            'kind': kind,
+            'id': object_id,
+            'slug': slug or None,
+            'title': title,
+            'rank': float(rank),
+            'snippet': format_snippet(snippet),
+        }
+        for kind, object_id, slug, title, rank, snippet in _search(query, kinds, limit, snippets=True)
+    ]
+
+
+def matching_ids(query, kind, limit=None):
+    """IDs of the items of one kind matching a query, most relevant first"""
+    limit = limit or getattr(settings, 'SEARCH_MAX_MATCHES', 1000)
+    return [row[1] for row in _search(query, [kind], limit, snippets=False)]
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    `?search=` through the search index for viewsets with a `search_kind`.
+    Results are ordered by relevance unless `?ordering=` is given, so this
+    backend goes after OrderingFilter.
+    """
+    search_param = 'search'
+    ordering_param = 'ordering'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        ids = matching_ids(query, view.search_kind)
+        if not ids:
+            return queryset.none()
+        queryset = queryset.filter(pk__in=ids)
+        if request.query_params.get(self.ordering_param):
+            return queryset
+        return queryset.order_by(Case(
+            *[When(pk=pk, then=position) for position, pk in enumerate(ids)],
+            output_field=IntegerField(),
+        ))
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from multimedia.derivatives import ImageVariantsField, ImageVariantsListSerializer
 from .models import BlogPost, NewsArticle, Publication, Event, BlogComment, NewsComment
 
 
@@ -22,39 +23,45 @@ class NewsCommentSerializer(serializers.ModelSerializer):
 
 class BlogPostSerializer(serializers.ModelSerializer):
     """Serializer for BlogPost model"""
+    image_variants = ImageVariantsField(source='image')
 
     class Meta:
         model = BlogPost
+        list_serializer_class = ImageVariantsListSerializer
         fields = [
             'id', 'title', 'date', 'category', 'description',
-            'image', 'slug', 'featured', 'content', 'views_count',
-            'created_at', 'updated_at'
+            'image', 'image_variants', 'slug', 'featured', 'content', 'views_count',
+            'comment_count', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'views_count']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'views_count', 'comment_count']
 
 
 class NewsArticleSerializer(serializers.ModelSerializer):
     """Serializer for NewsArticle model"""
+    image_variants = ImageVariantsField(source='image')
 
     class Meta:
         model = NewsArticle
+        list_serializer_class = ImageVariantsListSerializer
         fields = [
             'id', 'title', 'date', 'category', 'description',
-            'image', 'slug', 'featured', 'content', 'views_count',
-            'created_at', 'updated_at'
+            'image', 'image_variants', 'slug', 'featured', 'content', 'views_count',
+            'comment_count', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'views_count']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'views_count', 'comment_count']
 
 
 class PublicationSerializer(serializers.ModelSerializer):
     """Serializer for Publication model"""
     image_url = serializers.SerializerMethodField()
+    image_variants = ImageVariantsField(source='image')
 
     class Meta:
         model = Publication
+        list_serializer_class = ImageVariantsListSerializer
         fields = [
             'id', 'title', 'type', 'date', 'description', 'category',
-            'url', 'pdf', 'image', 'image_url', 'featured', 'created_at', 'updated_at'
+            'url', 'pdf', 'image', 'image_url', 'image_variants', 'featured', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
@@ -70,12 +77,14 @@ class PublicationSerializer(serializers.ModelSerializer):
 
 class EventSerializer(serializers.ModelSerializer):
     """Serializer for Event model"""
-    
+    image_variants = ImageVariantsField(source='image')
+
     class Meta:
         model = Event
+        list_serializer_class = ImageVariantsListSerializer
         fields = [
             'id', 'title', 'date', 'time', 'location', 'category', 
-            'description', 'image', 'slug', 'featured', 'status', 
+            'description', 'image', 'image_variants', 'slug', 'featured', 'status', 
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
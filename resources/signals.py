@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save, post_delete
+
+from home.models import HeroSlide
+from main.caching import bump_version
+from multimedia.models import Poll, PollOption
+from .homepage import refresh_snapshot
+from .search import INDEXED, index_object, unindex_object
+from .models import BlogPost, NewsArticle, Publication, Event, BlogComment, NewsComment
+
+# PollVote is left to the read path: re-rendering the poll section on every
+# vote would put the snapshot on the voting hot path
+HOMEPAGE_MODELS = [BlogPost, NewsArticle, Publication, Event, HeroSlide, Poll, PollOption]
+
+
+def refresh_homepage_snapshot(sender, **kwargs):
+    """Re-render the homepage sections that read the changed model once it commits"""
+    transaction.on_commit(refresh_snapshot)
+
+
+for model in HOMEPAGE_MODELS:
+    uid = f'homepage:{model._meta.label_lower}'
+    post_save.connect(refresh_homepage_snapshot, sender=model, dispatch_uid=uid)
+    post_delete.connect(refresh_homepage_snapshot, sender=model, dispatch_uid=uid)
+
+
+def update_search_document(sender, instance, update_fields=None, **kwargs):
+    """Rewrite the search document of a saved item, unless only unindexed fields changed"""
+    _, fields = INDEXED[sender]
+    if update_fields and not set(update_fields) & {'title', 'slug', *fields}:
+        return
+    index_object(instance)
+
+
+def remove_search_document(sender, instance, **kwargs):
+    unindex_object(instance)
+
+
+for model in INDEXED:
+    uid = f'search:{model._meta.label_lower}'
+    post_save.connect(update_search_document, sender=model, dispatch_uid=uid)
+    post_delete.connect(remove_search_document, sender=model, dispatch_uid=uid)
+
+
+# Comment model -> its foreign key to the post whose comment_count it moves
+COMMENT_PARENTS = {BlogComment: 'post', NewsComment: 'article'}
+
+
+def adjust_comment_count(comment, delta):
+    """
+    Move the parent's comment_count in the same transaction as the comment
+    (admin saves and deletes are atomic, as are the comments endpoint's)
+    """
+    field = COMMENT_PARENTS[type(comment)]
+    parent_model = comment._meta.get_field(field).related_model
+    # updated_at is left alone: comment_count is one of the viewsets'
+    # conditional_counters, so ETags change without a new "last modified"
+    parent_model.objects.filter(pk=getattr(comment, f'{field}_id')).update(
+        comment_count=Greatest(F('comment_count') + delta, 0)
+    )
+    # update() sends no signals, so retire cached responses here
+    bump_version(parent_model)
+    transaction.on_commit(lambda: bump_version(parent_model))
+
+
+def count_added_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_comment_count(instance, 1)
+
+
+def count_deleted_comment(sender, instance, **kwargs):
+    adjust_comment_count(instance, -1)
+
+
+for model in COMMENT_PARENTS:
+    uid = f'comment-count:{model._meta.label_lower}'
+    post_save.connect(count_added_comment, sender=model, dispatch_uid=uid)
+    post_delete.connect(count_deleted_comment, sender=model, dispatch_uid=uid)
@@ -1,11 +1,33 @@
-from django.test import TestCase
+import json
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.conf import settings
+import fcntl
 import os
+import shutil
 import tempfile
-from datetime import date, time
+from datetime import date, time, timedelta
+from django.utils import timezone
 from PIL import Image
-from .models import BlogPost, NewsArticle, Event, Publication
+from . import trending, view_counts
+from .models import (
+    BlogPost, NewsArticle, Event, Publication, SearchDocument, ViewEvent, ViewBucket, BlogComment, NewsComment
+)
+
+
+def use_view_counter(test_case):
+    """Point the view counter at a temporary directory, flushed only when the test says so"""
+    directory = tempfile.mkdtemp()
+    test_case.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+    override = override_settings(VIEW_COUNTER={'directory': directory, 'interval_ms': 0})
+    override.enable()
+    test_case.addCleanup(override.disable)
+    return directory
 
 
 class ImageUploadTestCase(TestCase):
@@ -167,3 +189,606 @@ class ImageUploadTestCase(TestCase):
                 if hasattr(obj, 'pdf') and obj.pdf:
                     if os.path.exists(obj.pdf.path):
                         os.remove(obj.pdf.path)
+
+
+@override_settings(RESPONSE_CACHE_TTL=0)
+class ConditionalGetTestCase(TestCase):
+    """Test ETag validation and cache headers on the content APIs"""
+
+    def setUp(self):
+        use_view_counter(self)
+        self.post = BlogPost.objects.create(
+            title="Cached Post",
+            date=date(2025, 9, 19),
+            category="Policy",
+            description="Test description",
+            slug="cached-post"
+        )
+
+    def test_list_is_not_modified_until_content_changes(self):
+        """Test a matching ETag gets an empty 304 until a post is edited"""
+        response = self.client.get('/resources/blog/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('s-maxage', response['Cache-Control'])
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/resources/blog/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+        self.post.title = "Edited Post"
+        self.post.save()
+        response = self.client.get('/resources/blog/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_deletion_and_counters_change_the_etag(self):
+        """Test deletions and view counts, which leave updated_at alone, invalidate"""
+        BlogPost.objects.create(
+            title="Second Post", date=date(2025, 9, 20), category="Policy",
+            description="Test description", slug="second-post"
+        )
+        etag = self.client.get('/resources/blog/')['ETag']
+        self.client.post(f'/resources/blog/{self.post.pk}/increment-view/')
+        view_counts.flush()
+        response = self.client.get('/resources/blog/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        BlogPost.objects.filter(slug="second-post").delete()
+        response = self.client.get('/resources/blog/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_filters_and_detail_have_their_own_validators(self):
+        """Test filtered lists and single objects validate only their own rows"""
+        other = self.client.get('/resources/blog/?category=Other')['ETag']
+        detail = self.client.get(f'/resources/blog/{self.post.pk}/')['ETag']
+
+        self.post.description = "Changed"
+        self.post.save()
+        response = self.client.get('/resources/blog/?category=Other', HTTP_IF_NONE_MATCH=other)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(f'/resources/blog/{self.post.pk}/', HTTP_IF_NONE_MATCH=detail)
+        self.assertEqual(response.status_code, 200)
+        # views_count can change without updated_at, so no Last-Modified
+        self.assertNotIn('Last-Modified', response)
+
+    def test_single_object_sends_last_modified(self):
+        """Test If-Modified-Since works where updated_at alone is a sound validator"""
+        event = Event.objects.create(
+            title="Forum", date=date(2025, 10, 1), time=time(10, 0), category="Forum",
+            description="Test", location="Freetown", slug="forum"
+        )
+        response = self.client.get(f'/resources/events/{event.pk}/')
+        response = self.client.get(
+            f'/resources/events/{event.pk}/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_nested_models_invalidate_aggregate_views(self):
+        """Test the homepage changes when any featured resource does"""
+        etag = self.client.get('/resources/homepage/latest/')['ETag']
+        self.assertEqual(self.client.get('/resources/homepage/latest/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Event.objects.create(
+            title="New Event", date=date(2025, 10, 1), category="Forum", description="Test",
+            time=time(10, 0), location="Freetown", slug="new-event", featured=True
+        )
+        self.assertEqual(self.client.get('/resources/homepage/latest/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ResponseCacheTestCase(TestCase):
+    """Test the versioned response cache of the content APIs"""
+
+    def setUp(self):
+        use_view_counter(self)
+        self.post = BlogPost.objects.create(
+            title="Cached Post",
+            date=date(2025, 9, 19),
+            category="Policy",
+            description="Test description",
+            slug="cached-post",
+            featured=True
+        )
+
+    def test_repeat_requests_skip_the_database(self):
+        """Test a cached response is served without queries and still validates"""
+        first = self.client.get('/resources/blog/')
+        with self.assertNumQueries(0):
+            second = self.client.get('/resources/blog/')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        with self.assertNumQueries(0):
+            response = self.client.get('/resources/blog/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_edits_invalidate_only_dependent_endpoints(self):
+        """Test a BlogPost edit refreshes blog and homepage keys but not publications"""
+        for url in ('/resources/blog/', '/resources/homepage/latest/', '/resources/publications/'):
+            self.client.get(url)
+
+        self.post.title = "Renamed Post"
+        self.post.save()
+        self.assertContains(self.client.get('/resources/blog/'), "Renamed Post")
+        self.assertContains(self.client.get('/resources/homepage/latest/'), "Renamed Post")
+        with self.assertNumQueries(0):
+            self.client.get('/resources/publications/')
+
+    def test_deletes_invalidate(self):
+        """Test deleting a post retires the cached list"""
+        self.client.get('/resources/blog/')
+        self.post.delete()
+        self.assertEqual(self.client.get('/resources/blog/').json()['count'], 0)
+
+    def test_view_counts_do_not_invalidate(self):
+        """Test view-count increments leave cached responses in place"""
+        self.client.get('/resources/blog/')
+        self.client.post(f'/resources/blog/{self.post.pk}/increment-view/')
+        view_counts.flush()
+        with self.assertNumQueries(0):
+            self.client.get('/resources/blog/')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class HomepageSnapshotTestCase(TestCase):
+    """Test the precomputed homepage snapshot"""
+
+    def setUp(self):
+        from multimedia.models import Poll, PollOption
+        BlogPost.objects.create(
+            title="Featured Post", date=date(2025, 9, 19), category="Policy",
+            description="Test description", slug="featured-post", featured=True
+        )
+        self.poll = Poll.objects.create(title="Featured Poll", status='active', featured=True)
+        self.option = PollOption.objects.create(poll=self.poll, text="Yes")
+
+    def test_snapshot_is_served_without_queries(self):
+        """Test every section is present and a warm snapshot needs no database"""
+        first = self.client.get('/resources/homepage/latest/')
+        data = first.json()
+        self.assertEqual(
+            list(data),
+            ['featured_blog_posts', 'featured_news_articles', 'featured_publications',
+             'featured_events', 'hero_slides', 'featured_poll']
+        )
+        self.assertEqual(data['featured_poll']['title'], "Featured Poll")
+        with self.assertNumQueries(0):
+            second = self.client.get('/resources/homepage/latest/')
+        self.assertEqual(second.content, first.content)
+        with self.assertNumQueries(0):
+            response = self.client.get('/resources/homepage/latest/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_only_changed_sections_are_rebuilt(self):
+        """Test an event edit re-renders the events section alone"""
+        self.client.get('/resources/homepage/latest/')
+        Event.objects.create(
+            title="Featured Event", date=date(2025, 10, 1), time=time(10, 0), category="Forum",
+            description="Test", location="Freetown", slug="featured-event", featured=True
+        )
+        with self.assertNumQueries(1):
+            data = self.client.get('/resources/homepage/latest/').json()
+        self.assertEqual(data['featured_events'][0]['title'], "Featured Event")
+
+    def test_homepage_without_open_poll(self):
+        """Test the document stays valid JSON when no featured poll is open"""
+        self.poll.delete()
+        response = self.client.get('/resources/homepage/latest/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(json.loads(response.content)['featured_poll'])
+
+    def test_flushed_views_show_up_after_the_cache_ttl(self):
+        """Test featured sections with view counts expire although flushes bump no version"""
+        post = BlogPost.objects.get(slug="featured-post")
+        self.client.get('/resources/homepage/latest/')
+        BlogPost.objects.filter(pk=post.pk).update(views_count=5)
+        data = self.client.get('/resources/homepage/latest/').json()
+        self.assertEqual(data['featured_blog_posts'][0]['views_count'], 0)
+        later = timezone.now() + timedelta(seconds=settings.RESPONSE_CACHE_TTL + 1)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            data = self.client.get('/resources/homepage/latest/').json()
+        self.assertEqual(data['featured_blog_posts'][0]['views_count'], 5)
+
+    def test_votes_refresh_the_poll(self):
+        """Test a vote shows up in the featured poll"""
+        self.client.get('/resources/homepage/latest/')
+        self.client.post(f'/multimedia/polls/{self.poll.pk}/vote/', {'option_id': self.option.pk}, content_type='application/json')
+        data = self.client.get('/resources/homepage/latest/').json()
+        self.assertEqual(data['featured_poll']['total_votes'], 1)
+
+
+@override_settings(RESPONSE_CACHE_TTL=0)
+class KeysetPaginationTestCase(TestCase):
+    """Test opt-in cursor pagination of the content list endpoints"""
+
+    def setUp(self):
+        created_at = timezone.now()
+        # Five posts share a timestamp, so pages must break ties on id
+        for i in range(7):
+            BlogPost.objects.create(
+                title=f"Post {i}",
+                date=date(2025, 9, 19),
+                category="Policy",
+                description="Test description",
+                slug=f"post-{i}",
+                created_at=created_at - timedelta(minutes=i // 5),
+            )
+
+    def test_cursor_pages_cover_every_post_once(self):
+        """Test following next links returns all posts in (created_at, id) order without counting"""
+        expected = list(BlogPost.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        url = '/resources/blog/?cursor=&page_size=3'
+        seen = []
+        while url:
+            with self.assertNumQueries(2):
+                data = self.client.get(url).json()
+            self.assertNotIn('count', data)
+            seen.extend(post['id'] for post in data['results'])
+            url = data['next']
+        self.assertEqual(seen, expected)
+
+    def test_count_is_opt_in(self):
+        """Test ?count=exact adds the number of matching posts"""
+        data = self.client.get('/resources/blog/?cursor=&count=exact').json()
+        self.assertEqual(data['count'], 7)
+        self.assertEqual(len(data['results']), 7)
+        self.assertIsNone(data['next'])
+
+    def test_page_numbers_stay_the_default(self):
+        """Test requests without a cursor keep page-number responses"""
+        data = self.client.get('/resources/blog/?page_size=3').json()
+        self.assertEqual(data['count'], 7)
+        self.assertIn('previous', data)
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor gets a 404"""
+        response = self.client.get('/resources/blog/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(RESPONSE_CACHE_TTL=0)
+class FullTextSearchTestCase(TestCase):
+    """Test the search index behind /resources/search/ and ?search="""
+
+    def setUp(self):
+        self.water = BlogPost.objects.create(
+            title="Water policy in Sierra Leone",
+            date=date(2025, 9, 19),
+            category="Policy",
+            description="How communities manage water",
+            content="<p>Clean <strong>water</strong> access &amp; sanitation</p><p>rural districts</p>",
+            slug="water-policy",
+        )
+        self.energy = BlogPost.objects.create(
+            title="Energy transition",
+            date=date(2025, 9, 19),
+            category="Policy",
+            description="Solar mini-grids and water pumps",
+            content="<p>Grid expansion</p>",
+            slug="energy-transition",
+        )
+        self.event = Event.objects.create(
+            title="Water forum", date=date(2025, 10, 1), time=time(10, 0), category="Forum",
+            description="Annual forum", location="Freetown", slug="water-forum",
+        )
+
+    def test_documents_are_html_stripped_and_kept_in_sync(self):
+        """Test saving and deleting an item rewrites its search document"""
+        document = SearchDocument.objects.get(kind='blog', object_id=self.water.pk)
+        self.assertIn('Clean water access & sanitation rural districts', document.body)
+        self.assertNotIn('<', document.body)
+
+        self.water.title = "Groundwater policy"
+        self.water.save()
+        document.refresh_from_db()
+        self.assertEqual(document.title, "Groundwater policy")
+
+        self.water.delete()
+        self.assertFalse(SearchDocument.objects.filter(kind='blog', object_id=self.water.pk).exists())
+
+    def test_results_are_ranked_with_snippets(self):
+        """Test title matches rank first and snippets highlight matched terms"""
+        data = self.client.get('/resources/search/?q=water').json()
+        self.assertEqual(
+            {result['id'] for result in data['results'][:2]}, {self.water.pk, self.event.pk}
+        )
+        self.assertEqual(data['results'][-1]['id'], self.energy.pk)
+        water = next(result for result in data['results'] if result['id'] == self.water.pk)
+        self.assertIn('<mark>water</mark>', water['snippet'])
+        self.assertEqual(water['slug'], 'water-policy')
+
+        data = self.client.get('/resources/search/?q=water&type=event').json()
+        self.assertEqual([result['id'] for result in data['results']], [self.event.pk])
+        response = self.client.get('/resources/search/?q=water&type=podcast')
+        self.assertEqual(response.status_code, 400)
+
+    def test_query_syntax_is_not_interpreted(self):
+        """Test operators and quotes in user input are searched as plain terms"""
+        response = self.client.get('/resources/search/', {'q': 'water" OR NEAR(* -'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/resources/search/?q=').json()['results'], [])
+
+    def test_list_search_uses_the_index(self):
+        """Test ?search= on a list endpoint returns matches in relevance order"""
+        data = self.client.get('/resources/blog/?search=water').json()
+        self.assertEqual([post['id'] for post in data['results']], [self.water.pk, self.energy.pk])
+        data = self.client.get('/resources/blog/?search=sanitation').json()
+        self.assertEqual([post['id'] for post in data['results']], [self.water.pk])
+        data = self.client.get('/resources/blog/?search=nothingmatches').json()
+        self.assertEqual(data['results'], [])
+
+
+class ViewCounterTestCase(TestCase):
+    """Test the write-behind view counter"""
+
+    def setUp(self):
+        self.directory = use_view_counter(self)
+        self.post = BlogPost.objects.create(
+            title="Trending Post", date=date(2025, 9, 19), category="Policy",
+            description="Test description", slug="trending-post", views_count=5
+        )
+        self.article = NewsArticle.objects.create(
+            title="Trending Article", date=date(2025, 9, 19), category="Policy",
+            description="Test description", slug="trending-article"
+        )
+
+    def test_views_are_estimated_then_written_in_batches(self):
+        """Test repeat views skip the database and a flush adds them with batched updates"""
+        response = self.client.post(f'/resources/blog/{self.post.pk}/increment-view/')
+        self.assertEqual(response.json(), {'views_count': 6})
+        with self.assertNumQueries(0):
+            response = self.client.post(f'/resources/blog/{self.post.pk}/increment-view/')
+        self.assertEqual(response.json(), {'views_count': 7})
+        self.client.post(f'/resources/news/{self.article.pk}/increment-view/')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views_count, 5)
+
+        # One UPDATE per model and the view events inside a savepoint, plus
+        # reading the counts back
+        with self.assertNumQueries(7):
+            self.assertEqual(view_counts.flush(), 3)
+        self.post.refresh_from_db()
+        self.article.refresh_from_db()
+        self.assertEqual((self.post.views_count, self.article.views_count), (7, 1))
+        with self.assertNumQueries(0):
+            response = self.client.post(f'/resources/blog/{self.post.pk}/increment-view/')
+        self.assertEqual(response.json(), {'views_count': 8})
+
+    def test_batches_left_on_disk_are_flushed_by_the_command(self):
+        """Test views spilled by another process are written by flush_view_counts"""
+        self.client.post(f'/resources/blog/{self.post.pk}/increment-view/')
+        view_counts._spill()
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+        call_command('flush_view_counts', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views_count, 6)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_estimate_keeps_views_in_a_batch_another_flusher_holds(self):
+        """Test spilled views stay in the estimate until their batch has been written"""
+        self.client.post(f'/resources/blog/{self.post.pk}/increment-view/')
+        view_counts._spill()
+        [name] = os.listdir(self.directory)
+        with open(os.path.join(self.directory, name)) as batch:
+            # Another process is applying this batch
+            fcntl.flock(batch, fcntl.LOCK_EX)
+            self.assertEqual(view_counts.flush(), 0)
+            response = self.client.post(f'/resources/blog/{self.post.pk}/increment-view/')
+            self.assertEqual(response.json(), {'views_count': 7})
+        self.assertEqual(view_counts.flush(), 2)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views_count, 7)
+        response = self.client.post(f'/resources/blog/{self.post.pk}/increment-view/')
+        self.assertEqual(response.json(), {'views_count': 8})
+        view_counts.flush()
+
+    def test_missing_item(self):
+        """Test counting a view of an unknown post gets a 404"""
+        response = self.client.post('/resources/blog/missing/increment-view/')
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TrendingTestCase(TestCase):
+    """Test view analytics buckets and the trending ranking"""
+
+    def setUp(self):
+        use_view_counter(self)
+        self.post = BlogPost.objects.create(
+            title="Popular Post", date=date(2025, 9, 19), category="Policy",
+            description="Test description", slug="popular-post"
+        )
+        self.event = Event.objects.create(
+            title="Popular Event", date=date(2025, 10, 1), time=time(10, 0), category="Forum",
+            description="Test", location="Freetown", slug="popular-event"
+        )
+
+    def test_views_flow_through_buckets_into_the_ranking(self):
+        """Test counted views become events, then hourly buckets, then a ranking"""
+        for _ in range(3):
+            self.client.post(f'/resources/events/{self.event.pk}/increment-view/')
+        self.client.post(f'/resources/blog/{self.post.pk}/increment-view/')
+        view_counts.flush()
+        self.assertEqual(ViewEvent.objects.count(), 2)
+
+        call_command('compact_view_events', stdout=StringIO())
+        self.assertFalse(ViewEvent.objects.exists())
+        self.assertEqual(
+            sorted(ViewBucket.objects.values_list('kind', 'granularity', 'views')),
+            [('blog', 'hour', 1), ('event', 'hour', 3)]
+        )
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/resources/trending/')
+        results = response.json()['results']
+        self.assertEqual([(result['kind'], result['id']) for result in results],
+                         [('event', self.event.pk), ('blog', self.post.pk)])
+        self.assertEqual(results[0]['views'], 3)
+        self.assertEqual(results[1]['slug'], 'popular-post')
+
+    def test_recent_views_outrank_older_ones(self):
+        """Test scores decay with age and old hours are rolled up into days"""
+        now = timezone.now()
+        ViewBucket.objects.create(
+            kind='blog', object_id=self.post.pk, granularity='hour',
+            start=trending._truncate(now - timedelta(days=3), 'hour'), views=10
+        )
+        ViewBucket.objects.create(
+            kind='event', object_id=self.event.pk, granularity='hour',
+            start=trending._truncate(now, 'hour'), views=4
+        )
+        trending.compact(now)
+        self.assertEqual(
+            list(ViewBucket.objects.filter(kind='blog').values_list('granularity', 'views')), [('day', 10)]
+        )
+        results = self.client.get('/resources/trending/').json()['results']
+        self.assertEqual([result['kind'] for result in results], ['event', 'blog'])
+
+        # Outside the window the views no longer count at all
+        trending.compact(now + timedelta(days=8))
+        self.assertFalse(ViewBucket.objects.filter(kind='blog').exists())
+
+    def test_missing_item(self):
+        """Test counting a view of an unknown event gets a 404"""
+        response = self.client.post('/resources/events/missing/increment-view/')
+        self.assertEqual(response.status_code, 404)
+
+
+class SlugAllocationTestCase(TestCase):
+    """Test unique slug generation for content sharing a title"""
+
+    def create_event(self, **kwargs):
+        return Event.objects.create(
+            title="Parliamentary Breakfast Meeting", date=date(2025, 10, 1), time=time(8, 0),
+            category="Forum", description="Test", location="Kampala", **kwargs
+        )
+
+    def test_duplicates_are_numbered_with_constant_queries(self):
+        """Test each duplicate title takes the next number with the same number of queries"""
+        slugs = [self.create_event().slug for _ in range(3)]
+        self.assertEqual(slugs, [
+            'parliamentary-breakfast-meeting',
+            'parliamentary-breakfast-meeting-1',
+            'parliamentary-breakfast-meeting-2',
+        ])
+        for _ in range(12):
+            self.create_event()
+        with CaptureQueriesContext(connection) as early:
+            self.create_event()
+        for _ in range(100):
+            self.create_event()
+        with CaptureQueriesContext(connection) as late:
+            event = self.create_event()
+        self.assertEqual(len(late), len(early))
+        self.assertEqual(event.slug, 'parliamentary-breakfast-meeting-116')
+
+    def test_similar_titles_do_not_collide(self):
+        """Test slugs that merely share the prefix are not taken as numbers"""
+        self.create_event(slug='parliamentary-breakfast-meeting-notes')
+        self.assertEqual(self.create_event().slug, 'parliamentary-breakfast-meeting')
+        self.assertEqual(self.create_event().slug, 'parliamentary-breakfast-meeting-1')
+
+    def test_titles_ending_in_numbers_are_not_part_of_the_series(self):
+        """Test slugs of other titles ending in a year or date do not move the numbering"""
+        self.create_event(slug='parliamentary-breakfast-meeting-2024')
+        self.create_event(slug='parliamentary-breakfast-meeting-20240101')
+        self.assertEqual(self.create_event().slug, 'parliamentary-breakfast-meeting')
+        self.assertEqual(self.create_event().slug, 'parliamentary-breakfast-meeting-1')
+        self.assertEqual(self.create_event().slug, 'parliamentary-breakfast-meeting-2')
+
+    def test_concurrent_claim_is_retried(self):
+        """Test a slug taken between allocation and insert is allocated again"""
+        BlogPost.objects.create(
+            title="Budget Brief", date=date(2025, 9, 19), category="Policy", description="Test"
+        )
+        # The first allocation misses the row above, as a concurrent save would
+        with mock.patch('main.slugs.allocate_slug', side_effect=['budget-brief', 'budget-brief-1']):
+            post = BlogPost.objects.create(
+                title="Budget Brief", date=date(2025, 9, 19), category="Policy", description="Test"
+            )
+        self.assertEqual(post.slug, 'budget-brief-1')
+        self.assertEqual(BlogPost.objects.filter(slug__startswith='budget-brief').count(), 2)
+
+
+@override_settings(RESPONSE_CACHE_TTL=0)
+class CommentCountTestCase(TestCase):
+    """Test cursor-paginated comment threads and the denormalized comment_count"""
+
+    def setUp(self):
+        self.post = BlogPost.objects.create(
+            title="Budget Brief", date=date(2025, 9, 19), category="Policy", description="Test"
+        )
+        self.article = NewsArticle.objects.create(
+            title="Budget Passed", date=date(2025, 9, 19), category="Policy", description="Test"
+        )
+
+    def add_comment(self, number, created_at=None):
+        return BlogComment.objects.create(
+            post=self.post, author_name=f"Reader {number}", author_email="reader@example.com",
+            body="Test", created_at=created_at or timezone.now(),
+        )
+
+    def test_count_follows_inserts_and_deletes(self):
+        """Test adding and deleting comments moves the parent's comment_count"""
+        comments = [self.add_comment(i) for i in range(3)]
+        NewsComment.objects.create(
+            article=self.article, author_name="Reader", author_email="reader@example.com", body="Test"
+        )
+        comments[0].delete()
+        self.post.refresh_from_db()
+        self.article.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+        self.assertEqual(self.article.comment_count, 1)
+
+        BlogComment.objects.filter(post=self.post).delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_posted_comment_is_counted(self):
+        """Test a comment posted through the API is counted and changes the post's ETag, not its updated_at"""
+        etag = self.client.get(f'/resources/blog/{self.post.pk}/')['ETag']
+        updated_at = self.post.updated_at
+        response = self.client.post(f'/resources/blog/{self.post.pk}/comments/', {
+            'author_name': "Reader", 'author_email': "reader@example.com", 'body': "Test",
+        })
+        self.assertEqual(response.status_code, 201)
+        response = self.client.get(f'/resources/blog/{self.post.pk}/')
+        self.assertEqual(response.json()['comment_count'], 1)
+        self.assertNotEqual(response['ETag'], etag)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.updated_at, updated_at)
+
+    def test_comment_pages_cover_every_comment_once(self):
+        """Test following next links returns all comments newest first, counted without COUNT(*)"""
+        created_at = timezone.now()
+        # Comments sharing a timestamp must be told apart by id
+        for i in range(5):
+            self.add_comment(i, created_at=created_at - timedelta(minutes=i // 3))
+        expected = list(self.post.comments.order_by('-created_at', '-id').values_list('id', flat=True))
+        url = f'/resources/blog/{self.post.pk}/comments/?page_size=2'
+        seen = []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                data = self.client.get(url).json()
+            self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
+            self.assertEqual(data['count'], 5)
+            seen.extend(comment['id'] for comment in data['results'])
+            url = data['next']
+        self.assertEqual(seen, expected)
+
+    def test_list_shows_count_without_extra_queries(self):
+        """Test comment_count in list responses costs no query per item"""
+        with CaptureQueriesContext(connection) as before:
+            self.client.get('/resources/blog/')
+        for i in range(3):
+            self.add_comment(i)
+            BlogPost.objects.create(
+                title=f"Post {i}", date=date(2025, 9, 19), category="Policy", description="Test"
+            )
+        with CaptureQueriesContext(connection) as after:
+            data = self.client.get('/resources/blog/').json()
+        self.assertEqual(len(after), len(before))
+        counts = {post['id']: post['comment_count'] for post in data['results']}
+        self.assertEqual(counts[self.post.pk], 3)
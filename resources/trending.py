@@ -0,0 +1,218 @@
+"""
+View analytics and the trending ranking.
+
+Counted views reach the database as ViewEvent rows, appended by the view
+counter's flush (see view_counts.py) in the same transaction that adds them
+to views_count. `compact_view_events` (see compact()) then:
+
+- folds the events into hourly ViewBuckets and deletes them;
+- folds hourly buckets older than HOURLY_RETENTION into daily buckets, and
+  drops daily buckets that fell out of the TRENDING['window_days'] window;
+- scores each item in the window with exponentially time-decayed views
+  (half-life TRENDING['half_life_hours']) and stores the top
+  TRENDING['limit'] as one pre-rendered JSON document in the cache.
+
+/resources/trending/ serves that document, so a request reads the small
+precomputed ranking rather than any view rows; it is only rebuilt on a read
+when the cache lost it.
+"""
+import hashlib
+import math
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from main.caching import get_cache
+from .models import BlogPost, NewsArticle, Publication, Event, ViewEvent, ViewBucket
+
+# Model -> kind stored in ViewEvent and ViewBucket
+TRACKED = {
+    BlogPost: 'blog',
+    NewsArticle: 'news',
+    Publication: 'publication',
+    Event: 'event',
+}
+KIND_MODELS = {kind: model for model, kind in TRACKED.items()}
+
+RANKING_KEY = 'trending:ranking'
+HOURLY_RETENTION = timedelta(hours=48)
+BUCKET_WIDTH = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+DELETE_BATCH = 1000
+
+
+def get_config():
+    config = {
+        'window_days': 7,
+        'half_life_hours': 24,
+        'limit': 20,
+    }
+    config.update(getattr(settings, 'TRENDING', {}))
+    return config
+
+
+def append_view_events(counts, occurred_at):
+    """Append one ViewEvent per item; `counts` holds (model label, pk, views)"""
+    kinds = {model._meta.label: kind for model, kind in TRACKED.items()}
+    ViewEvent.objects.bulk_create([
+        ViewEvent(kind=kinds[label], object_id=pk, occurred_at=occurred_at, views=views)
+        for label, pk, views in counts
+        if label in kinds
+    ], batch_size=500)
+
+
+def _truncate(moment, granularity):
+    moment = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if granularity == 'day' else moment
+
+
+def _add_to_buckets(granularity, totals):
+    """Add {(kind, object_id, start): views} to the buckets of a granularity"""
+    if not totals:
+        return
+    existing = {
+        (bucket.kind, bucket.object_id, bucket.start): bucket
+        for bucket in ViewBucket.objects.select_for_update().filter(
+            granularity=granularity, start__in={start for _, _, start in totals}
+        )
+    }
+    updated, created = [], []
+    for (kind, object_id, start), views in totals.items():
+        bucket = existing.get((kind, object_id, start))
+        if bucket is None:
+            created.append(ViewBucket(
+                kind=kind, object_id=object_id, granularity=granularity, start=start, views=views
+            ))
+        else:
+            bucket.views += views
+            updated.append(bucket)
+    ViewBucket.objects.bulk_update(updated, ['views'], batch_size=500)
+    ViewBucket.objects.bulk_create(created, batch_size=500)
+
+
+def _delete_ids(model, ids):
+    for offset in range(0, len(ids), DELETE_BATCH):
+        model.objects.filter(pk__in=ids[offset:offset + DELETE_BATCH]).delete()
+
+
+def compact_events():
+    """Fold the view events appended so far into hourly buckets; returns events compacted"""
+    last_id = ViewEvent.objects.aggregate(last=Max('id'))['last']
+    if last_id is None:
+        return 0
+    # Events are read and deleted by ID, so rows committed while this runs
+    # are left for the next compaction rather than deleted uncounted
+    totals = defaultdict(int)
+    ids = []
+    for pk, kind, object_id, occurred_at, views in ViewEvent.objects.filter(pk__lte=last_id).values_list(
+        'pk', 'kind', 'object_id', 'occurred_at', 'views'
+    ):
+        totals[(kind, object_id, _truncate(occurred_at, 'hour'))] += views
+        ids.append(pk)
+    with transaction.atomic():
+        _add_to_buckets('hour', totals)
+        _delete_ids(ViewEvent, ids)
+    return len(ids)
+
+
+def roll_up_buckets(now):
+    """Fold whole days of hourly buckets past HOURLY_RETENTION into daily buckets and expire old days"""
+    cutoff = _truncate(now - HOURLY_RETENTION, 'day')
+    totals = defaultdict(int)
+    ids = []
+    for pk, kind, object_id, start, views in ViewBucket.objects.filter(
+        granularity='hour', start__lt=cutoff
+    ).values_list('pk', 'kind', 'object_id', 'start', 'views'):
+        totals[(kind, object_id, _truncate(start, 'day'))] += views
+        ids.append(pk)
+    with transaction.atomic():
+        _add_to_buckets('day', totals)
+        _delete_ids(ViewBucket, ids)
+        window_start = _truncate(now - timedelta(days=get_config()['window_days']), 'day')
+        ViewBucket.objects.filter(granularity='day', start__lt=window_start).delete()
+
+
+def decayed_score(views, age, half_life):
+    """Weight views by how long ago they happened"""
+    return views * math.pow(0.5, max(age.total_seconds(), 0) / half_life.total_seconds())
+
+
+def build_ranking(now):
+    """Score the items viewed within the window and describe the top ones"""
+    config = get_config()
+    half_life = timedelta(hours=config['half_life_hours'])
+    window_start = now - timedelta(days=config['window_days'])
+    scores = defaultdict(float)
+    views = defaultdict(int)
+    for kind, object_id, granularity, start, count in ViewBucket.objects.filter(
+        start__gte=_truncate(window_start, 'day')
+    ).values_list('kind', 'object_id', 'granularity', 'start', 'views'):
+        # Views of a bucket are taken to happen at its midpoint
+        age = now - (start + BUCKET_WIDTH[granularity] / 2)
+        scores[(kind, object_id)] += decayed_score(count, age, half_life)
+        views[(kind, object_id)] += count
+
+    ranked = sorted(scores, key=lambda key: (-scores[key], key))
+    # Deleted items still have buckets; look up a few extra to fill the list
+    candidates = ranked[:config['limit'] * 2]
+    items = {}
+    for kind, model in KIND_MODELS.items():
+        ids = [object_id for item_kind, object_id in candidates if item_kind == kind]
+        if ids:
+            for item in model.objects.filter(pk__in=ids):
+                items[(kind, str(item.pk))] = item
+
+    results = []
+    for key in candidates:
+        item = items.get(key)
+        if item is None:
+            continue
+        results.append({
+            'kind': key[0],
+            'id': key[1],
+            'title': item.title,
+            'slug': getattr(item, 'slug', None) or None,
+            'date': item.date.isoformat() if item.date else None,
+            'score': round(scores[key], 3),
+            'views': views[key],
+        })
+        if len(results) == config['limit']:
+            break
+    return {
+        'generated_at': now.isoformat(),
+        'window_days': config['window_days'],
+        'half_life_hours': config['half_life_hours'],
+        'results': results,
+    }
+
+
+def refresh_ranking(now=None):
+    """Render and store the trending document; returns it"""
+    content = JSONRenderer().render(build_ranking(now or timezone.now()))
+    document = {
+        'content': content,
+        'etag': '"' + hashlib.md5(content).hexdigest() + '"',
+    }
+    get_cache().set(RANKING_KEY, document, timeout=None)
+    return document
+
+
+def get_ranking():
+    """Return the stored trending document, rebuilding it if the cache lost it"""
+    document = get_cache().get(RANKING_KEY)
+    if document is None:
+        document = refresh_ranking()
+    return document
+
+
+def compact(now=None):
+    """Run one compaction and refresh the ranking; returns the number of events compacted"""
+    now = now or timezone.now()
+    compacted = compact_events()
+    roll_up_buckets(now)
+    refresh_ranking(now)
+    return compacted
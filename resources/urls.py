@@ -2,7 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     BlogPostViewSet, NewsArticleViewSet, PublicationViewSet, 
-    EventViewSet, HomepageViewSet
+    EventViewSet, HomepageViewSet, SearchViewSet, TrendingViewSet
 )
 
 # Create router and register viewsets
@@ -12,6 +12,8 @@ router.register(r'news', NewsArticleViewSet, basename='news')
 router.register(r'publications', PublicationViewSet, basename='publications')
 router.register(r'events', EventViewSet, basename='events')
 router.register(r'homepage', HomepageViewSet, basename='homepage')
+router.register(r'search', SearchViewSet, basename='search')
+router.register(r'trending', TrendingViewSet, basename='trending')
 
 urlpatterns = [
     path('', include(router.urls)),
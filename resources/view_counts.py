@@ -0,0 +1,244 @@
+"""
+Write-behind view counters for blog posts, news articles, publications
+and events.
+
+record_view() adds to a counter in this process and, for models with a
+views_count, answers with an estimate (the stored count plus views not
+written yet) without touching the row. A background thread in each process
+(or the `flush_view_counts` command) writes the accumulated views every
+VIEW_COUNTER['interval_ms']:
+
+- pending increments are moved out of memory into a small batch file, so
+  views counted by a process that exits (they are spilled at exit) or
+  fails mid-flush are picked up by the next flush of any process;
+- each batch is applied with one UPDATE ... SET views_count = views_count + n
+  per model and distinct n, so concurrent flushers never read-modify-write
+  and a trending story costs one row update per interval, not per view.
+  The same transaction appends the batch to the ViewEvent stream that
+  feeds the trending ranking (see trending.py);
+- batch files are claimed with a non-blocking lock, as in
+  multimedia.vote_buffer. A crash between the commit and the removal of a
+  batch counts it twice, which view statistics can tolerate. A process
+  keeps adding its own batches to its estimates until their files are
+  gone, so views in a batch another flusher holds are not lost from them.
+
+The updates bypass save(), so they neither move updated_at nor bump content
+versions; cached responses, and the homepage sections showing views_count,
+show the new counts within RESPONSE_CACHE_TTL.
+"""
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Value
+from django.utils import timezone
+
+from .trending import append_view_events
+
+BATCH_PATTERN = 'views.*.pending'
+
+_state_lock = threading.Lock()
+# (model label, pk) -> views counted here and not spilled yet
+_pending = Counter()
+# Views spilled to a batch whose write has not been read back yet
+_in_flight = Counter()
+# Path -> counts of this process's batch files not seen written yet
+_own_batches = {}
+# (model label, pk) -> views_count last read from the database (0 for
+# models without one), which also marks the item as known to exist
+_stored = {}
+_flusher = None
+
+
+def get_config():
+    config = {
+        'directory': os.path.join(settings.BASE_DIR, 'var', 'view-counts'),
+        'interval_ms': 1000,
+    }
+    config.update(getattr(settings, 'VIEW_COUNTER', {}))
+    return config
+
+
+def _directory():
+    directory = str(get_config()['directory'])
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def has_counter(model):
+    return any(field.name == 'views_count' for field in model._meta.concrete_fields)
+
+
+def _stored_counts(model, pks):
+    column = 'views_count' if has_counter(model) else Value(0)
+    return model._default_manager.filter(pk__in=pks).order_by().values_list('pk', column)
+
+
+def record_view(model, pk):
+    """
+    Count one view of an item.
+    Returns the estimated views_count (None for models without one); raises
+    model.DoesNotExist if there is no such item.
+    """
+    key = (model._meta.label, str(pk))
+    with _state_lock:
+        stored = _stored.get(key)
+    if stored is None:
+        # Read once per item and flush interval; later views are memory only
+        row = _stored_counts(model, [pk]).first()
+        if row is None:
+            raise model.DoesNotExist(f'No {model.__name__} matches the given query.')
+        stored = row[1]
+    with _state_lock:
+        stored = _stored.setdefault(key, stored)
+        _pending[key] += 1
+        estimate = stored + _in_flight[key] + _pending[key]
+    _ensure_flusher()
+    return estimate if has_counter(model) else None
+
+
+def _spill():
+    """
+    Move this process's pending views into a batch file.
+    Returns the spilled counts, or None if there were none.
+    """
+    with _state_lock:
+        if not _pending:
+            return None
+        counts = Counter(_pending)
+        _pending.clear()
+        _in_flight.update(counts)
+    batch = {
+        'at': timezone.now().isoformat(),
+        'views': [[label, pk, views] for (label, pk), views in counts.items()],
+    }
+    name = f'views.{time.time_ns()}.{os.getpid()}.{threading.get_ident()}'
+    try:
+        temporary = os.path.join(_directory(), name + '.tmp')
+        with open(temporary, 'w') as f:
+            json.dump(batch, f)
+            f.flush()
+            os.fsync(f.fileno())
+        # Renamed into place, so a flusher never reads a half-written batch
+        path = os.path.join(_directory(), name + '.pending')
+        os.rename(temporary, path)
+    except OSError:
+        with _state_lock:
+            _pending.update(counts)
+            _in_flight.subtract(counts)
+        raise
+    with _state_lock:
+        _own_batches[path] = counts
+    return counts
+
+
+def _apply(batch):
+    """Add the views of a batch with one UPDATE per model and increment, and record them as events"""
+    entries = batch['views']
+    updates = defaultdict(lambda: defaultdict(list))
+    for label, pk, views in entries:
+        updates[label][views].append(pk)
+    with transaction.atomic():
+        for label, by_views in updates.items():
+            model = apps.get_model(label)
+            if not has_counter(model):
+                continue
+            for views, pks in by_views.items():
+                model._default_manager.filter(pk__in=sorted(pks)).update(views_count=F('views_count') + views)
+        append_view_events(entries, datetime.fromisoformat(batch['at']))
+    return sum(views for _, _, views in entries)
+
+
+def _apply_batch(path):
+    """Apply one batch file unless another flusher holds it; returns views written"""
+    try:
+        batch = open(path)
+    except FileNotFoundError:
+        return 0
+    with batch:
+        try:
+            fcntl.flock(batch, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return 0
+        if not os.path.exists(path):
+            # Finished by another flusher before we got the lock
+            return 0
+        written = _apply(json.load(batch))
+        os.remove(path)
+    return written
+
+
+def _refresh_stored(keys, written_batches):
+    """
+    Re-read the stored counts of `keys`, which include every process's
+    flushed views, and stop adding this process's written batches on top.
+    """
+    keys_by_label = defaultdict(list)
+    for label, pk in keys:
+        keys_by_label[label].append(pk)
+    stored = {}
+    for label, pks in keys_by_label.items():
+        rows = _stored_counts(apps.get_model(label), pks)
+        stored.update(((label, str(pk)), views_count) for pk, views_count in rows)
+    with _state_lock:
+        # Items not viewed since the last flush are re-read on their next view
+        _stored.clear()
+        _stored.update(stored)
+        for path in written_batches:
+            _in_flight.subtract(_own_batches.pop(path))
+        for key in [key for key, views in _in_flight.items() if views <= 0]:
+            del _in_flight[key]
+
+
+def flush():
+    """
+    Write counted views to the database, including batches spilled by other
+    or exited processes. Returns the number of views written.
+    """
+    spilled = _spill()
+    written = 0
+    for path in sorted(glob.glob(os.path.join(_directory(), BATCH_PATTERN))):
+        written += _apply_batch(path)
+    with _state_lock:
+        own_batches = dict(_own_batches)
+    # A batch file is removed only after its views are committed, by whichever
+    # flusher applied it; checked before the re-read so the counts include it
+    written_batches = [path for path in own_batches if not os.path.exists(path)]
+    if spilled or written_batches:
+        _refresh_stored({key for counts in own_batches.values() for key in counts}, written_batches)
+    return written
+
+
+def _run_flusher(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush()
+        except Exception as e:
+            # Spilled batches stay on disk and are retried on the next tick
+            print(f"Error flushing view counts: {str(e)}")
+        finally:
+            close_old_connections()
+
+
+def _ensure_flusher():
+    """Start this process's background flusher on the first counted view"""
+    global _flusher
+    interval = get_config()['interval_ms'] / 1000
+    if interval <= 0 or (_flusher is not None and _flusher.is_alive()):
+        return
+    with _state_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_run_flusher, args=(interval,), name='view-count-flusher', daemon=True)
+            _flusher.start()
+            # Views counted since the last tick are left on disk for the next flush
+            atexit.register(_spill)
@@ -1,34 +1,62 @@
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
 from django.db.models import Q
-from .models import BlogPost, NewsArticle, Publication, Event, BlogComment, NewsComment
+from django.http import Http404
+from main.pagination import CursorOptInPagination
+from main.caching import ConditionalGetMixin, prerendered_response
+from multimedia.models import ImageDerivative
+from .models import BlogPost, NewsArticle, Publication, Event, BlogComment, NewsComment, SearchDocument
 from .serializers import (
     BlogPostSerializer, NewsArticleSerializer,
     PublicationSerializer, EventSerializer, HomepageLatestSerializer,
     BlogCommentSerializer, NewsCommentSerializer,
 )
+from .homepage import get_snapshot
+from .search import KINDS, FullTextSearchFilter, search
+from .trending import get_ranking
+from .view_counts import record_view
 
 
-class StandardResultsSetPagination(PageNumberPagination):
-    """Custom pagination class"""
+class StandardResultsSetPagination(CursorOptInPagination):
+    """Custom pagination class; `?cursor=` switches to keyset pages"""
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
 
 
-class BlogPostViewSet(viewsets.ModelViewSet):
+class CommentPagination(CursorOptInPagination):
+    """Newest-first keyset pages of a comment thread; the count is the parent's comment_count"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_only = True
+
+
+def paginated_comments(request, parent, serializer_class):
+    paginator = CommentPagination()
+    page = paginator.paginate_queryset(parent.comments.all(), request)
+    paginator.count = parent.comment_count
+    return paginator.get_paginated_response(serializer_class(page, many=True).data)
+
+
+class BlogPostViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for BlogPost model with full CRUD operations"""
     queryset = BlogPost.objects.all()
     serializer_class = BlogPostSerializer
     pagination_class = StandardResultsSetPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['category', 'featured']
-    search_fields = ['title', 'description', 'content']
+    search_kind = 'blog'
     ordering_fields = ['created_at', 'date', 'title']
     ordering = ['-created_at']
+    # Views and comments move these counters, not updated_at
+    conditional_counters = ['views_count', 'comment_count']
+    # Image variants appear as their derivatives are generated
+    conditional_models = [ImageDerivative]
+    conditional_exempt_actions = ['comments']
 
     @action(detail=False, methods=['get'])
     def featured(self, request):
@@ -60,37 +88,41 @@ class BlogPostViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'], url_path='increment-view')
     def increment_view(self, request, pk=None):
-        """Increment view count for a blog post"""
-        post = self.get_object()
-        post.views_count = (post.views_count or 0) + 1
-        post.save(update_fields=['views_count'])
-        return Response({'views_count': post.views_count})
+        """Count a view of a blog post; returns the estimated total (written behind)"""
+        try:
+            views_count = record_view(BlogPost, pk)
+        except BlogPost.DoesNotExist:
+            raise Http404
+        return Response({'views_count': views_count})
 
     @action(detail=True, methods=['get', 'post'], url_path='comments')
     def comments(self, request, pk=None):
         """List or create comments for a blog post"""
         post = self.get_object()
         if request.method == 'GET':
-            comments = post.comments.all()
-            serializer = BlogCommentSerializer(comments, many=True)
-            return Response(serializer.data)
+            return paginated_comments(request, post, BlogCommentSerializer)
         elif request.method == 'POST':
             serializer = BlogCommentSerializer(data=request.data)
             serializer.is_valid(raise_exception=True)
-            serializer.save(post=post)
+            # The comment and the post's comment_count commit together
+            with transaction.atomic():
+                serializer.save(post=post)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class NewsArticleViewSet(viewsets.ModelViewSet):
+class NewsArticleViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for NewsArticle model with full CRUD operations"""
     queryset = NewsArticle.objects.all()
     serializer_class = NewsArticleSerializer
     pagination_class = StandardResultsSetPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['category', 'featured']
-    search_fields = ['title', 'description', 'content']
+    search_kind = 'news'
     ordering_fields = ['created_at', 'date', 'title']
     ordering = ['-created_at']
+    conditional_counters = ['views_count', 'comment_count']
+    conditional_models = [ImageDerivative]
+    conditional_exempt_actions = ['comments']
 
     @action(detail=False, methods=['get'])
     def featured(self, request):
@@ -125,37 +157,40 @@ class NewsArticleViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'], url_path='increment-view')
     def increment_view(self, request, pk=None):
-        """Increment view count for a news article"""
-        article = self.get_object()
-        article.views_count = (article.views_count or 0) + 1
-        article.save(update_fields=['views_count'])
-        return Response({'views_count': article.views_count})
+        """Count a view of a news article; returns the estimated total (written behind)"""
+        try:
+            views_count = record_view(NewsArticle, pk)
+        except NewsArticle.DoesNotExist:
+            raise Http404
+        return Response({'views_count': views_count})
 
     @action(detail=True, methods=['get', 'post'], url_path='comments')
     def comments(self, request, pk=None):
         """List or create comments for a news article"""
         article = self.get_object()
         if request.method == 'GET':
-            comments = article.comments.all()
-            serializer = NewsCommentSerializer(comments, many=True)
-            return Response(serializer.data)
+            return paginated_comments(request, article, NewsCommentSerializer)
         elif request.method == 'POST':
             serializer = NewsCommentSerializer(data=request.data)
             serializer.is_valid(raise_exception=True)
-            serializer.save(article=article)
+            # The comment and the article's comment_count commit together
+            with transaction.atomic():
+                serializer.save(article=article)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class PublicationViewSet(viewsets.ModelViewSet):
+class PublicationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for Publication model with full CRUD operations"""
     queryset = Publication.objects.all()
     serializer_class = PublicationSerializer
     pagination_class = StandardResultsSetPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['type', 'category', 'featured']
-    search_fields = ['title', 'description']
+    search_kind = 'publication'
     ordering_fields = ['created_at', 'date', 'title']
     ordering = ['-created_at']
+    conditional_models = [ImageDerivative]
+    conditional_timestamp_models = [ImageDerivative]
 
     @action(detail=False, methods=['get'])
     def featured(self, request):
@@ -172,17 +207,28 @@ class PublicationViewSet(viewsets.ModelViewSet):
         categories = [cat for cat in categories if cat]
         return Response(categories)
 
+    @action(detail=True, methods=['post'], url_path='increment-view')
+    def increment_view(self, request, pk=None):
+        """Count a view of a publication towards trending content"""
+        try:
+            record_view(Publication, pk)
+        except Publication.DoesNotExist:
+            raise Http404
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-class EventViewSet(viewsets.ModelViewSet):
+
+class EventViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for Event model with full CRUD operations"""
     queryset = Event.objects.all()
     serializer_class = EventSerializer
     pagination_class = StandardResultsSetPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['category', 'status', 'featured']
-    search_fields = ['title', 'description', 'location']
+    search_kind = 'event'
     ordering_fields = ['created_at', 'date', 'title']
     ordering = ['-created_at']
+    conditional_models = [ImageDerivative]
+    conditional_timestamp_models = [ImageDerivative]
 
     @action(detail=False, methods=['get'])
     def featured(self, request):
@@ -199,6 +245,15 @@ class EventViewSet(viewsets.ModelViewSet):
         categories = [cat for cat in categories if cat]
         return Response(categories)
 
+    @action(detail=True, methods=['post'], url_path='increment-view')
+    def increment_view(self, request, pk=None):
+        """Count a view of an event towards trending content"""
+        try:
+            record_view(Event, pk)
+        except Event.DoesNotExist:
+            raise Http404
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
         """Get upcoming events"""
@@ -229,20 +284,52 @@ class EventViewSet(viewsets.ModelViewSet):
 
 class HomepageViewSet(viewsets.ViewSet):
     """ViewSet for homepage latest updates"""
-    
+
     @action(detail=False, methods=['get'])
     def latest(self, request):
-        """Get latest updates for homepage (featured items from all resource types)"""
-        featured_blog_posts = BlogPost.objects.filter(featured=True)[:3]
-        featured_news_articles = NewsArticle.objects.filter(featured=True)[:3]
-        featured_publications = Publication.objects.filter(featured=True)[:3]
-        featured_events = Event.objects.filter(featured=True)[:3]
-        
-        data = {
-            'featured_blog_posts': BlogPostSerializer(featured_blog_posts, many=True).data,
-            'featured_news_articles': NewsArticleSerializer(featured_news_articles, many=True).data,
-            'featured_publications': PublicationSerializer(featured_publications, many=True).data,
-            'featured_events': EventSerializer(featured_events, many=True).data,
-        }
-        
-        return Response(data)
+        """
+        Get everything the homepage shows (featured items from all resource
+        types, active hero slides and the featured poll) from the
+        pre-rendered snapshot
+        """
+        snapshot = get_snapshot()
+        return prerendered_response(request, snapshot['content'], snapshot['etag'])
+
+
+class TrendingViewSet(viewsets.ViewSet):
+    """Content trending over the past days, across blog, news, publications and events"""
+
+    def list(self, request):
+        """
+        Get the items ranked by time-decayed views, precomputed by
+        `compact_view_events`
+        """
+        ranking = get_ranking()
+        return prerendered_response(request, ranking['content'], ranking['etag'])
+
+
+class SearchViewSet(ConditionalGetMixin, viewsets.ViewSet):
+    """Ranked full-text search across blog posts, news, publications and events"""
+    conditional_models = [SearchDocument]
+    default_limit = 20
+    max_limit = 50
+
+    def list(self, request):
+        """
+        Search with ?q=, optionally narrowed with ?type= (comma-separated
+        blog, news, publication, event). Results come most relevant first,
+        each with a snippet whose matched terms are wrapped in <mark>.
+        """
+        query = request.query_params.get('q', '').strip()
+        kinds = [kind for kind in request.query_params.get('type', '').split(',') if kind]
+        unknown = [kind for kind in kinds if kind not in KINDS]
+        if unknown:
+            return Response(
+                {'error': f"Unknown type: {', '.join(unknown)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+        return Response({'query': query, 'results': search(query, kinds, max(limit, 1))})
@@ -5,3 +5,7 @@ class SettingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'settings'
     verbose_name = 'Settings'
+
+    def ready(self):
+        from main.caching import track_model_versions
+        track_model_versions(self)
@@ -1,15 +1,18 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from main.caching import ConditionalGetMixin
 from .models import PageHeroImage, CitizensVoiceFeedbackLinks
 from .serializers import PageHeroImageSerializer, CitizensVoiceFeedbackLinksSerializer
 
 
-class CitizensVoiceFeedbackLinksView(APIView):
+class CitizensVoiceFeedbackLinksView(ConditionalGetMixin, APIView):
     """
     GET /api/settings/citizens-voice-feedback/
     Returns the three Google form URLs for the Citizens Voice feedback cards.
     """
+    conditional_models = [CitizensVoiceFeedbackLinks]
+
     def get(self, request):
         instance = CitizensVoiceFeedbackLinks.objects.first()
         if not instance:
@@ -22,7 +25,7 @@ class CitizensVoiceFeedbackLinksView(APIView):
         return Response(serializer.data)
 
 
-class PageHeroImageViewSet(viewsets.ReadOnlyModelViewSet):
+class PageHeroImageViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Page Hero Images.
     Use /api/settings/page-hero-images/{page_slug}/ to get hero image for a page.